@@ -3,13 +3,25 @@ Add brand-consistent overlays to Daily Bag marketing images.
 Brand colors: Amber #F59E0B, Deep Orange #EA580C, Dark Navy #141B2D
 """
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from asset_cache import LRUCache
+from export_assets import save_image
+from png_stream import PngStripReader, PngStripWriter
+import tracing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
+from typing import Optional
+import argparse
+import json
 import os
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 BRAND_ASSETS = SCRIPT_DIR.parent / "src" / "brand_assets"
 FONTS_DIR = Path(r"C:\Users\alexb\.claude\skills\canvas-design\canvas-fonts")
+LOGO_PATH = SCRIPT_DIR.parent / "src" / "assets" / "daily-bag-icon-transparent.png"
 
 # Brand colors
 AMBER = (245, 158, 11)  # #F59E0B
@@ -17,8 +29,21 @@ DEEP_ORANGE = (234, 88, 12)  # #EA580C
 DARK_NAVY = (20, 27, 45)  # #141B2D
 WHITE = (255, 255, 255)
 
+# Process-wide asset caches; warmed in the parent before pool workers fork
+FONT_CACHE = LRUCache(maxsize=64, name="fonts")
+LOGO_CACHE = LRUCache(maxsize=16, name="logos")
+STRIP_ROWS = 64  # rows per strip in tiled mode
+
 def load_font(name: str, size: int) -> ImageFont.FreeTypeFont:
-    """Load font from canvas-fonts directory."""
+    """Load font from canvas-fonts directory (cached per name and size)."""
+    return FONT_CACHE.get_or_create((name, size), lambda: _open_font(name, size))
+
+def font_file(name: str) -> Optional[Path]:
+    """Path of the canvas font ``name`` resolves to.
+
+    Returns None when no file matches; build_assets hashes that as "fallback"
+    and _open_font falls back to Arial or Pillow's default.
+    """
     font_paths = [
         FONTS_DIR / name,
         FONTS_DIR / f"{name}.ttf",
@@ -26,29 +51,53 @@ def load_font(name: str, size: int) -> ImageFont.FreeTypeFont:
     ]
     for path in font_paths:
         if path.exists():
-            return ImageFont.truetype(str(path), size)
+            return path
+    return None
+
+def _open_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    path = font_file(name)
+    if path is not None:
+        return ImageFont.truetype(str(path), size)
     # Fallback to Arial
     try:
         return ImageFont.truetype("arial.ttf", size)
     except:
         return ImageFont.load_default()
 
-def add_gradient_bar(img: Image.Image, height: int = 120, opacity: float = 0.85) -> Image.Image:
-    """Add semi-transparent gradient bar at bottom."""
-    result = img.copy().convert("RGBA")
-    width, img_height = result.size
+def load_logo(path: Path, size: int) -> Image.Image:
+    """Load the logo resized to ``size`` square, cached until the file changes.
+
+    The returned image is shared; callers must not modify it.
+    """
+    key = (str(path), size, os.stat(path).st_mtime_ns)
+    return LOGO_CACHE.get_or_create(
+        key, lambda: Image.open(path).convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+    )
 
-    # Create gradient overlay
-    gradient = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(gradient)
+def asset_cache_stats() -> dict:
+    """Hit/miss counters for this process's font and logo caches."""
+    return {cache.name: cache.stats() for cache in (FONT_CACHE, LOGO_CACHE)}
 
-    for y in range(height):
-        # Gradient from transparent to dark navy
-        alpha = int((y / height) * 255 * opacity)
-        draw.line([(0, y), (width, y)], fill=(*DARK_NAVY, alpha))
+@lru_cache(maxsize=32)
+def gradient_ramp(height: int, opacity: float) -> Image.Image:
+    """1px-wide alpha ramp, transparent at the top to ``opacity`` at the bottom."""
+    return Image.frombytes("L", (1, height), bytes(int((y / height) * 255 * opacity) for y in range(height)))
 
-    # Paste gradient at bottom
-    result.paste(gradient, (0, img_height - height), gradient)
+def add_gradient_bar(img: Image.Image, height: int = 120, opacity: float = 0.85) -> Image.Image:
+    """Add semi-transparent gradient bar at bottom.
+
+    RGBA inputs are composited in place (only the bottom band is touched);
+    other modes are converted to RGBA first.
+    """
+    result = img if img.mode == "RGBA" else img.convert("RGBA")
+    width, img_height = result.size
+    height = min(height, img_height)
+    if height <= 0:
+        return result
+
+    # Gradient from transparent to dark navy, stretched across the band
+    mask = gradient_ramp(height, opacity).resize((width, height), Image.Resampling.NEAREST)
+    result.paste(DARK_NAVY, (0, img_height - height, width, img_height), mask)
     return result
 
 def add_text_with_shadow(draw: ImageDraw.Draw, pos: tuple, text: str,
@@ -61,189 +110,514 @@ def add_text_with_shadow(draw: ImageDraw.Draw, pos: tuple, text: str,
     # Main text
     draw.text(pos, text, font=font, fill=fill)
 
-def create_leaderboard_overlay(input_path: str, output_path: str):
-    """Create branded leaderboard marketing image."""
-    # Load image
-    img = Image.open(input_path).convert("RGBA")
-    width, height = img.size
+@dataclass(frozen=True)
+class OverlaySpec:
+    """One branded variant: which sources it applies to and how to draw it.
+
+    ``output`` is a format string; ``{stem}`` and ``{name}`` expand to the
+    matched source file's stem and the spec name.
+    """
+    name: str
+    input_glob: str
+    output: str
+    headline: str
+    subtitle: str
+    title_font: str = "BigShoulders-Bold"
+    title_size: int = 56
+    subtitle_font: str = "Outfit-Regular"
+    subtitle_size: int = 26
+    headline_offset: int = 110  # distance from bottom edge
+    subtitle_offset: int = 50
+    bar_height: int = 140
+    bar_opacity: float = 0.9
+    logo_size: int = 72  # 0 disables the logo
+    logo_position: tuple = (16, 12)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OverlaySpec":
+        data = dict(data)
+        if "logo_position" in data:
+            data["logo_position"] = tuple(data["logo_position"])
+        return cls(**data)
+
+
+# Variant table - add localized / A/B rows here or pass --spec variants.json
+VARIANTS = [
+    OverlaySpec(
+        name="leaderboard",
+        input_glob="dailybag_leaderboard_00002_.png",
+        output="dailybag_leaderboard_branded.png",
+        headline="COMPETE WITH YOUR FAMILY",
+        subtitle="Household leaderboards  •  Real rewards",
+    ),
+    OverlaySpec(
+        name="achievement",
+        input_glob="dailybag_achievement_00001_.png",
+        output="dailybag_achievement_branded.png",
+        headline="LEVEL UP YOUR LIFE",
+        subtitle="Earn XP  •  Unlock achievements  •  Celebrate wins",
+    ),
+    OverlaySpec(
+        name="rewards",
+        input_glob="dailybag_rewards_00001_.png",
+        output="dailybag_rewards_branded.png",
+        headline="TURN CHORES INTO CASH",
+        subtitle="100 points = $1  •  Real money redemptions",
+    ),
+    OverlaySpec(
+        name="family",
+        input_glob="dailybag_family_00001_.png",
+        output="dailybag_family_branded.png",
+        headline="CHORES MADE FUN",
+        subtitle="Gamified tasks for the whole family",
+    ),
+]
+VARIANTS_BY_NAME = {spec.name: spec for spec in VARIANTS}
+
+
+def draw_centered_text(draw: ImageDraw.Draw, y: int, width: int, text: str,
+                       font: ImageFont.FreeTypeFont, fill: tuple, shadow_offset: int = 3):
+    """Draw shadowed text horizontally centered on a canvas of ``width``."""
+    bbox = draw.textbbox((0, 0), text, font=font)
+    x = (width - (bbox[2] - bbox[0])) // 2
+    add_text_with_shadow(draw, (x, y), text, font, fill, shadow_offset=shadow_offset)
+
+
+def paint_overlay(img: Image.Image, spec: OverlaySpec, size: tuple, top: int = 0):
+    """Draw ``spec``'s bar, text and logo onto ``img`` in place.
+
+    ``img`` is RGBA and holds rows ``top`` onwards of a canvas of ``size``;
+    anything that falls outside it is clipped, so the same call paints a
+    whole image or one band of it.
+    """
+    width, height = size
 
     # Add gradient bar at bottom
-    img = add_gradient_bar(img, height=140, opacity=0.9)
-
+    if top + img.height == height:
+        with tracing.span("gradient_bar"):
+            add_gradient_bar(img, height=spec.bar_height, opacity=spec.bar_opacity)
     draw = ImageDraw.Draw(img)
 
-    # Load fonts
-    title_font = load_font("BigShoulders-Bold", 56)
-    subtitle_font = load_font("Outfit-Regular", 26)
-
-    # Main headline
-    headline = "COMPETE WITH YOUR FAMILY"
-    # Get text bbox for centering
-    bbox = draw.textbbox((0, 0), headline, font=title_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 110
-
-    add_text_with_shadow(draw, (x, y), headline, title_font, WHITE)
-
-    # Subtitle with amber accent
-    subtitle = "Household leaderboards  •  Real rewards"
-    bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 50
-
-    add_text_with_shadow(draw, (x, y), subtitle, subtitle_font, AMBER, shadow_offset=2)
-
-    # Add logo in top-left corner
-    logo_path = SCRIPT_DIR.parent / "src" / "assets" / "daily-bag-icon-transparent.png"
-    if logo_path.exists():
-        logo = Image.open(logo_path).convert("RGBA")
-        # Resize to fit nicely
-        logo = logo.resize((72, 72), Image.Resampling.LANCZOS)
-        # Paste directly - transparent background works well
-        img.paste(logo, (16, 12), logo)
-
-    # Save
-    img = img.convert("RGB")
-    img.save(output_path, quality=95)
+    with tracing.span("text"):
+        title_font = load_font(spec.title_font, spec.title_size)
+        subtitle_font = load_font(spec.subtitle_font, spec.subtitle_size)
+
+        # Main headline, then subtitle with amber accent
+        draw_centered_text(draw, height - spec.headline_offset - top, width, spec.headline, title_font, WHITE)
+        draw_centered_text(draw, height - spec.subtitle_offset - top, width, spec.subtitle, subtitle_font,
+                           AMBER, shadow_offset=2)
+
+    # Logo in top-left corner - transparent background pastes cleanly
+    if spec.logo_size and LOGO_PATH.exists():
+        with tracing.span("logo"):
+            logo = load_logo(LOGO_PATH, spec.logo_size)
+            x, y = spec.logo_position
+            img.paste(logo, (x, y - top), logo)
+
+
+def render_overlay(spec: OverlaySpec, input_path: str, output_path: str):
+    """Render one branded image from ``spec``."""
+    with tracing.span("decode", path=str(input_path)):
+        img = Image.open(input_path).convert("RGBA")
+    paint_overlay(img, spec, img.size)
+
+    with tracing.span("encode", path=str(output_path)):
+        img = img.convert("RGB")
+        save_image(img, output_path)
+    tracing.count("overlays_rendered")
     print(f"Saved: {output_path}")
+    return output_path
+
+
+def overlay_rows(spec: OverlaySpec, size: tuple) -> list:
+    """Row ranges (top, bottom) the overlay draws into; all other rows are untouched."""
+    width, height = size
+    top = height - min(spec.bar_height, height)
+    for font_name, font_size, offset, text in ((spec.title_font, spec.title_size, spec.headline_offset, spec.headline),
+                                               (spec.subtitle_font, spec.subtitle_size, spec.subtitle_offset,
+                                                spec.subtitle)):
+        top = min(top, height - offset + load_font(font_name, font_size).getbbox(text)[1])
+    band = (max(0, top), height)
+    if not (spec.logo_size and LOGO_PATH.exists()):
+        return [band]
+
+    logo_top = max(0, spec.logo_position[1])
+    logo_bottom = min(height, spec.logo_position[1] + spec.logo_size)
+    if logo_bottom >= band[0]:
+        return [(min(logo_top, band[0]), height)]
+    return [(logo_top, logo_bottom), band] if logo_bottom > logo_top else [band]
+
+
+def _source_strips(input_path: str, rows: int) -> tuple:
+    """(size, iterator of (top, strip)) without decoding the whole source where possible.
+
+    8-bit PNGs are inflated a strip at a time; uncompressed TIFF/BMP/PPM
+    sources are memory-mapped by Pillow, so cropping them only touches the
+    pages read. Other formats are decoded once, in their own mode.
+    """
+    if PngStripReader.supports(input_path):
+        reader = PngStripReader(input_path)
+        return reader.size, reader.strips(rows)
+
+    src = Image.open(input_path)
+    width, height = src.size
+    return src.size, ((y, src.crop((0, y, width, min(height, y + rows)))) for y in range(0, height, rows))
+
+
+def _tiled_rows(strips, regions: list, paint):
+    """Re-slice source strips at region edges; regions are gathered whole and painted."""
+    pending, region = [], None
+    for strip_top, strip in strips:
+        y, strip_bottom = strip_top, strip_top + strip.height
+        while y < strip_bottom:
+            if region is None:
+                region = next(((r0, r1) for r0, r1 in regions if r1 > y), None)
+            inside = region is not None and y >= region[0]
+            end = min(strip_bottom, region[1] if inside else region[0] if region else strip_bottom)
+            piece = strip.crop((0, y - strip_top, strip.width, end - strip_top))
+            y = end
+            if not inside:
+                yield piece  # untouched rows pass straight through
+                continue
+            pending.append(piece)
+            if end == region[1]:
+                band, offset = Image.new("RGBA", (strip.width, region[1] - region[0])), 0
+                for piece in pending:
+                    band.paste(piece.convert("RGBA"), (0, offset))
+                    offset += piece.height
+                paint(band, region[0])
+                yield band
+                pending, region = [], None
+
+
+def render_overlay_tiled(spec: OverlaySpec, input_path: str, output_path: str, strip_rows: int = STRIP_ROWS):
+    """Render like render_overlay, holding only a strip plus the overlay bands in memory.
+
+    Rows the overlay doesn't touch are streamed from source to output a
+    strip at a time; PNG output is encoded incrementally, other formats are
+    assembled in memory before saving.
+    """
+    size, strips = _source_strips(input_path, strip_rows)
+    regions = overlay_rows(spec, size)
+    rows = _tiled_rows(strips, regions, lambda band, top: paint_overlay(band, spec, size, top))
+
+    with tracing.span("tiled", path=str(output_path), regions=len(regions)):
+        if Path(output_path).suffix.lower() == ".png":
+            with PngStripWriter(output_path, size, "RGB") as writer:
+                for piece in rows:
+                    writer.write(piece.convert("RGB"))
+        else:
+            img, y = Image.new("RGB", size), 0
+            for piece in rows:
+                img.paste(piece.convert("RGB"), (0, y))
+                y += piece.height
+            save_image(img, output_path)
+    tracing.count("overlays_rendered")
+    print(f"Saved: {output_path}")
+    return output_path
+
+
+@dataclass(frozen=True)
+class SharedSource:
+    """A decoded source raster in shared memory; pickles as just its block name."""
+    path: str
+    block: str
+    size: tuple
+    mode: str
+
+
+class SharedSources:
+    """Decode each source once into shared memory, freed after its last job.
+
+    Pool workers attach by name and wrap the block with Image.frombuffer, so
+    every variant of a source reads the same pixels without decoding (or
+    pickling, or copying) them again. Sources are stored as RGBA or RGBX,
+    the modes frombuffer maps in place.
+    """
+
+    def __init__(self):
+        self._blocks = {}  # path -> [SharedSource, SharedMemory, jobs remaining]
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def acquire(self, path: str, uses: int = 1) -> SharedSource:
+        if path in self._blocks:
+            self._blocks[path][2] += uses
+            return self._blocks[path][0]
+        with tracing.span("decode", path=str(path)):
+            with Image.open(path) as src:
+                has_alpha = src.mode in ("RGBA", "LA", "PA") or "transparency" in src.info
+                # RGBX, not RGB: Image.frombuffer only maps 4-byte modes without copying
+                img = src.convert("RGBA" if has_alpha else "RGBX")
+        data = img.tobytes()
+        block = SharedMemory(create=True, size=len(data))
+        block.buf[:len(data)] = data
+        shared = SharedSource(str(path), block.name, img.size, img.mode)
+        self._blocks[path] = [shared, block, uses]
+        return shared
+
+    def release(self, path: str):
+        entry = self._blocks[path]
+        entry[2] -= 1
+        if entry[2] <= 0:
+            del self._blocks[path]
+            entry[1].close()
+            entry[1].unlink()
+
+    def close(self):
+        for path in list(self._blocks):
+            self._blocks[path][2] = 0
+            self.release(path)
+
+
+def overlay_image(spec: OverlaySpec, src: Image.Image) -> Image.Image:
+    """``spec`` drawn over a decoded source, as a new RGB image; ``src`` is only read."""
+    width, _ = src.size
+    img = src.convert("RGB")
+    for top, bottom in overlay_rows(spec, src.size):
+        band = src.crop((0, top, width, bottom)).convert("RGBA")
+        paint_overlay(band, spec, src.size, top)
+        img.paste(band.convert("RGB"), (0, top))
+    return img
+
+
+def render_overlay_shared(spec: OverlaySpec, shared: SharedSource, output_path: str):
+    """Render like render_overlay from a source already decoded into shared memory.
+
+    Only the overlay's rows are copied out and painted; the rest of the
+    output is a straight copy of the shared pixels.
+    """
+    block = SharedMemory(name=shared.block)
+    src = Image.frombuffer(shared.mode, shared.size, block.buf, "raw", shared.mode, 0, 1)
+    try:
+        img = overlay_image(spec, src)
+    finally:
+        del src  # release the buffer export, or close() refuses
+        block.close()
+
+    with tracing.span("encode", path=str(output_path)):
+        save_image(img, output_path)
+    tracing.count("overlays_rendered")
+    print(f"Saved: {output_path}")
+    return output_path
 
-def create_achievement_overlay(input_path: str, output_path: str):
-    """Create branded achievement marketing image."""
-    img = Image.open(input_path).convert("RGBA")
-    width, height = img.size
-
-    img = add_gradient_bar(img, height=140, opacity=0.9)
-    draw = ImageDraw.Draw(img)
-
-    title_font = load_font("BigShoulders-Bold", 56)
-    subtitle_font = load_font("Outfit-Regular", 26)
-
-    headline = "LEVEL UP YOUR LIFE"
-    bbox = draw.textbbox((0, 0), headline, font=title_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 110
-
-    add_text_with_shadow(draw, (x, y), headline, title_font, WHITE)
 
-    subtitle = "Earn XP  •  Unlock achievements  •  Celebrate wins"
-    bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 50
+def create_leaderboard_overlay(input_path: str, output_path: str):
+    """Create branded leaderboard marketing image."""
+    return render_overlay(VARIANTS_BY_NAME["leaderboard"], input_path, output_path)
 
-    add_text_with_shadow(draw, (x, y), subtitle, subtitle_font, AMBER, shadow_offset=2)
 
-    # Logo
-    logo_path = SCRIPT_DIR.parent / "src" / "assets" / "daily-bag-icon-transparent.png"
-    if logo_path.exists():
-        logo = Image.open(logo_path).convert("RGBA").resize((72, 72), Image.Resampling.LANCZOS)
-        img.paste(logo, (16, 12), logo)
+def create_achievement_overlay(input_path: str, output_path: str):
+    """Create branded achievement marketing image."""
+    return render_overlay(VARIANTS_BY_NAME["achievement"], input_path, output_path)
 
-    img = img.convert("RGB")
-    img.save(output_path, quality=95)
-    print(f"Saved: {output_path}")
 
 def create_rewards_overlay(input_path: str, output_path: str):
     """Create branded rewards marketing image."""
-    img = Image.open(input_path).convert("RGBA")
-    width, height = img.size
+    return render_overlay(VARIANTS_BY_NAME["rewards"], input_path, output_path)
 
-    img = add_gradient_bar(img, height=140, opacity=0.9)
-    draw = ImageDraw.Draw(img)
-
-    title_font = load_font("BigShoulders-Bold", 56)
-    subtitle_font = load_font("Outfit-Regular", 26)
-
-    headline = "TURN CHORES INTO CASH"
-    bbox = draw.textbbox((0, 0), headline, font=title_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 110
-
-    add_text_with_shadow(draw, (x, y), headline, title_font, WHITE)
-
-    subtitle = "100 points = $1  •  Real money redemptions"
-    bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 50
-
-    add_text_with_shadow(draw, (x, y), subtitle, subtitle_font, AMBER, shadow_offset=2)
-
-    logo_path = SCRIPT_DIR.parent / "src" / "assets" / "daily-bag-icon-transparent.png"
-    if logo_path.exists():
-        logo = Image.open(logo_path).convert("RGBA").resize((72, 72), Image.Resampling.LANCZOS)
-        img.paste(logo, (16, 12), logo)
-
-    img = img.convert("RGB")
-    img.save(output_path, quality=95)
-    print(f"Saved: {output_path}")
 
 def create_family_overlay(input_path: str, output_path: str):
     """Create branded family lifestyle marketing image."""
-    img = Image.open(input_path).convert("RGBA")
-    width, height = img.size
-
-    img = add_gradient_bar(img, height=140, opacity=0.9)
-    draw = ImageDraw.Draw(img)
-
-    title_font = load_font("BigShoulders-Bold", 56)
-    subtitle_font = load_font("Outfit-Regular", 26)
-
-    headline = "CHORES MADE FUN"
-    bbox = draw.textbbox((0, 0), headline, font=title_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 110
-
-    add_text_with_shadow(draw, (x, y), headline, title_font, WHITE)
-
-    subtitle = "Gamified tasks for the whole family"
-    bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-    text_width = bbox[2] - bbox[0]
-    x = (width - text_width) // 2
-    y = height - 50
-
-    add_text_with_shadow(draw, (x, y), subtitle, subtitle_font, AMBER, shadow_offset=2)
-
-    logo_path = SCRIPT_DIR.parent / "src" / "assets" / "daily-bag-icon-transparent.png"
-    if logo_path.exists():
-        logo = Image.open(logo_path).convert("RGBA").resize((72, 72), Image.Resampling.LANCZOS)
-        img.paste(logo, (16, 12), logo)
-
-    img = img.convert("RGB")
-    img.save(output_path, quality=95)
-    print(f"Saved: {output_path}")
+    return render_overlay(VARIANTS_BY_NAME["family"], input_path, output_path)
+
+
+def load_specs(path: str) -> list:
+    """Load a variant table from a JSON list of OverlaySpec fields."""
+    with open(path, encoding="utf-8") as f:
+        return [OverlaySpec.from_dict(row) for row in json.load(f)]
+
+
+def expand_jobs(specs: list, input_dir: Path, output_dir: Path) -> list:
+    """Resolve each spec's glob into (spec, input_path, output_path) jobs."""
+    jobs = []
+    for spec in specs:
+        for source in sorted(input_dir.glob(spec.input_glob)):
+            output = output_dir / spec.output.format(stem=source.stem, name=spec.name)
+            if output.resolve() == source.resolve():
+                continue  # never overwrite a source with its own render
+            jobs.append((spec, str(source), str(output)))
+    return jobs
+
+
+def warm_assets(specs: list):
+    """Preload every font and logo the specs need into this process's caches.
+
+    Called in the parent before the pool starts (workers inherit the caches on
+    fork) and from the pool initializer (covers spawn-based platforms).
+    """
+    for spec in specs:
+        load_font(spec.title_font, spec.title_size)
+        load_font(spec.subtitle_font, spec.subtitle_size)
+        if spec.logo_size and LOGO_PATH.exists():
+            load_logo(LOGO_PATH, spec.logo_size)
+
+
+def _init_worker(specs: list):
+    """Pool initializer: zero the cache counters a forked worker inherits, then warm.
+
+    Otherwise every worker would report the parent's warm-up misses again;
+    run_batch counts the parent's once.
+    """
+    for cache in (FONT_CACHE, LOGO_CACHE):
+        cache.reset_stats()
+    warm_assets(specs)
+
+
+def _render_one(spec: OverlaySpec, source, output: str, tiled: bool = False) -> str:
+    """``source`` is a path, or a SharedSource already decoded by the parent."""
+    if isinstance(source, SharedSource):
+        render, label = render_overlay_shared, source.path
+    else:
+        render, label = render_overlay_tiled if tiled else render_overlay, source
+    with tracing.profiled(), tracing.span(f"overlay:{spec.name}", source=label):
+        return render(spec, source, output)
+
+
+def _render_job(spec: OverlaySpec, source, output: str, tiled: bool = False) -> tuple:
+    """Pool entry point: render and report this worker's cache counters and trace events."""
+    return _render_one(spec, source, output, tiled), os.getpid(), asset_cache_stats(), tracing.drain()
+
+
+def _sum_stats(per_process: list) -> dict:
+    totals = {}
+    for stats in per_process:
+        for name, counters in stats.items():
+            total = totals.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0})
+            for field in total:
+                total[field] += counters[field]
+    return totals
+
+
+def _by_source(jobs: list) -> dict:
+    """Jobs grouped by source path, in first-seen order."""
+    groups = {}
+    for spec, source, output in jobs:
+        groups.setdefault(source, []).append((spec, output))
+    return groups
+
+
+def run_batch(jobs: list, max_workers: int = None, tiled: bool = False) -> tuple:
+    """Render jobs across a process pool.
+
+    Each source is decoded once into shared memory for all of its variants
+    (in tiled mode sources are streamed per job instead). At most
+    ``max_workers`` + 1 decoded sources are alive at a time.
+
+    Returns (succeeded, failed, cache_stats) where cache_stats sums the
+    asset-cache counters of this process and the workers.
+    """
+    succeeded, failed = [], []
+    specs = list({spec: None for spec, _, _ in jobs})
+    warm_assets(specs)
+    sources = SharedSources()
+
+    if max_workers == 1:
+        try:
+            for source, variants in _by_source(jobs).items():
+                try:
+                    shared = source if tiled else sources.acquire(source, len(variants))
+                except Exception as e:
+                    print(f"Failed: {source} ({e})")
+                    failed += [output for _, output in variants]
+                    continue
+                for spec, output in variants:
+                    try:
+                        succeeded.append(_render_one(spec, shared, output, tiled))
+                    except Exception as e:
+                        print(f"Failed: {output} ({e})")
+                        failed.append(output)
+                    finally:
+                        if not tiled:
+                            sources.release(source)
+        finally:
+            sources.close()
+        return succeeded, failed, _sum_stats([asset_cache_stats()])
+
+    worker_stats = {}
+    futures = {}  # future -> (source, output)
+
+    def collect(done):
+        for future in done:
+            source, output = futures.pop(future)
+            try:
+                output, pid, stats, events = future.result()
+                succeeded.append(output)
+                tracing.absorb(events)
+                worker_stats[pid] = stats  # counters are cumulative per worker
+            except Exception as e:
+                print(f"Failed: {output} ({e})")
+                failed.append(output)
+            if not tiled:
+                sources.release(source)
+
+    limit = max_workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(specs,)) as pool:
+            for source, variants in _by_source(jobs).items():
+                # Bound the decoded sources held at once: wait for older ones to finish first
+                while not tiled and futures and len(sources) > limit:
+                    collect(wait(futures, return_when=FIRST_COMPLETED).done)
+                try:
+                    shared = source if tiled else sources.acquire(source, len(variants))
+                except Exception as e:
+                    print(f"Failed: {source} ({e})")
+                    failed += [output for _, output in variants]
+                    continue
+                for spec, output in variants:
+                    futures[pool.submit(_render_job, spec, shared, output, tiled)] = (source, output)
+            while futures:
+                collect(wait(futures, return_when=FIRST_COMPLETED).done)
+    finally:
+        sources.close()
+    return succeeded, failed, _sum_stats([asset_cache_stats(), *worker_stats.values()])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Render branded Daily Bag marketing images.")
+    parser.add_argument("--spec", help="JSON variant table (defaults to the built-in VARIANTS)")
+    parser.add_argument("--input-dir", default=str(SCRIPT_DIR), help="Directory searched by input globs")
+    parser.add_argument("--output-dir", help="Where renders are written (defaults to --input-dir)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Render only these variant names")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--list", action="store_true", help="Print the resolved jobs and exit")
+    parser.add_argument("--cache-stats", action="store_true", help="Print font/logo cache hit rates")
+    parser.add_argument("--tiled", action="store_true",
+                        help="Stream rows the overlay doesn't touch (bounded memory for print-size sources)")
+    tracing.add_arguments(parser)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    tracing.configure(args.trace, args.profile)
+    specs = load_specs(args.spec) if args.spec else VARIANTS
+    if args.only:
+        specs = [s for s in specs if s.name in set(args.only)]
+
+    input_dir = Path(args.input_dir)
+    output_dir = Path(args.output_dir or args.input_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = expand_jobs(specs, input_dir, output_dir)
+
+    if args.list:
+        for spec, source, output in jobs:
+            print(f"{spec.name}: {source} -> {output}")
+        return 0
+    if not jobs:
+        print("No matching source images.")
+        return 1
+
+    succeeded, failed, cache_stats = run_batch(jobs, max_workers=max(1, args.jobs), tiled=args.tiled)
+    print(f"\n{len(succeeded)}/{len(jobs)} branded images created!")
+    if args.cache_stats:
+        for name, counters in cache_stats.items():
+            print(f"{name} cache: {counters['hits']} hits, {counters['misses']} misses, "
+                  f"{counters['evictions']} evictions")
+    tracing.write()
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    marketing_dir = SCRIPT_DIR
-
-    # Process leaderboard
-    create_leaderboard_overlay(
-        str(marketing_dir / "dailybag_leaderboard_00002_.png"),
-        str(marketing_dir / "dailybag_leaderboard_branded.png")
-    )
-
-    # Process achievement
-    create_achievement_overlay(
-        str(marketing_dir / "dailybag_achievement_00001_.png"),
-        str(marketing_dir / "dailybag_achievement_branded.png")
-    )
-
-    # Process rewards
-    create_rewards_overlay(
-        str(marketing_dir / "dailybag_rewards_00001_.png"),
-        str(marketing_dir / "dailybag_rewards_branded.png")
-    )
-
-    # Process family
-    create_family_overlay(
-        str(marketing_dir / "dailybag_family_00001_.png"),
-        str(marketing_dir / "dailybag_family_branded.png")
-    )
-
-    print("\nAll branded images created!")
+    raise SystemExit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark the image pipeline stages on synthetic inputs.
+
+Each (stage, size) pair runs in a fresh process so its peak RSS is its own:
+a few timed repetitions (best wall time wins), then one extra run under
+tracemalloc for Python-level allocations. The generate_image stage talks to
+a local stub server that answers with an inline base64 PNG of the requested
+size, so the streaming decode path is measured without the network.
+
+    python benchmark.py --save-baseline .cache/bench-baseline.json
+    python benchmark.py --compare .cache/bench-baseline.json --threshold 0.25
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = Path(__file__).parent
+SIZES = {"1k": (1024, 576), "2k": (2048, 1152), "4k": (4096, 2304), "8k": (8192, 4608)}
+STAGES = ["gradient_bar", "overlay", "create_graphic", "decode"]
+METRICS = ("wall_s", "peak_rss", "alloc_peak")
+
+
+def synthetic_image(size: tuple, mode: str = "RGB") -> Image.Image:
+    """Deterministic gradient + noise, so PNGs compress like real renders rather than flat fills."""
+    r = Image.linear_gradient("L").resize(size)
+    g = Image.radial_gradient("L").resize(size)
+    b = Image.effect_noise(size, 48)
+    return Image.merge("RGB", (r, g, b)).convert(mode)
+
+
+def encode_png(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+class StubServer:
+    """Chat-completions stand-in replying with a data URL; the prompt names the size."""
+
+    def __init__(self):
+        self._bodies = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                size_name = payload["messages"][0]["content"].rsplit(" ", 1)[-1]
+                body = stub.body(size_name)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def body(self, size_name: str) -> bytes:
+        with self._lock:
+            if size_name not in self._bodies:
+                data = base64.b64encode(encode_png(synthetic_image(SIZES[size_name]))).decode("ascii")
+                content = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{data}"}}]
+                self._bodies[size_name] = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+            return self._bodies[size_name]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _prepare(stage: str, size_name: str, workdir: Path, stub_url: str):
+    """Build inputs outside the measured region; returns a zero-arg callable to measure."""
+    size = SIZES[size_name]
+    if stage == "gradient_bar":
+        from add_brand_overlay import add_gradient_bar
+        base = synthetic_image(size, "RGBA")
+        bar = size[1] * 140 // 1024  # same proportion as the shipped 1024px variants
+        return lambda: add_gradient_bar(base.copy(), height=bar, opacity=0.9)
+
+    if stage == "overlay":
+        from add_brand_overlay import VARIANTS, render_overlay
+        source = workdir / "source.png"
+        synthetic_image(size).save(source, compress_level=1)
+        return lambda: render_overlay(VARIANTS[0], str(source), str(workdir / "overlay.png"))
+
+    if stage == "create_graphic":
+        from create_ph_graphic import create_graphic
+        return lambda: create_graphic(size=size, output_path=str(workdir / "graphic.png"))
+
+    if stage == "decode":
+        import generate_images as gen
+        gen.OPENROUTER_BASE_URL = stub_url
+        gen.OUTPUT_DIR = workdir
+        session = gen.make_session(1)
+
+        def run():
+            if not gen.generate_image(f"benchmark {size_name}", "decoded.png", session=session):
+                raise RuntimeError("stub request failed")
+        return run
+
+    raise ValueError(f"unknown stage {stage}")
+
+
+def _peak_rss() -> int:
+    """High-water RSS of this process in bytes.
+
+    ru_maxrss survives exec, so a spawned child would report the parent's
+    peak; /proc's VmHWM belongs to the new address space and doesn't.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def _reset_peak_rss():
+    """Drop the high-water mark to current RSS so setup doesn't count (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def measure(stage: str, size_name: str, repeat: int, stub_url: str = None) -> dict:
+    """Run one stage in this process: best-of-``repeat`` wall time, then a traced run."""
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        fn = _prepare(stage, size_name, Path(tmp), stub_url)
+        _reset_peak_rss()
+        rss_before = _peak_rss()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        rss_after = _peak_rss()
+
+        tracemalloc.start()
+        fn()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "wall_s": min(times),
+        "peak_rss": rss_after,
+        "rss_growth": rss_after - rss_before if rss_after is not None else None,
+        "alloc_peak": alloc_peak,
+    }
+
+
+def run_suite(stages: list, sizes: list, repeat: int = 3) -> dict:
+    stub = StubServer() if "decode" in stages else None
+    results = {}
+    try:
+        for stage in stages:
+            for size_name in sizes:
+                if stage == "decode":
+                    stub.body(size_name)  # encode the reply up front, outside the timed region
+                # Fresh process per measurement so one stage's peak RSS can't hide another's
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(measure, stage, size_name, repeat, stub and stub.url).result()
+                key = f"{stage}@{size_name}"
+                results[key] = result
+                print(f"{key:24} {result['wall_s'] * 1000:9.1f} ms  "
+                      f"rss {_mb(result['peak_rss'])}  alloc {_mb(result['alloc_peak'])}")
+    finally:
+        if stub:
+            stub.close()
+    return results
+
+
+def _mb(value) -> str:
+    return "      n/a" if value is None else f"{value / 1e6:7.1f}MB"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Metrics that got worse than baseline by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{key} {metric}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the marketing image pipeline.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown / growth before failing (0.2 = 20%%)")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run_suite(args.stages, args.sizes, max(1, args.repeat))
+
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(),
+                "cpus": os.cpu_count(), "created": time.time()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\nBaseline saved: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        print(f"\n{len(regressions)} regressions past {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Incremental, make-style rebuild of the marketing assets.
+
+Every output is described by a rule listing what it was built from: source
+image hash, resolved font files, logo, overlay spec and renderer version for
+the branded overlays; the exact request payloads for generated images. The
+fingerprints of the last successful build are kept in a manifest, and
+`build` re-renders only outputs whose fingerprint changed or whose file is
+missing - in parallel, through the scripts' own batch runners.
+
+    python build_assets.py status
+    python build_assets.py build --jobs 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from fileutil import file_hash
+
+SCRIPT_DIR = Path(__file__).parent
+MANIFEST_PATH = SCRIPT_DIR / ".cache" / "build-manifest.json"
+
+
+class Manifest:
+    """Last-built fingerprints per output, plus a stat-keyed file hash memo."""
+
+    def __init__(self, path: Path = MANIFEST_PATH):
+        self.path = Path(path)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.outputs = data.get("outputs", {})
+        self.hashes = data.get("hashes", {})
+
+    def file_hash(self, path) -> Optional[str]:
+        """SHA-256 of a file, reusing the stored hash while size and mtime match.
+
+        None when ``path`` is None or the file doesn't exist.
+        """
+        if path is None:
+            return None
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path.resolve())
+        memo = self.hashes.get(key)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+        digest = file_hash(path)
+        self.hashes[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def is_fresh(self, output: str, fingerprint: str) -> bool:
+        entry = self.outputs.get(output)
+        return bool(entry) and entry["fingerprint"] == fingerprint and Path(output).exists()
+
+    def record(self, output: str, fingerprint: str, inputs: dict):
+        self.outputs[output] = {"fingerprint": fingerprint, "inputs": inputs, "built": time.time()}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"outputs": self.outputs, "hashes": self.hashes}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class Rule:
+    group: str  # "overlays" | "images"
+    output: str
+    inputs: dict  # everything the output depends on, already fingerprinted
+    job: object  # what the group's batch runner needs to rebuild it
+
+    @property
+    def fingerprint(self) -> str:
+        blob = json.dumps(self.inputs, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def overlay_rules(manifest: Manifest, spec_path: str = None) -> list:
+    import add_brand_overlay as overlay
+
+    specs = overlay.load_specs(spec_path) if spec_path else overlay.VARIANTS
+    renderer = manifest.file_hash(overlay.__file__)
+    logo = manifest.file_hash(overlay.LOGO_PATH)
+    rules = []
+    for spec, source, output in overlay.expand_jobs(specs, SCRIPT_DIR, SCRIPT_DIR):
+        inputs = {
+            "source": manifest.file_hash(source),
+            "fonts": {name: manifest.file_hash(overlay.font_file(name)) or "fallback"
+                      for name in (spec.title_font, spec.subtitle_font)},
+            "logo": logo if spec.logo_size else None,
+            "spec": asdict(spec),
+            "renderer": renderer,
+        }
+        rules.append(Rule("overlays", output, inputs, (spec, source, output)))
+    return rules
+
+
+def image_rules(manifest: Manifest) -> list:
+    import generate_images as gen
+
+    rules = []
+    for item in gen.PROMPTS:
+        output = str(gen.OUTPUT_DIR / item["filename"])
+        # Remote output depends on the request alone, not on this script's code
+        inputs = {"requests": [gen.build_payload(item["prompt"], model) for model in gen.MODELS]}
+        rules.append(Rule("images", output, inputs, item))
+    return rules
+
+
+def collect_rules(manifest: Manifest, groups: list, spec_path: str = None) -> list:
+    rules = []
+    if "overlays" in groups:
+        rules += overlay_rules(manifest, spec_path)
+    if "images" in groups:
+        rules += image_rules(manifest)
+    return rules
+
+
+def rebuild(stale: list, jobs: int) -> set:
+    """Run the stale rules through each group's batch runner; returns outputs built."""
+    built = set()
+    overlays = [rule.job for rule in stale if rule.group == "overlays"]
+    if overlays:
+        import add_brand_overlay as overlay
+        succeeded, _, _ = overlay.run_batch(overlays, max_workers=jobs)
+        built.update(succeeded)
+
+    prompts = [rule.job for rule in stale if rule.group == "images"]
+    if prompts:
+        import generate_images as gen
+        from result_cache import ResultCache
+        if not gen.OPENROUTER_API_KEY:
+            print("Skipping images: OPENROUTER_API_KEY not found")
+        else:
+            cache = ResultCache()
+            try:
+                succeeded = gen.run_prompts(prompts, gen.MODELS, concurrency=jobs, cache=cache)
+            finally:
+                cache.close()
+            built.update(str(gen.OUTPUT_DIR / name) for name in succeeded)
+    return built
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Rebuild only the marketing assets whose inputs changed.")
+    parser.add_argument("command", choices=["build", "status"], nargs="?", default="build")
+    parser.add_argument("--only", nargs="+", choices=["overlays", "images"], default=["overlays", "images"])
+    parser.add_argument("--spec", help="Overlay variant table (defaults to add_brand_overlay.VARIANTS)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="Treat every output as stale")
+    parser.add_argument("--manifest", default=str(MANIFEST_PATH))
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    manifest = Manifest(args.manifest)
+    rules = collect_rules(manifest, args.only, args.spec)
+    stale = [rule for rule in rules if args.force or not manifest.is_fresh(rule.output, rule.fingerprint)]
+
+    if args.command == "status" or not stale:
+        for rule in rules:
+            print(f"{'stale' if rule in stale else 'fresh'}  {rule.output}")
+        print(f"\n{len(stale)}/{len(rules)} outputs out of date")
+        manifest.save()  # keep the hash memo warm
+        return 0
+
+    print(f"Rebuilding {len(stale)}/{len(rules)} outputs")
+    built = rebuild(stale, max(1, args.jobs))
+    for rule in stale:
+        if rule.output in built:
+            manifest.record(rule.output, rule.fingerprint, rule.inputs)
+    manifest.save()
+
+    failed = len(stale) - len(built & {rule.output for rule in stale})
+    print(f"\nBuilt {len(stale) - failed}/{len(stale)} stale outputs")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Plan ComfyUI batches so shared work runs once per submission.
+
+Most workflows here differ only in prompt text, seed and filename_prefix.
+The planner hashes every node together with everything upstream of it
+(a Merkle hash), so identical subgraphs - model / CLIP / VAE loaders, an
+empty negative prompt, the latent - compare equal across jobs. Jobs that
+use the same loaders are merged into one graph where those nodes appear
+once and each job keeps its own sampling branch and SaveImage; the outputs
+are split back per job by SaveImage node id. Every job still gets exactly
+its own seed and prompt.
+
+With --latent-batch, jobs that differ *only* in seed are further collapsed
+into a single EmptyLatentImage.batch_size > 1 sampler run. That is faster
+still, but only the first image reproduces its requested seed, so it is
+opt-in.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from comfy_runner import (ComfyClient, Job, OUTPUT_DIR, SEED_INPUTS, from_cache, is_link,
+                          build_parser as build_runner_parser, graph_key, load_batch, load_workflow,
+                          patch_workflow, resume_jobs, run_jobs, validate_jobs)
+from comfy_schema import NodeSchema
+from job_journal import JobJournal
+from result_cache import ResultCache, workflow_key
+
+OUTPUT_ONLY_INPUTS = {"filename_prefix"}
+
+
+def node_hashes(graph: dict, ignore: set = frozenset()) -> dict:
+    """Merkle hash per node id: class_type, literal inputs and upstream hashes.
+
+    Inputs named in ``ignore`` are left out, so nodes that differ only there
+    hash equal.
+    """
+    hashes = {}
+
+    def visit(node_id, stack=()):
+        if node_id in hashes:
+            return hashes[node_id]
+        if node_id in stack:
+            raise ValueError(f"cycle through node {node_id}")
+        node = graph[node_id]
+        inputs = {}
+        for name, value in sorted(node.get("inputs", {}).items()):
+            if name in ignore:
+                continue
+            if is_link(value) and value[0] in graph:
+                inputs[name] = ["link", visit(value[0], stack + (node_id,)), value[1]]
+            else:
+                inputs[name] = value
+        blob = json.dumps([node["class_type"], inputs], sort_keys=True, separators=(",", ":"))
+        hashes[node_id] = hashlib.sha1(blob.encode("utf-8")).hexdigest()
+        return hashes[node_id]
+
+    for node_id in graph:
+        visit(node_id)
+    return hashes
+
+
+def output_nodes(graph: dict) -> list:
+    """Nodes that write files (anything with a filename_prefix input)."""
+    return [node_id for node_id, node in graph.items() if "filename_prefix" in node.get("inputs", {})]
+
+
+def loader_signature(graph: dict) -> frozenset:
+    """Hashes of the model / CLIP / VAE loaders a graph uses."""
+    hashes = node_hashes(graph)
+    return frozenset(hashes[node_id] for node_id, node in graph.items()
+                     if "Loader" in node["class_type"]
+                     and not any(is_link(v) for v in node.get("inputs", {}).values()))
+
+
+def merge_graphs(graphs: list) -> tuple:
+    """Union ``graphs`` into one graph, keeping each distinct subgraph once.
+
+    Returns (merged_graph, id_maps) where id_maps[i] maps graph i's node ids
+    to ids in the merged graph.
+    """
+    merged, by_hash, id_maps = {}, {}, []
+    for graph in graphs:
+        hashes = node_hashes(graph)
+        id_maps.append({node_id: by_hash.setdefault(hashes[node_id], str(len(by_hash) + 1))
+                        for node_id in graph})
+
+    for graph, id_map in zip(graphs, id_maps):
+        for node_id, node in graph.items():
+            new_id = id_map[node_id]
+            if new_id in merged:
+                continue
+            inputs = {name: [id_map[value[0]], value[1]] if is_link(value) and value[0] in graph else value
+                      for name, value in node.get("inputs", {}).items()}
+            merged[new_id] = {"class_type": node["class_type"], "inputs": inputs}
+    return merged, id_maps
+
+
+@dataclass
+class Submission:
+    job: Job  # what is actually queued
+    members: list  # the original Jobs it stands for
+    routes: list = field(default_factory=list)  # per member: (merged output node ids, batch index, batch size)
+    latent_batch: bool = False
+
+
+def _collapse_seeds(jobs: list) -> list:
+    """Group jobs whose graphs differ only in seed / filename_prefix."""
+    ignore = set(SEED_INPUTS) | OUTPUT_ONLY_INPUTS
+    groups = {}
+    for job in jobs:
+        batch_sizes = [n["inputs"]["batch_size"] for n in job.graph.values() if "batch_size" in n.get("inputs", {})]
+        if batch_sizes != [1]:
+            groups[id(job)] = [job]  # can't fold into a single latent batch
+            continue
+        shape = tuple(sorted(node_hashes(job.graph, ignore).values()))
+        groups.setdefault(shape, []).append(job)
+    return list(groups.values())
+
+
+def plan(jobs: list, max_group: int = 8, latent_batch: bool = False, max_batch: int = 8) -> list:
+    """Turn jobs into Submissions, each sharing its loaders across members.
+
+    Submissions using the same models are emitted consecutively so the
+    server keeps them resident between prompts.
+    """
+    by_loaders = {}
+    for job in jobs:
+        by_loaders.setdefault(loader_signature(job.graph), []).append(job)
+
+    submissions = []
+    for members in by_loaders.values():
+        units = []
+        if latent_batch:
+            for group in _collapse_seeds(members):
+                for i in range(0, len(group), max_batch):
+                    units.append(group[i:i + max_batch])
+        else:
+            units = [[job] for job in members]
+
+        for i in range(0, len(units), max_group):
+            chunk = units[i:i + max_group]
+            if len(chunk) == 1 and len(chunk[0]) == 1:
+                job = chunk[0][0]
+                submissions.append(Submission(job=Job(name=job.name, graph=job.graph), members=[job],
+                                              routes=[(output_nodes(job.graph), 0, 1)]))
+                continue
+
+            graphs = []
+            for unit in chunk:
+                graph = unit[0].graph
+                if len(unit) > 1:
+                    graph = patch_workflow(graph, batch_size=len(unit))
+                graphs.append(graph)
+            merged, id_maps = merge_graphs(graphs)
+            name = "+".join(job.name for unit in chunk for job in unit)
+            submission = Submission(job=Job(name=name, graph=merged), members=[],
+                                    latent_batch=any(len(unit) > 1 for unit in chunk))
+            for unit, graph, id_map in zip(chunk, graphs, id_maps):
+                routes = [id_map[node_id] for node_id in output_nodes(graph)]
+                for index, job in enumerate(unit):
+                    submission.members.append(job)
+                    submission.routes.append((routes, index, len(unit)))
+            submissions.append(submission)
+    return submissions
+
+
+def _prefix(graph: dict, fallback: str) -> str:
+    return next((n["inputs"]["filename_prefix"] for n in graph.values()
+                 if "filename_prefix" in n.get("inputs", {})), fallback)
+
+
+def split_outputs(submission: Submission, output_dir: Path):
+    """Hand the merged submission's outputs back to its member jobs."""
+    for member, (routes, index, count) in zip(submission.members, submission.routes):
+        member.prompt_id = submission.job.prompt_id
+        member.status, member.error = submission.job.status, submission.job.error
+        if submission.job.status != "done":
+            continue
+
+        images = [o for o in submission.job.outputs if o.get("node") in routes and "local_path" in o]
+        if count > 1:
+            # One latent batch serves several members: image i belongs to member i
+            per_member = len(images) // count
+            images = images[index * per_member:(index + 1) * per_member]
+
+        member.outputs = images
+        member.files = []
+        prefix = _prefix(member.graph, member.name)
+        for n, image in enumerate(images, start=1):
+            path = Path(image["local_path"])
+            if count > 1:
+                dest = Path(output_dir) / f"{prefix}_{n:05d}_{path.suffix}"
+                if dest != path:
+                    os.replace(path, dest)
+                    image["local_path"] = str(dest)
+                path = dest
+            member.files.append(path)
+
+
+def run_planned(jobs: list, client: ComfyClient, output_dir: Path = OUTPUT_DIR, max_pending: int = 2,
+                cache: ResultCache = None, force: bool = False, max_group: int = 8,
+                latent_batch: bool = False, journal: JobJournal = None, schema: NodeSchema = None) -> list:
+    """Plan, run and split ``jobs``; results are cached and journaled per original job.
+
+    With a ``schema``, each merged submission graph is validated before it
+    is queued; an invalid one fails all of its members.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    todo = []
+    for job in jobs:
+        if cache is not None and not force and from_cache(job, cache, output_dir):
+            job.status = "cached"
+            print(f"CACHED: {job.name}")
+            if journal is not None:
+                journal.done(job.name, job.files, graph_key(job))
+        else:
+            todo.append(job)
+
+    submissions = plan(todo, max_group=max_group, latent_batch=latent_batch)
+    print(f"Planned {len(todo)} jobs into {len(submissions)} submissions")
+    runnable = submissions
+    if schema is not None:
+        valid = {id(job) for job in validate_jobs([s.job for s in submissions], schema)}
+        runnable = [s for s in submissions if id(s.job) in valid]
+    if journal is not None:
+        # Merged submissions run as one prompt, so members are in flight from the start
+        for job in todo:
+            journal.started(job.name, graph_key(job))
+    run_jobs([s.job for s in runnable], client, output_dir, max_pending=max_pending)
+
+    for submission in submissions:
+        split_outputs(submission, output_dir)
+        for member in submission.members:
+            if journal is not None:
+                if member.status == "done":
+                    journal.done(member.name, member.files, graph_key(member))
+                else:
+                    journal.failed(member.name, member.error or "not run", graph_key(member))
+            key = workflow_key(member.graph)
+            if cache is None or key is None or member.status != "done" or submission.latent_batch:
+                continue  # latent-batched images don't reproduce their own seed
+            for i, path in enumerate(member.files):
+                cache.put(f"{key}-{i}", path, {"job": member.name})
+    return jobs
+
+
+def main(argv: list = None) -> int:
+    parser = build_runner_parser()
+    parser.description = "Plan and queue ComfyUI workflows with shared loaders merged."
+    parser.add_argument("--max-group", type=int, default=8, help="Jobs merged into one submission")
+    parser.add_argument("--latent-batch", action="store_true",
+                        help="Fold seed-only variants into one batch_size > 1 run (changes their seeds)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without queueing")
+    args = parser.parse_args(argv)
+
+    with open(args.spec, encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, list) or "jobs" in raw:
+        jobs = load_batch(args.spec, Path(args.spec).parent)
+    else:
+        graph = patch_workflow(load_workflow(args.spec), prompt=args.prompt, seed=args.seed,
+                               filename_prefix=args.filename_prefix)
+        jobs = [Job(name=Path(args.spec).stem, graph=graph)]
+
+    schema = NodeSchema() if args.validate else None
+    journal = None if args.dry_run else JobJournal(args.journal)
+    runnable = validate_jobs(jobs, schema, journal) if schema is not None else jobs
+
+    if args.dry_run:
+        for submission in plan(runnable, max_group=args.max_group, latent_batch=args.latent_batch):
+            nodes = len(submission.job.graph)
+            total = sum(len(job.graph) for job in submission.members)
+            print(f"{submission.job.name}: {len(submission.members)} jobs, {nodes} nodes (from {total})")
+        return 0
+
+    if args.resume:
+        runnable = resume_jobs(runnable, journal)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    client = ComfyClient(args.server)
+    try:
+        run_planned(runnable, client, args.output_dir, max_pending=max(1, args.max_pending), cache=cache,
+                    force=args.force, max_group=args.max_group, latent_batch=args.latent_batch,
+                    journal=journal, schema=schema)
+    finally:
+        client.close()
+        if cache is not None:
+            cache.close()
+
+    ok = sum(job.status in ("done", "cached") for job in jobs)
+    print(f"\nComplete: {ok}/{len(jobs)} jobs")
+    return 0 if ok == len(jobs) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Headless runner for the ComfyUI API-format workflows in this folder.
+
+Loads a workflow, patches prompt / seed / size / filename_prefix from a batch
+spec, keeps the server's queue topped up with a bounded number of pending
+jobs, and follows progress and outputs over the ComfyUI websocket.
+
+Batch spec (JSON):
+    {
+      "defaults": {"workflow": "flux_schnell_gguf_workflow.json", "width": 1344, "height": 768},
+      "jobs": [
+        {"name": "leaderboard-en", "prompt": "...", "seed": 42, "filename_prefix": "lb_en"},
+        {"name": "leaderboard-es", "prompt": "...", "seed": 42, "filename_prefix": "lb_es"}
+      ]
+    }
+A bare list of jobs is accepted too.
+
+Every job's state is appended to a journal (.cache/journal/), so an
+interrupted batch can be picked up with --resume.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+import requests
+import websocket  # websocket-client
+
+import job_journal
+from comfy_schema import NodeSchema, validate_workflow
+from job_journal import JOURNAL_DIR, JobJournal, job_key
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, canonicalize_workflow, link_or_copy, workflow_key
+
+SCRIPT_DIR = Path(__file__).parent
+COMFY_URL = os.getenv("COMFY_URL", "http://127.0.0.1:8188")
+OUTPUT_DIR = SCRIPT_DIR / "images"
+
+TEXT_INPUTS = ("text", "clip_l", "t5xxl")
+SEED_INPUTS = ("seed", "noise_seed")
+POSITIVE_INPUTS = ("positive", "conditioning")
+NEGATIVE_INPUTS = ("negative",)
+PATCH_FIELDS = ("prompt", "negative", "seed", "width", "height", "filename_prefix", "batch_size")
+RECONNECT_ATTEMPTS = 3  # per websocket drop, and stalls in a row before giving up
+RECONNECT_DELAY = 1.0  # seconds, times the attempt number
+
+
+def load_workflow(path) -> dict:
+    """Load an API-format graph, dropping "_comment" style metadata keys."""
+    with open(path, encoding="utf-8") as f:
+        graph = json.load(f)
+    return {node_id: node for node_id, node in graph.items() if not node_id.startswith("_")}
+
+
+def is_link(value) -> bool:
+    """True for an API-graph input that links to another node: [node_id, output_index]."""
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], str)
+
+
+def conditioning_sources(graph: dict, input_names: tuple) -> list:
+    """Text-encode nodes wired into any of ``input_names`` on any node."""
+    found = []
+    for node in graph.values():
+        for name in input_names:
+            link = node.get("inputs", {}).get(name)
+            if is_link(link) and link[0] in graph:
+                if any(k in graph[link[0]]["inputs"] for k in TEXT_INPUTS) and link[0] not in found:
+                    found.append(link[0])
+    return found
+
+
+def _set_text(node: dict, text: str):
+    for name in TEXT_INPUTS:
+        if name in node["inputs"]:
+            node["inputs"][name] = text
+
+
+def patch_workflow(graph: dict, prompt: str = None, negative: str = None, seed: int = None,
+                   width: int = None, height: int = None, filename_prefix: str = None,
+                   batch_size: int = None) -> dict:
+    """Return a copy of ``graph`` with the given fields patched in.
+
+    Prompts are applied to the text encoders feeding a sampler's positive
+    (or guider's conditioning) input; ``negative`` to those feeding negative.
+    """
+    graph = json.loads(json.dumps(graph))
+
+    if prompt is not None:
+        for node_id in conditioning_sources(graph, POSITIVE_INPUTS):
+            _set_text(graph[node_id], prompt)
+    if negative is not None:
+        for node_id in conditioning_sources(graph, NEGATIVE_INPUTS):
+            _set_text(graph[node_id], negative)
+
+    for node in graph.values():
+        inputs = node.get("inputs", {})
+        if seed is not None:
+            for name in SEED_INPUTS:
+                if name in inputs:
+                    inputs[name] = seed
+        if width is not None and "width" in inputs and "height" in inputs:
+            inputs["width"] = width
+        if height is not None and "width" in inputs and "height" in inputs:
+            inputs["height"] = height
+        if batch_size is not None and "batch_size" in inputs:
+            inputs["batch_size"] = batch_size
+        if filename_prefix is not None and "filename_prefix" in inputs:
+            inputs["filename_prefix"] = filename_prefix
+    return graph
+
+
+@dataclass
+class Job:
+    name: str
+    graph: dict
+    prompt_id: str = None
+    status: str = "pending"  # pending | queued | running | done | cached | failed
+    outputs: list = field(default_factory=list)  # ComfyUI file descriptors, tagged with "node"
+    files: list = field(default_factory=list)  # local paths written
+    error: str = None
+
+
+def load_batch(path, workflow_dir: Path = SCRIPT_DIR) -> list:
+    """Expand a batch spec file into patched Jobs."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    defaults = spec.get("defaults", {})
+
+    jobs, workflows = [], {}
+    for i, row in enumerate(spec["jobs"]):
+        row = {**defaults, **row}
+        workflow = str(workflow_dir / row["workflow"])
+        if workflow not in workflows:
+            workflows[workflow] = load_workflow(workflow)
+        patch = {k: row[k] for k in PATCH_FIELDS if k in row}
+        name = row.get("name") or f"{Path(workflow).stem}-{i}"
+        jobs.append(Job(name=name, graph=patch_workflow(workflows[workflow], **patch)))
+    return jobs
+
+
+class ComfyClient:
+    """Thin HTTP + websocket client for one ComfyUI server."""
+
+    def __init__(self, base_url: str = COMFY_URL, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = uuid.uuid4().hex
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def connect(self, idle_timeout: float = None) -> websocket.WebSocket:
+        parsed = urlparse(self.base_url)
+        scheme = "wss" if parsed.scheme == "https" else "ws"
+        ws = websocket.WebSocket()
+        ws.connect(f"{scheme}://{parsed.netloc}/ws?clientId={self.client_id}", timeout=self.timeout)
+        ws.settimeout(idle_timeout)
+        return ws
+
+    def queue_prompt(self, graph: dict) -> str:
+        response = self.session.post(f"{self.base_url}/prompt", timeout=self.timeout,
+                                     json={"prompt": graph, "client_id": self.client_id})
+        if response.status_code != 200:
+            raise RuntimeError(f"/prompt rejected ({response.status_code}): {response.text[:300]}")
+        return response.json()["prompt_id"]
+
+    def history(self, prompt_id: str) -> dict:
+        response = self.session.get(f"{self.base_url}/history/{prompt_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get(prompt_id, {})
+
+    def download(self, image: dict, dest_dir: Path) -> Path:
+        """Stream one output file (as described in an "executed" message) to ``dest_dir``."""
+        query = urlencode({k: image.get(k, "") for k in ("filename", "subfolder", "type")})
+        dest = Path(dest_dir) / image["filename"]
+        tmp = dest.with_name(dest.name + ".part")
+        with self.session.get(f"{self.base_url}/view?{query}", timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            with open(tmp, "wb") as f:
+                for chunk in resp.iter_content(64 * 1024):
+                    f.write(chunk)
+        os.replace(tmp, dest)
+        return dest
+
+    def close(self):
+        self.session.close()
+
+
+def from_cache(job: Job, cache: ResultCache, output_dir: Path) -> bool:
+    """Materialize the cached outputs of ``job``; False if nothing is cached."""
+    key = workflow_key(job.graph)
+    if key is None:
+        return False
+    prefix = next((n["inputs"]["filename_prefix"] for n in job.graph.values()
+                   if "filename_prefix" in n.get("inputs", {})), job.name)
+    count = 0
+    while cache.get(f"{key}-{count}") is not None:
+        count += 1
+    if not count:
+        return False
+    for i in range(count):
+        cached = cache.get(f"{key}-{i}")
+        dest = output_dir / f"{prefix}_{i + 1:05d}_{cached.suffix}"
+        link_or_copy(cached, dest)
+        job.files.append(dest)
+    return True
+
+
+def graph_key(job: Job) -> str:
+    """Journal key: the graph without comments or output naming (seeds included, even random ones)."""
+    return job_key(canonicalize_workflow(job.graph))
+
+
+def resume_jobs(jobs: list, journal: JobJournal) -> list:
+    """Mark the jobs ``journal`` records as done (outputs intact); returns the rest."""
+    finished = journal.finished({job.name: graph_key(job) for job in jobs})
+    todo = []
+    for job in jobs:
+        entry = finished.get(job.name)
+        if entry is None:
+            todo.append(job)
+            continue
+        job.status = "done"
+        job.files = [Path(o["path"]) for o in entry.get("outputs", [])]
+    if finished:
+        print(f"Resuming: skipping {len(finished)} finished jobs")
+    return todo
+
+
+def run_jobs(jobs: list, client: ComfyClient, output_dir: Path = OUTPUT_DIR, max_pending: int = 2,
+             cache: ResultCache = None, force: bool = False, idle_timeout: float = 900,
+             journal: JobJournal = None) -> list:
+    """Submit ``jobs`` keeping at most ``max_pending`` queued on the server.
+
+    The next job is queued as soon as one finishes, so the GPU never waits on
+    us, while a long batch doesn't flood the server queue. Returns ``jobs``
+    with status, outputs and local files filled in; each state change is
+    also appended to ``journal``.
+
+    A dropped or stalled websocket is reopened (RECONNECT_ATTEMPTS tries) and
+    the in-flight prompts are checked against /history, so completions
+    missed meanwhile still finish. If the run dies anyway, its in-flight
+    jobs are journaled as failed before the error propagates.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def note(job, state, **fields):
+        if journal is not None:
+            journal.record(job.name, state, graph_key(job), **fields)
+
+    todo = []
+    for job in jobs:
+        if cache is not None and not force and from_cache(job, cache, output_dir):
+            job.status = "cached"
+            print(f"CACHED: {job.name}")
+            if journal is not None:
+                journal.done(job.name, job.files, graph_key(job))
+        else:
+            todo.append(job)
+    if not todo:
+        return jobs
+
+    ws = client.connect(idle_timeout)
+    in_flight = {}
+    resynced = set()  # prompts in flight across a reconnect; their executed events may be incomplete
+    stalls = 0
+
+    def submit_next():
+        while todo and len(in_flight) < max_pending:
+            job = todo.pop(0)
+            try:
+                job.prompt_id = client.queue_prompt(job.graph)
+            except (RuntimeError, requests.RequestException) as e:
+                job.status, job.error = "failed", str(e)
+                print(f"Failed to queue {job.name}: {e}")
+                note(job, "failed", reason=job.error)
+                continue
+            job.status = "queued"
+            note(job, "queued", prompt_id=job.prompt_id)
+            in_flight[job.prompt_id] = job
+            print(f"Queued: {job.name} ({job.prompt_id})")
+
+    def failed(job, error):
+        job.status, job.error = "failed", error
+        print(f"Failed: {job.name}: {job.error}")
+        note(job, "failed", reason=job.error)
+        del in_flight[job.prompt_id]
+        submit_next()
+
+    def finished(job):
+        if job.prompt_id in resynced:
+            job.outputs = []  # refetched from /history by _finish
+        _finish(job, client, output_dir, cache)
+        if job.status == "done":
+            if journal is not None:
+                journal.done(job.name, job.files, graph_key(job))
+        else:
+            note(job, "failed", reason=job.error)
+        del in_flight[job.prompt_id]
+        submit_next()
+
+    def reconnect(error):
+        """Open a new socket after a drop or stall, then catch up on what was missed."""
+        nonlocal ws
+        ws.close()
+        for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+            print(f"Websocket lost ({error or type(error).__name__}), reconnecting ({attempt}/{RECONNECT_ATTEMPTS})")
+            try:
+                ws = client.connect(idle_timeout)
+                break
+            except (websocket.WebSocketException, OSError) as e:
+                error = e
+                time.sleep(RECONNECT_DELAY * attempt)
+        else:
+            raise ConnectionError(f"lost the ComfyUI websocket: {error}")
+        # Prompts that finished while we weren't listening only show up in /history
+        resynced.update(in_flight)
+        for job in list(in_flight.values()):
+            entry = client.history(job.prompt_id)
+            status = entry.get("status", {})
+            if status.get("status_str") == "error":
+                failed(job, "execution error (reported by /history)")
+            elif status.get("completed") or entry.get("outputs"):
+                finished(job)
+
+    try:
+        submit_next()
+        while in_flight:
+            try:
+                message = ws.recv()
+            except (websocket.WebSocketTimeoutException, websocket.WebSocketConnectionClosedException,
+                    ConnectionError) as e:
+                stalls += isinstance(e, websocket.WebSocketTimeoutException)
+                if stalls > RECONNECT_ATTEMPTS:
+                    raise TimeoutError(f"no progress from ComfyUI in {stalls} x {idle_timeout}s") from e
+                reconnect(e)
+                continue
+            stalls = 0
+            if not isinstance(message, str):
+                continue  # binary preview frames
+            event = json.loads(message)
+            data = event.get("data", {})
+            job = in_flight.get(data.get("prompt_id"))
+            if job is None:
+                continue
+
+            kind = event.get("type")
+            if kind == "progress":
+                if job.status != "running":
+                    note(job, "in-flight", prompt_id=job.prompt_id)
+                job.status = "running"
+                print(f"  {job.name}: {data['value']}/{data['max']}")
+            elif kind == "executed":
+                job.outputs.extend({**image, "node": data.get("node")}
+                                   for image in data.get("output", {}).get("images", []))
+            elif kind == "execution_error":
+                failed(job, data.get("exception_message", "execution error"))
+            elif kind == "executing" and data.get("node") is None:
+                # node == None marks the end of this prompt's execution
+                finished(job)
+    except BaseException as e:
+        # Don't leave prompts "queued" in the journal: resume needs to know they didn't finish
+        for job in list(in_flight.values()):
+            job.status, job.error = "failed", f"interrupted: {e or type(e).__name__}"
+            note(job, "failed", reason=job.error)
+        raise
+    finally:
+        ws.close()
+    return jobs
+
+
+def _finish(job: Job, client: ComfyClient, output_dir: Path, cache: ResultCache):
+    try:
+        if not job.outputs:
+            # Fully server-cached prompts emit no "executed" events
+            for node_id, output in client.history(job.prompt_id).get("outputs", {}).items():
+                job.outputs.extend({**image, "node": node_id} for image in output.get("images", []))
+        for image in job.outputs:
+            if image.get("type", "output") == "output":
+                image["local_path"] = str(client.download(image, output_dir))
+                job.files.append(Path(image["local_path"]))
+    except requests.RequestException as e:
+        job.status, job.error = "failed", f"download failed: {e}"
+        print(f"Failed: {job.name}: {job.error}")
+        return
+    job.status = "done"
+    key = workflow_key(job.graph)
+    if cache is not None and key is not None:
+        for i, path in enumerate(job.files):
+            cache.put(f"{key}-{i}", path, {"job": job.name})
+    print(f"Done: {job.name} -> {', '.join(str(p) for p in job.files) or 'no outputs'}")
+
+
+def validate_jobs(jobs: list, schema: NodeSchema, journal: JobJournal = None) -> list:
+    """Jobs whose graphs pass the schema; the others are marked failed (and journaled) with the errors."""
+    runnable = []
+    for job in jobs:
+        errors = [i for i in validate_workflow(job.graph, schema) if i.level == "error"]
+        if errors:
+            job.status, job.error = "failed", "; ".join(str(i) for i in errors)
+            print(f"Invalid: {job.name}: {job.error}")
+            if journal is not None:
+                journal.failed(job.name, f"invalid: {job.error}", graph_key(job))
+        else:
+            runnable.append(job)
+    return runnable
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Queue ComfyUI workflows headlessly.")
+    parser.add_argument("spec", help="Batch spec JSON, or a single workflow JSON")
+    parser.add_argument("--server", default=COMFY_URL, help="ComfyUI base URL")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR))
+    parser.add_argument("--max-pending", type=int, default=2, help="Jobs kept queued on the server")
+    parser.add_argument("--prompt", help="Prompt override (single workflow mode)")
+    parser.add_argument("--seed", type=int, help="Seed override (single workflow mode)")
+    parser.add_argument("--filename-prefix", help="Output prefix (single workflow mode)")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check patched graphs against comfy_nodes.json and skip invalid jobs")
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    job_journal.add_arguments(parser, JOURNAL_DIR / "comfy.jsonl")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    with open(args.spec, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    if isinstance(raw, list) or "jobs" in raw:
+        jobs = load_batch(args.spec, Path(args.spec).parent)
+    else:
+        graph = patch_workflow(load_workflow(args.spec), prompt=args.prompt, seed=args.seed,
+                               filename_prefix=args.filename_prefix)
+        jobs = [Job(name=Path(args.spec).stem, graph=graph)]
+
+    journal = JobJournal(args.journal)
+    runnable = validate_jobs(jobs, NodeSchema(), journal) if args.validate else jobs
+    if args.resume:
+        runnable = resume_jobs(runnable, journal)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    client = ComfyClient(args.server)
+    try:
+        run_jobs(runnable, client, args.output_dir, max_pending=max(1, args.max_pending),
+                 cache=cache, force=args.force, journal=journal)
+    finally:
+        client.close()
+        if cache is not None:
+            cache.close()
+
+    ok = sum(job.status in ("done", "cached") for job in jobs)
+    print(f"\nComplete: {ok}/{len(jobs)} jobs")
+    return 0 if ok == len(jobs) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Lazily loaded node schema for validating ComfyUI workflows.
+
+comfy_nodes.json (the server's /object_info dump) is ~1.2 MB. The first run
+re-serializes each node class into a compact blob and writes a sidecar index
+of byte offsets per class_type; after that a process only parses the small
+offset table and decodes the classes a workflow actually uses, straight out
+of a memory-mapped file. The index is rebuilt when the dump changes.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_SCHEMA = SCRIPT_DIR.parent / "comfy_nodes.json"
+DEFAULT_INDEX = SCRIPT_DIR / ".cache" / "comfy_nodes.idx"
+
+MAGIC = b"CNIDX1\n"
+HEADER_LEN = struct.Struct("<Q")
+# Only what validation needs; tooltips and descriptions make up most of the dump
+KEPT_FIELDS = ("input", "output")
+KEPT_OPTIONS = ("min", "max", "options", "multiline")
+
+
+def _compact(node: dict) -> dict:
+    compact = {key: node[key] for key in KEPT_FIELDS if key in node}
+    for section in ("required", "optional"):
+        inputs = compact.get("input", {}).get(section)
+        if not inputs:
+            continue
+        for name, spec in inputs.items():
+            if len(spec) > 1 and isinstance(spec[1], dict):
+                inputs[name] = [spec[0], {k: v for k, v in spec[1].items() if k in KEPT_OPTIONS}]
+    compact.get("input", {}).pop("hidden", None)
+    return compact
+
+
+def build_index(schema_path: Path = DEFAULT_SCHEMA, index_path: Path = DEFAULT_INDEX) -> Path:
+    """Parse the full dump once and write the offset-indexed sidecar."""
+    schema_path, index_path = Path(schema_path), Path(index_path)
+    with open(schema_path, encoding="utf-8") as f:
+        nodes = json.load(f)
+
+    blobs, entries, offset = [], {}, 0
+    for class_type, node in nodes.items():
+        blob = json.dumps(_compact(node), separators=(",", ":")).encode("utf-8")
+        entries[class_type] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    stat = schema_path.stat()
+    header = json.dumps({
+        "source": str(schema_path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "entries": entries,
+    }, separators=(",", ":")).encode("utf-8")
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, index_path)
+    return index_path
+
+
+class NodeSchema:
+    """Read-only view of the indexed schema; decodes node classes on demand."""
+
+    def __init__(self, schema_path: Path = DEFAULT_SCHEMA, index_path: Path = DEFAULT_INDEX):
+        self.schema_path = Path(schema_path)
+        self.index_path = Path(index_path)
+        if not self._load():
+            build_index(self.schema_path, self.index_path)
+            if not self._load():
+                raise RuntimeError(f"Could not load schema index {self.index_path}")
+        self._decoded = {}
+
+    def _load(self) -> bool:
+        """Map the index file; False if it is missing or stale."""
+        try:
+            f = open(self.index_path, "rb")
+        except FileNotFoundError:
+            return False
+        with f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return False
+            (header_len,) = HEADER_LEN.unpack(f.read(HEADER_LEN.size))
+            header = json.loads(f.read(header_len))
+            stat = self.schema_path.stat()
+            if (header["size"], header["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+                return False
+            self._entries = header["entries"]
+            self._base = len(MAGIC) + HEADER_LEN.size + header_len
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def __contains__(self, class_type: str) -> bool:
+        return class_type in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def decoded_count(self) -> int:
+        return len(self._decoded)
+
+    def get(self, class_type: str) -> dict:
+        """Compact schema for one node class, or None if unknown."""
+        if class_type not in self._decoded:
+            entry = self._entries.get(class_type)
+            if entry is None:
+                return None
+            start = self._base + entry[0]
+            self._decoded[class_type] = json.loads(self._map[start:start + entry[1]])
+        return self._decoded[class_type]
+
+
+@dataclass
+class Issue:
+    node_id: str
+    class_type: str
+    input: str
+    level: str  # "error" | "warning"
+    message: str
+
+    def __str__(self):
+        where = f"node {self.node_id} ({self.class_type})" + (f".{self.input}" if self.input else "")
+        return f"{self.level.upper()}: {where}: {self.message}"
+
+
+def _is_link(value) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], int)
+
+
+def _types_match(expected: str, actual: str) -> bool:
+    if "*" in (expected, actual):
+        return True
+    return bool(set(expected.split(",")) & set(actual.split(",")))
+
+
+def _check_literal(spec: list, value) -> tuple:
+    """(level, message) for a literal input value that doesn't fit ``spec``, else None."""
+    kind = spec[0]
+    options = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+
+    choices = kind if isinstance(kind, list) else options.get("options") if kind == "COMBO" else None
+    if choices is not None:
+        # Combo lists of model files are machine specific, so only warn
+        return None if value in choices else ("warning", f"{value!r} is not one of the {len(choices)} known options")
+
+    if kind == "INT":
+        if isinstance(value, bool) or not isinstance(value, int):
+            return "error", f"expected INT, got {type(value).__name__}"
+    elif kind == "FLOAT":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "error", f"expected FLOAT, got {type(value).__name__}"
+    elif kind == "STRING":
+        return None if isinstance(value, str) else ("error", f"expected STRING, got {type(value).__name__}")
+    elif kind == "BOOLEAN":
+        return None if isinstance(value, bool) else ("error", f"expected BOOLEAN, got {type(value).__name__}")
+    elif kind == "*":
+        return None
+    else:
+        return "error", f"{kind} must be linked from another node, got a literal"
+
+    if "min" in options and value < options["min"]:
+        return "error", f"{value} is below the minimum {options['min']}"
+    if "max" in options and value > options["max"]:
+        return "error", f"{value} is above the maximum {options['max']}"
+    return None
+
+
+def validate_workflow(graph: dict, schema: NodeSchema) -> list:
+    """Check an API-format graph against the schema; returns a list of Issues."""
+    nodes = {node_id: node for node_id, node in graph.items() if not node_id.startswith("_")}
+    issues = []
+
+    for node_id, node in nodes.items():
+        class_type = node.get("class_type")
+        node_schema = schema.get(class_type)
+        if node_schema is None:
+            issues.append(Issue(node_id, class_type, None, "error", "unknown class_type"))
+            continue
+
+        declared = node_schema.get("input", {})
+        required = declared.get("required", {})
+        known = {**declared.get("optional", {}), **required}
+        inputs = node.get("inputs", {})
+
+        for name in required:
+            if name not in inputs:
+                issues.append(Issue(node_id, class_type, name, "error", "required input missing"))
+
+        for name, value in inputs.items():
+            spec = known.get(name)
+            if spec is None:
+                issues.append(Issue(node_id, class_type, name, "warning", "input not in schema"))
+                continue
+
+            if _is_link(value):
+                source_id, slot = value
+                source = nodes.get(source_id)
+                if source is None:
+                    issues.append(Issue(node_id, class_type, name, "error", f"links to missing node {source_id}"))
+                    continue
+                source_schema = schema.get(source.get("class_type"))
+                if source_schema is None:
+                    continue  # reported on the source node itself
+                outputs = source_schema.get("output", [])
+                if not 0 <= slot < len(outputs):
+                    issues.append(Issue(node_id, class_type, name, "error",
+                                        f"node {source_id} has {len(outputs)} outputs, link uses slot {slot}"))
+                elif isinstance(spec[0], str) and not _types_match(spec[0], outputs[slot]):
+                    issues.append(Issue(node_id, class_type, name, "error",
+                                        f"expects {spec[0]}, linked to {outputs[slot]}"))
+                continue
+
+            problem = _check_literal(spec, value)
+            if problem:
+                issues.append(Issue(node_id, class_type, name, *problem))
+    return issues
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Validate ComfyUI workflows against comfy_nodes.json.")
+    parser.add_argument("workflows", nargs="*", help="API-format workflow JSON files")
+    parser.add_argument("--schema", default=str(DEFAULT_SCHEMA))
+    parser.add_argument("--index", default=str(DEFAULT_INDEX))
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index first")
+    parser.add_argument("--errors-only", action="store_true", help="Hide warnings")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.rebuild:
+        build_index(args.schema, args.index)
+    schema = NodeSchema(args.schema, args.index)
+
+    failed = 0
+    for path in args.workflows:
+        with open(path, encoding="utf-8") as f:
+            issues = validate_workflow(json.load(f), schema)
+        if args.errors_only:
+            issues = [i for i in issues if i.level == "error"]
+        errors = sum(i.level == "error" for i in issues)
+        failed += bool(errors)
+        print(f"{'FAIL' if errors else 'OK'}: {path}")
+        for issue in issues:
+            print(f"  {issue}")
+    print(f"\n{len(args.workflows) - failed}/{len(args.workflows)} workflows valid "
+          f"({schema.decoded_count} of {len(schema)} node classes decoded)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
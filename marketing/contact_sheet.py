@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Paged contact sheets for reviewing render batches.
+
+Thumbnails are made without a full-size decode where possible: JPEGs are
+decoded at 1/2-1/8 scale with Image.draft, other formats are shrunk with
+Image.reduce straight after decode, and PNGs over LARGE_PIXELS stream in
+strips (png_stream) so a print-size master never sits in memory whole.
+Decoding runs in a thread pool (Pillow releases the GIL while decoding).
+
+Thumbnails are cached in .cache/thumbs by content hash and thumbnail size;
+file hashes are memoized by size and mtime, so an unchanged batch is
+rebuilt from the cache without reading the images at all. Sheets are laid
+out a page at a time from the cached thumbnails, so memory stays at about
+one page however large the batch.
+
+Each tile is labelled with the filename and the prompt and model embedded
+in the PNG: the graph ComfyUI saves, or the "parameters" text written by
+generate_images.
+
+    python contact_sheet.py images/ screenshots/ --columns 8
+"""
+import argparse
+import json
+import os
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from fileutil import file_hash
+from image_index import generation_metadata
+from png_stream import PngStripReader
+
+SCRIPT_DIR = Path(__file__).parent
+THUMB_DIR = SCRIPT_DIR / ".cache" / "thumbs"
+OUTPUT_DIR = SCRIPT_DIR / "exports" / "contact_sheets"
+DEFAULT_INPUTS = (SCRIPT_DIR, SCRIPT_DIR / "images", SCRIPT_DIR / "screenshots")
+EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+LARGE_PIXELS = 16_000_000  # PNGs above this are thumbnailed strip by strip
+STRIP_ROWS = 64
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA")
+THUMB_SIZE = 256
+LABEL_LINES = 4
+LINE_HEIGHT = 14
+PADDING = 10
+BACKGROUND = (20, 27, 45)  # brand dark navy
+TEXT = (235, 235, 235)
+MUTED = (150, 160, 180)
+
+
+@dataclass
+class Thumb:
+    path: str
+    sha256: str
+    width: int
+    height: int
+    prompt: str = None
+    model: str = None
+
+
+def _reduced_png(path: Path, factor: int) -> Image.Image:
+    """Shrink a large PNG by ``factor`` a strip at a time."""
+    reader = PngStripReader(path)
+    small = Image.new("RGB", (-(-reader.width // factor), -(-reader.height // factor)))
+    rows = factor * -(-STRIP_ROWS // factor)  # whole reduce blocks per strip
+    for top, strip in reader.strips(rows=rows):
+        small.paste(strip.convert("RGB").reduce(factor), (0, top // factor))
+    return small
+
+
+def make_thumbnail(path: Path, size: int) -> tuple:
+    """(thumbnail, full size, generation metadata), decoding as little as the format allows."""
+    with Image.open(path) as im:
+        full_size, meta = im.size, generation_metadata(im.info)
+        factor = max(1, min(full_size) // size)
+        if (im.format == "PNG" and full_size[0] * full_size[1] > LARGE_PIXELS and factor > 1
+                and PngStripReader.supports(path)):
+            small = _reduced_png(path, factor)
+        else:
+            im.draft("RGB", (size, size))  # JPEG decodes straight to a scaled-down size
+            factor = max(1, min(im.size) // size)
+            if im.mode not in REDUCE_MODES:  # palette, 1-bit and 16-bit images can't be reduced
+                im = im.convert("RGBA" if "transparency" in im.info or im.mode == "PA" else "RGB")
+            small = im.reduce(factor) if factor > 1 else im.copy()
+    small = small.convert("RGB")
+    small.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return small, full_size, meta
+
+
+class ThumbCache:
+    """Thumbnails and their labels keyed by content hash, plus a path -> (size, mtime, hash) memo."""
+
+    def __init__(self, root: Path = THUMB_DIR, size: int = THUMB_SIZE):
+        self.root = Path(root)
+        self.size = size
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self._files, self._thumbs = index["files"], index["thumbs"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self._files, self._thumbs = {}, {}
+
+    def _thumb_path(self, sha: str) -> Path:
+        return self.root / f"{sha[:32]}-{self.size}.jpg"
+
+    def get(self, path: Path) -> Thumb:
+        """Labels for ``path``, building and caching its thumbnail on a miss."""
+        st = path.stat()
+        key, stamp = str(path.resolve()), [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            memo = self._files.get(key)
+        sha = memo[2] if memo and memo[:2] == stamp else file_hash(path)
+        with self._lock:
+            labels = self._thumbs.get(sha)
+        if labels is None or not self._thumb_path(sha).exists():
+            image, (width, height), meta = make_thumbnail(path, self.size)
+            labels = {"width": width, "height": height, "prompt": meta.get("prompt"), "model": meta.get("model")}
+            tmp = self.root / f".{sha[:32]}.{os.getpid()}-{threading.get_ident()}.tmp"
+            image.save(tmp, format="JPEG", quality=88)
+            os.replace(tmp, self._thumb_path(sha))
+        with self._lock:
+            self._files[key] = stamp + [sha]
+            self._thumbs[sha] = labels
+        return Thumb(str(path), sha, **labels)
+
+    def image(self, thumb: Thumb) -> Image.Image:
+        with Image.open(self._thumb_path(thumb.sha256)) as im:
+            return im.convert("RGB")
+
+    def save(self):
+        tmp = self._index_path.with_name(self._index_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": self._files, "thumbs": self._thumbs}, f)
+        os.replace(tmp, self._index_path)
+
+
+def collect(inputs: list) -> list:
+    """Image files named directly or found (non-recursively) in directories, sorted."""
+    files = []
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            files += sorted(p for p in item.iterdir() if p.suffix.lower() in EXTENSIONS and p.is_file())
+        elif item.is_file():
+            files.append(item)
+        else:
+            files += sorted(item.parent.glob(item.name))
+    return list(dict.fromkeys(files))
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _fit(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    """``text`` cut with an ellipsis to fit ``width`` pixels."""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _label_lines(draw, thumb: Thumb, font, width: int) -> list:
+    lines = [(Path(thumb.path).name, TEXT),
+             (f"{thumb.width}x{thumb.height}" + (f"  {thumb.model}" if thumb.model else ""), MUTED)]
+    if thumb.prompt:
+        wrapped = textwrap.wrap(thumb.prompt, width=max(10, int(width / (font.size * 0.5))))
+        shown = wrapped[:LABEL_LINES - 2]
+        if len(wrapped) > len(shown):
+            shown[-1] += "…"
+        lines += [(line, MUTED) for line in shown]
+    return [(_fit(draw, text, font, width), fill) for text, fill in lines]
+
+
+def render_sheet(tiles: list, columns: int, size: int, title: str, cache: ThumbCache) -> Image.Image:
+    """Lay out one page of Thumbs; their images are read from ``cache`` one at a time."""
+    rows = -(-len(tiles) // columns)
+    cell_w, cell_h = size + PADDING, size + PADDING + LABEL_LINES * LINE_HEIGHT
+    header = 2 * LINE_HEIGHT
+    sheet = Image.new("RGB", (columns * cell_w + PADDING, header + rows * cell_h + PADDING), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    font = _font(11)
+    draw.text((PADDING, PADDING // 2), title, font=_font(14), fill=TEXT)
+    for i, thumb in enumerate(tiles):
+        image = cache.image(thumb)
+        x = PADDING + (i % columns) * cell_w
+        y = header + (i // columns) * cell_h
+        # Centre the thumbnail in its square
+        sheet.paste(image, (x + (size - image.width) // 2, y + (size - image.height) // 2))
+        for n, (text, fill) in enumerate(_label_lines(draw, thumb, font, size)):
+            draw.text((x, y + size + 2 + n * LINE_HEIGHT), text, font=font, fill=fill)
+    return sheet
+
+
+def build_sheets(files: list, output_dir: Path = OUTPUT_DIR, columns: int = 6, rows: int = 5,
+                 size: int = THUMB_SIZE, cache: ThumbCache = None, workers: int = None) -> list:
+    """Write paged contact sheets for ``files``; returns the sheet paths."""
+    cache = cache or ThumbCache(size=size)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(path):
+        try:
+            return cache.get(path)
+        except (OSError, ValueError) as e:  # unreadable or truncated image
+            print(f"Skipped: {path} ({e})")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        tiles = [tile for tile in pool.map(load, files) if tile is not None]
+    cache.save()
+
+    per_page = columns * rows
+    pages = -(-len(tiles) // per_page)
+    sheets = []
+    for page in range(pages):
+        chunk = tiles[page * per_page:(page + 1) * per_page]
+        title = f"Page {page + 1}/{pages}  -  {len(tiles)} images"
+        path = output_dir / f"sheet-{page + 1:03d}.jpg"
+        render_sheet(chunk, columns, size, title, cache).save(path, format="JPEG", quality=90)
+        sheets.append(path)
+        print(f"Saved: {path}")
+    return sheets
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Build paged contact sheets of render batches.")
+    parser.add_argument("inputs", nargs="*", help="Images, directories or globs (default: marketing/, "
+                                                  "images/ and screenshots/)")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR))
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=5, help="Rows per page")
+    parser.add_argument("--size", type=int, default=THUMB_SIZE, help="Thumbnail size (px, longest side)")
+    parser.add_argument("--cache-dir", default=str(THUMB_DIR))
+    parser.add_argument("--workers", "-j", type=int, help="Decode threads")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    files = collect(args.inputs or DEFAULT_INPUTS)
+    if not files:
+        print("No images found.")
+        return 1
+    sheets = build_sheets(files, args.output_dir, columns=max(1, args.columns), rows=max(1, args.rows),
+                          size=args.size, cache=ThumbCache(args.cache_dir, args.size), workers=args.workers)
+    print(f"\n{len(files)} images on {len(sheets)} sheet(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
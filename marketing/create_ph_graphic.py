@@ -1,12 +1,34 @@
 """
 Product Hunt Launch Graphic for Daily Bag
 Design Philosophy: Ludic Momentum
+
+The graphic is described by a template (DEFAULT_TEMPLATE, or a JSON file of
+the same shape) and rendered at any size. A batch file renders many copies -
+per language, per launch, per size - in one run:
+
+    {
+      "template": "ph_template.json",            (optional)
+      "variants": [
+        {"name": "es", "sizes": [[1600, 900], [1270, 760]],
+         "text": {"tagline": "Las tareas se vuelven juegos.", "cta": "Apoyanos hoy",
+                  "pills": ["PUNTOS", "NIVELES", "RANKINGS", "PREMIOS REALES"]}}
+      ]
+    }
 """
 
 from PIL import Image, ImageDraw, ImageFont
+from asset_cache import LRUCache
+from export_assets import save_image
+import tracing
+from pathlib import Path
+import argparse
+import copy
+import json
 import math
 
-# Canvas dimensions (Twitter optimal)
+SCRIPT_DIR = Path(__file__).parent
+
+# Canvas dimensions (Twitter optimal) - the default template is designed at this size
 WIDTH = 1600
 HEIGHT = 900
 
@@ -19,179 +41,343 @@ WHITE = (255, 255, 255)
 WHITE_MUTED = (180, 185, 195)
 PH_ORANGE = (255, 111, 66)  # Product Hunt brand
 
+PALETTE = {
+    "dark_bg": DARK_BG,
+    "dark_secondary": DARK_SECONDARY,
+    "gold": GOLD_ACCENT,
+    "orange": ORANGE_MOMENTUM,
+    "white": WHITE,
+    "white_muted": WHITE_MUTED,
+    "ph_orange": PH_ORANGE,
+}
+
 # Font paths
 FONT_DIR = "C:/Users/alexb/.claude/skills/canvas-design/canvas-fonts"
 
-def create_graphic():
-    # Create canvas
-    img = Image.new('RGB', (WIDTH, HEIGHT), DARK_BG)
-    draw = ImageDraw.Draw(img)
-
-    # Load fonts
-    try:
-        font_title = ImageFont.truetype(f"{FONT_DIR}/BigShoulders-Bold.ttf", 120)
-        font_tagline = ImageFont.truetype(f"{FONT_DIR}/InstrumentSans-Regular.ttf", 36)
-        font_subtitle = ImageFont.truetype(f"{FONT_DIR}/InstrumentSans-Bold.ttf", 48)
-        font_small = ImageFont.truetype(f"{FONT_DIR}/GeistMono-Regular.ttf", 24)
-        font_points = ImageFont.truetype(f"{FONT_DIR}/BigShoulders-Bold.ttf", 64)
-    except Exception as e:
-        print(f"Font error: {e}")
-        font_title = ImageFont.load_default()
-        font_tagline = font_title
-        font_subtitle = font_title
-        font_small = font_title
-        font_points = font_title
-
-    # === BACKGROUND ELEMENTS ===
-
-    # Ascending chevrons (left side) - progress indicators
-    chevron_x = 80
-    for i in range(6):
-        y_pos = 700 - (i * 100)
-        opacity = 40 + (i * 25)
-        color = (GOLD_ACCENT[0], GOLD_ACCENT[1], GOLD_ACCENT[2])
-
-        # Draw chevron shape
-        points = [
-            (chevron_x, y_pos),
-            (chevron_x + 40, y_pos - 30),
-            (chevron_x + 80, y_pos),
-            (chevron_x + 80, y_pos + 15),
-            (chevron_x + 40, y_pos - 15),
-            (chevron_x, y_pos + 15),
-        ]
-
-        # Create semi-transparent chevron
-        chevron_img = Image.new('RGBA', (WIDTH, HEIGHT), (0, 0, 0, 0))
-        chevron_draw = ImageDraw.Draw(chevron_img)
-        chevron_draw.polygon(points, fill=(*color, opacity))
-        img.paste(Image.blend(Image.new('RGB', (WIDTH, HEIGHT), DARK_BG),
-                             chevron_img.convert('RGB'), opacity/255), (0, 0))
-
-    # Draw stacked rectangles (right side) - leaderboard abstraction
-    for i in range(5):
-        bar_width = 180 - (i * 25)
-        bar_height = 20
-        x_pos = WIDTH - 200
-        y_pos = 250 + (i * 45)
-
-        # Gradient effect through color variation
-        r = int(GOLD_ACCENT[0] - (i * 15))
-        g = int(GOLD_ACCENT[1] - (i * 20))
-        b = int(GOLD_ACCENT[2] + (i * 5))
-
-        draw.rounded_rectangle(
-            [x_pos, y_pos, x_pos + bar_width, y_pos + bar_height],
-            radius=4,
-            fill=(r, g, b)
-        )
-
-    # Floating achievement dots
-    dots = [(200, 200), (250, 280), (180, 350), (1400, 650), (1450, 720), (1380, 780)]
-    for x, y in dots:
-        draw.ellipse([x-6, y-6, x+6, y+6], fill=ORANGE_MOMENTUM)
-
-    # Progress bar element (bottom)
-    progress_y = HEIGHT - 80
-    progress_width = 400
-    progress_x = (WIDTH - progress_width) // 2
-
-    # Background bar
-    draw.rounded_rectangle(
-        [progress_x, progress_y, progress_x + progress_width, progress_y + 12],
-        radius=6,
-        fill=DARK_SECONDARY
-    )
-    # Filled progress (80%)
-    draw.rounded_rectangle(
-        [progress_x, progress_y, progress_x + int(progress_width * 0.8), progress_y + 12],
-        radius=6,
-        fill=GOLD_ACCENT
-    )
-
-    # === MAIN CONTENT ===
-
-    # Product Hunt badge (top center)
-    ph_badge_y = 60
-    badge_text = "LIVE ON PRODUCT HUNT"
-    bbox = draw.textbbox((0, 0), badge_text, font=font_small)
-    badge_width = bbox[2] - bbox[0] + 40
-    badge_x = (WIDTH - badge_width) // 2
-
-    # Badge background
-    draw.rounded_rectangle(
-        [badge_x, ph_badge_y, badge_x + badge_width, ph_badge_y + 44],
-        radius=22,
-        fill=PH_ORANGE
-    )
-    draw.text(
-        (badge_x + 20, ph_badge_y + 10),
-        badge_text,
-        font=font_small,
-        fill=WHITE
-    )
-
-    # App name - DAILY BAG
-    title_text = "DAILY BAG"
-    bbox = draw.textbbox((0, 0), title_text, font=font_title)
-    title_x = (WIDTH - (bbox[2] - bbox[0])) // 2
-    draw.text((title_x, 200), title_text, font=font_title, fill=WHITE)
-
-    # Tagline
-    tagline = "Chores become games. Points become cash."
-    bbox = draw.textbbox((0, 0), tagline, font=font_tagline)
-    tagline_x = (WIDTH - (bbox[2] - bbox[0])) // 2
-    draw.text((tagline_x, 340), tagline, font=font_tagline, fill=WHITE_MUTED)
-
-    # Feature pills
-    features = ["POINTS", "LEVELS", "LEADERBOARDS", "REAL REWARDS"]
-    pill_y = 440
-    total_width = sum([draw.textbbox((0, 0), f, font=font_small)[2] + 50 for f in features]) + (len(features) - 1) * 20
-    start_x = (WIDTH - total_width) // 2
-
-    current_x = start_x
-    for feature in features:
-        bbox = draw.textbbox((0, 0), feature, font=font_small)
-        pill_width = bbox[2] - bbox[0] + 50
-
-        draw.rounded_rectangle(
-            [current_x, pill_y, current_x + pill_width, pill_y + 50],
-            radius=25,
-            outline=GOLD_ACCENT,
-            width=2
-        )
-        draw.text(
-            (current_x + 25, pill_y + 13),
-            feature,
-            font=font_small,
-            fill=GOLD_ACCENT
-        )
-        current_x += pill_width + 20
-
-    # Call to action
-    cta_text = "Support us today"
-    bbox = draw.textbbox((0, 0), cta_text, font=font_subtitle)
-    cta_x = (WIDTH - (bbox[2] - bbox[0])) // 2
-    draw.text((cta_x, 560), cta_text, font=font_subtitle, fill=WHITE)
-
-    # Arrow pointing down
-    arrow_x = WIDTH // 2
-    arrow_y = 650
-    draw.polygon([
-        (arrow_x - 20, arrow_y),
-        (arrow_x + 20, arrow_y),
-        (arrow_x, arrow_y + 25)
-    ], fill=GOLD_ACCENT)
-
-    # Points display (decorative, bottom corners)
-    draw.text((60, HEIGHT - 130), "+500", font=font_points, fill=(GOLD_ACCENT[0], GOLD_ACCENT[1], GOLD_ACCENT[2], 80))
-    draw.text((WIDTH - 200, HEIGHT - 130), "LVL UP", font=font_small, fill=ORANGE_MOMENTUM)
-
-    # Save
-    output_path = "C:/Users/alexb/Desktop/Programming/Apps/Chore-Checklist/marketing/dailybag-producthunt-launch.png"
-    img.save(output_path, "PNG", quality=95)
+DEFAULT_TEMPLATE = {
+    "size": [WIDTH, HEIGHT],
+    "background": "dark_bg",
+    "fonts": {
+        "title": ["BigShoulders-Bold.ttf", 120],
+        "tagline": ["InstrumentSans-Regular.ttf", 36],
+        "subtitle": ["InstrumentSans-Bold.ttf", 48],
+        "small": ["GeistMono-Regular.ttf", 24],
+        "points": ["BigShoulders-Bold.ttf", 64],
+    },
+    "elements": [
+        # === BACKGROUND ELEMENTS ===
+        # Ascending chevrons (left side) - progress indicators
+        {"type": "chevrons", "x": 80, "y": 700, "count": 6, "step": -100,
+         "opacity": 40, "opacity_step": 25, "color": "gold"},
+        # Stacked rectangles (right side) - leaderboard abstraction
+        {"type": "bars", "x": WIDTH - 200, "y": 250, "count": 5, "width": 180, "width_step": -25,
+         "height": 20, "step": 45, "color": "gold", "color_step": [-15, -20, 5]},
+        # Floating achievement dots
+        {"type": "dots", "radius": 6, "color": "orange",
+         "points": [[200, 200], [250, 280], [180, 350], [1400, 650], [1450, 720], [1380, 780]]},
+        # Progress bar element (bottom)
+        {"type": "progress", "y": HEIGHT - 80, "width": 400, "height": 12, "fill": 0.8,
+         "color": "gold", "track": "dark_secondary"},
+        # === MAIN CONTENT ===
+        {"type": "badge", "id": "badge", "text": "LIVE ON PRODUCT HUNT", "y": 60, "font": "small",
+         "color": "white", "fill": "ph_orange"},
+        {"type": "text", "id": "title", "text": "DAILY BAG", "y": 200, "font": "title", "color": "white"},
+        {"type": "text", "id": "tagline", "text": "Chores become games. Points become cash.", "y": 340,
+         "font": "tagline", "color": "white_muted"},
+        {"type": "pills", "id": "pills", "items": ["POINTS", "LEVELS", "LEADERBOARDS", "REAL REWARDS"],
+         "y": 440, "font": "small", "color": "gold"},
+        {"type": "text", "id": "cta", "text": "Support us today", "y": 560, "font": "subtitle", "color": "white"},
+        # Arrow pointing down
+        {"type": "arrow", "x": WIDTH // 2, "y": 650, "color": "gold"},
+        # Points display (decorative, bottom corners)
+        {"type": "text", "id": "points", "text": "+500", "x": 60, "y": HEIGHT - 130, "font": "points",
+         "color": "gold", "opacity": 80},
+        {"type": "text", "id": "level", "text": "LVL UP", "x": WIDTH - 200, "y": HEIGHT - 130, "font": "small",
+         "color": "orange"},
+    ],
+}
+
+# Process-wide caches: fonts by (file, size), text bboxes by (file, size, string)
+FONT_CACHE = LRUCache(maxsize=64, name="fonts")
+TEXT_CACHE = LRUCache(maxsize=4096, name="text metrics")
+
+
+class TranslucentLayer:
+    """Translucent shapes drawn into one RGBA overlay, composited in one paste.
+
+    The overlay only covers the union of the shapes' bounding boxes, so
+    cost follows the shapes' area rather than the canvas area.
+    """
+
+    def __init__(self):
+        self._ops = []
+        self._bbox = None
+
+    def _grow(self, box):
+        x0, y0, x1, y1 = (math.floor(box[0]), math.floor(box[1]), math.ceil(box[2]) + 1, math.ceil(box[3]) + 1)
+        if self._bbox is None:
+            self._bbox = [x0, y0, x1, y1]
+        else:
+            self._bbox = [min(self._bbox[0], x0), min(self._bbox[1], y0),
+                          max(self._bbox[2], x1), max(self._bbox[3], y1)]
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def polygon(self, points: list, fill: tuple):
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        self._grow((min(xs), min(ys), max(xs), max(ys)))
+        self._ops.append(lambda d, ox, oy: d.polygon([(x - ox, y - oy) for x, y in points], fill=fill))
+
+    def text(self, pos: tuple, text: str, font, fill: tuple):
+        box = font.getbbox(text)
+        self._grow((pos[0] + box[0], pos[1] + box[1], pos[0] + box[2], pos[1] + box[3]))
+        self._ops.append(lambda d, ox, oy: d.text((pos[0] - ox, pos[1] - oy), text, font=font, fill=fill))
+
+    def composite(self, img: Image.Image):
+        """Blend every queued shape onto ``img`` in a single paste."""
+        if self._bbox is None:
+            return
+        x0, y0, x1, y1 = self._bbox
+        overlay = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay, "RGBA")
+        for op in self._ops:
+            op(draw, x0, y0)
+        img.paste(overlay, (x0, y0), overlay)
+        self._ops.clear()
+        self._bbox = None
+
+
+def load_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """Load a canvas font (cached), falling back to Pillow's default."""
+    def open_font():
+        try:
+            return ImageFont.truetype(f"{FONT_DIR}/{name}", size)
+        except OSError as e:
+            print(f"Font error: {name}: {e}")
+            return ImageFont.load_default()
+    return FONT_CACHE.get_or_create((name, size), open_font)
+
+
+def text_bbox(font_key: tuple, text: str) -> tuple:
+    """Cached bbox of ``text`` for the font identified by (file, size)."""
+    return TEXT_CACHE.get_or_create((*font_key, text), lambda: load_font(*font_key).getbbox(text))
+
+
+def color(value) -> tuple:
+    return PALETTE[value] if isinstance(value, str) else tuple(value)
+
+
+class Frame:
+    """Maps template coordinates onto a canvas, scaled uniformly and centered."""
+
+    def __init__(self, design_size: tuple, size: tuple):
+        self.width, self.height = size
+        self.scale = min(size[0] / design_size[0], size[1] / design_size[1])
+        self.off_x = (size[0] - design_size[0] * self.scale) / 2
+        self.off_y = (size[1] - design_size[1] * self.scale) / 2
+
+    def x(self, v):
+        return round(self.off_x + v * self.scale)
+
+    def y(self, v):
+        return round(self.off_y + v * self.scale)
+
+    def s(self, v):
+        return max(1, round(v * self.scale))
+
+
+class Renderer:
+    """Draws one template onto one canvas."""
+
+    def __init__(self, template: dict, size: tuple):
+        self.template = template
+        self.frame = Frame(template["size"], size)
+        self.img = Image.new("RGB", size, color(template["background"]))
+        self.draw = ImageDraw.Draw(self.img)
+        self.translucent = TranslucentLayer()
+
+    def font(self, key: str) -> tuple:
+        name, size = self.template["fonts"][key]
+        font_key = (name, max(1, round(size * self.frame.scale)))
+        return font_key, load_font(*font_key)
+
+    def text_width(self, font_key: tuple, text: str) -> int:
+        bbox = text_bbox(font_key, text)
+        return bbox[2] - bbox[0]
+
+    @staticmethod
+    def is_translucent(el) -> bool:
+        """Elements with an opacity (chevrons, faded text) draw into the translucent layer."""
+        return "opacity" in el
+
+    def flush(self):
+        """Blend the queued translucent elements onto the canvas in one pass."""
+        if not self.translucent:
+            return
+        with tracing.span("composite"):
+            self.translucent.composite(self.img)
+
+    def render(self) -> Image.Image:
+        for element in self.template["elements"]:
+            # Keep template order: a run of translucent elements is blended before anything opaque covers it
+            if not self.is_translucent(element):
+                self.flush()
+            with tracing.span(f"draw_{element['type']}", id=element.get("id")):
+                getattr(self, f"draw_{element['type']}")(element)
+        self.flush()
+        return self.img
+
+    def draw_chevrons(self, el):
+        f = self.frame
+        x = el["x"]
+        for i in range(el["count"]):
+            y = el["y"] + i * el["step"]
+            opacity = el["opacity"] + i * el["opacity_step"]
+            points = [(x, y), (x + 40, y - 30), (x + 80, y), (x + 80, y + 15), (x + 40, y - 15), (x, y + 15)]
+            self.translucent.polygon([(f.x(px), f.y(py)) for px, py in points], fill=(*color(el["color"]), opacity))
+
+    def draw_bars(self, el):
+        f = self.frame
+        base = color(el["color"])
+        for i in range(el["count"]):
+            # Gradient effect through color variation
+            fill = tuple(int(c + i * d) for c, d in zip(base, el["color_step"]))
+            bar_width = el["width"] + i * el["width_step"]
+            y = el["y"] + i * el["step"]
+            self.draw.rounded_rectangle([f.x(el["x"]), f.y(y), f.x(el["x"] + bar_width), f.y(y + el["height"])],
+                                        radius=f.s(4), fill=fill)
+
+    def draw_dots(self, el):
+        f, r = self.frame, el["radius"]
+        for x, y in el["points"]:
+            self.draw.ellipse([f.x(x - r), f.y(y - r), f.x(x + r), f.y(y + r)], fill=color(el["color"]))
+
+    def draw_progress(self, el):
+        f = self.frame
+        x = (self.template["size"][0] - el["width"]) // 2
+        y, h = el["y"], el["height"]
+        self.draw.rounded_rectangle([f.x(x), f.y(y), f.x(x + el["width"]), f.y(y + h)],
+                                    radius=f.s(h / 2), fill=color(el["track"]))
+        self.draw.rounded_rectangle([f.x(x), f.y(y), f.x(x + int(el["width"] * el["fill"])), f.y(y + h)],
+                                    radius=f.s(h / 2), fill=color(el["color"]))
+
+    def draw_badge(self, el):
+        f = self.frame
+        font_key, font = self.font(el["font"])
+        badge_width = self.text_width(font_key, el["text"]) + f.s(40)
+        x, y = (f.width - badge_width) // 2, f.y(el["y"])
+        self.draw.rounded_rectangle([x, y, x + badge_width, y + f.s(44)], radius=f.s(22), fill=color(el["fill"]))
+        self.draw.text((x + f.s(20), y + f.s(10)), el["text"], font=font, fill=color(el["color"]))
+
+    def draw_text(self, el):
+        f = self.frame
+        font_key, font = self.font(el["font"])
+        if "x" in el:
+            x = f.x(el["x"])
+        else:
+            x = (f.width - self.text_width(font_key, el["text"])) // 2
+        pos = (x, f.y(el["y"]))
+        if "opacity" in el:
+            self.translucent.text(pos, el["text"], font, (*color(el["color"]), el["opacity"]))
+        else:
+            self.draw.text(pos, el["text"], font=font, fill=color(el["color"]))
+
+    def draw_pills(self, el):
+        f = self.frame
+        font_key, font = self.font(el["font"])
+        pad, gap, y = f.s(50), f.s(20), f.y(el["y"])
+        # Measure each pill once; the cache makes repeats across renders free
+        widths = [self.text_width(font_key, item) + pad for item in el["items"]]
+        x = (f.width - (sum(widths) + gap * (len(widths) - 1))) // 2
+        for item, pill_width in zip(el["items"], widths):
+            self.draw.rounded_rectangle([x, y, x + pill_width, y + f.s(50)], radius=f.s(25),
+                                        outline=color(el["color"]), width=f.s(2))
+            self.draw.text((x + f.s(25), y + f.s(13)), item, font=font, fill=color(el["color"]))
+            x += pill_width + gap
+
+    def draw_arrow(self, el):
+        f = self.frame
+        x, y = el["x"], el["y"]
+        self.draw.polygon([(f.x(x - 20), f.y(y)), (f.x(x + 20), f.y(y)), (f.x(x), f.y(y + 25))],
+                          fill=color(el["color"]))
+
+
+def apply_text(template: dict, texts: dict) -> dict:
+    """Copy of ``template`` with element text replaced by id (lists replace pill items)."""
+    if not texts:
+        return template
+    template = copy.deepcopy(template)
+    for element in template["elements"]:
+        value = texts.get(element.get("id"))
+        if value is not None:
+            element["items" if isinstance(value, list) else "text"] = value
+    return template
+
+
+def render_template(template: dict, size: tuple, output_path: str) -> str:
+    with tracing.profiled(), tracing.span("graphic", size=f"{size[0]}x{size[1]}"):
+        with tracing.span("render"):
+            img = Renderer(template, size).render()
+        with tracing.span("encode", path=str(output_path)):
+            save_image(img, output_path)
+    tracing.count("graphics_rendered")
     print(f"Saved to: {output_path}")
     return output_path
 
+
+def create_graphic(size: tuple = (WIDTH, HEIGHT), output_path: str = None) -> str:
+    """Render the default launch graphic at ``size``."""
+    if output_path is None:
+        suffix = "" if tuple(size) == (WIDTH, HEIGHT) else f"-{size[0]}x{size[1]}"
+        output_path = str(SCRIPT_DIR / f"dailybag-producthunt-launch{suffix}.png")
+    return render_template(DEFAULT_TEMPLATE, size, output_path)
+
+
+def render_batch(batch: dict, output_dir: Path, base_dir: Path = SCRIPT_DIR) -> list:
+    """Render every variant x size of a batch spec; returns the written paths."""
+    template = DEFAULT_TEMPLATE
+    if batch.get("template"):
+        with open(Path(base_dir) / batch["template"], encoding="utf-8") as f:
+            template = json.load(f)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for variant in batch["variants"]:
+        variant_template = apply_text(template, variant.get("text"))
+        for width, height in variant.get("sizes") or [template["size"]]:
+            output = output_dir / f"dailybag-{variant['name']}-{width}x{height}.png"
+            written.append(render_template(variant_template, (width, height), str(output)))
+    return written
+
+
+def parse_size(value: str) -> tuple:
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
 if __name__ == "__main__":
-    create_graphic()
+    parser = argparse.ArgumentParser(description="Render the Product Hunt launch graphic.")
+    parser.add_argument("--size", type=parse_size, action="append", metavar="WxH",
+                        help="Canvas size; repeat for several (default 1600x900)")
+    parser.add_argument("--batch", help="Batch spec JSON rendering many variants in one run")
+    parser.add_argument("--output-dir", default=str(SCRIPT_DIR), help="Where batch renders go")
+    parser.add_argument("--dump-template", action="store_true", help="Print the default template as JSON")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    tracing.configure(args.trace, args.profile)
+
+    if args.dump_template:
+        print(json.dumps(DEFAULT_TEMPLATE, indent=2))
+    elif args.batch:
+        with open(args.batch, encoding="utf-8") as f:
+            spec = json.load(f)
+        paths = render_batch(spec, args.output_dir, Path(args.batch).parent)
+        stats = TEXT_CACHE.stats()
+        print(f"\n{len(paths)} graphics rendered "
+              f"(text metrics: {stats['hits']} cached, {stats['misses']} measured)")
+    else:
+        for size in args.size or [(WIDTH, HEIGHT)]:
+            create_graphic(size)
+    tracing.write()
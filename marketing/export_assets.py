@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Export rendered marketing masters to the formats and sizes we ship.
+
+One master image fans out to every (target size x format) pair. Each output
+is resized (cover-cropped), encoded with per-format settings and, when over
+its target's byte budget, re-encoded at the highest quality that fits.
+Pillow releases the GIL while resizing and encoding, so outputs encode in
+parallel on a thread pool.
+"""
+import argparse
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+SCRIPT_DIR = Path(__file__).parent
+EXPORT_DIR = SCRIPT_DIR / "exports"
+
+
+@dataclass(frozen=True)
+class Target:
+    name: str
+    size: tuple
+    max_bytes: int = None  # size budget per output file
+
+
+TARGETS = {
+    "app-store": Target("app-store", (1290, 2796), 8_000_000),  # 6.7" iPhone screenshot
+    "play-feature": Target("play-feature", (1024, 500), 1_000_000),
+    "product-hunt": Target("product-hunt", (1270, 760), 3_000_000),
+    "social": Target("social", (1600, 900), 5_000_000),  # X/Twitter card
+    "og": Target("og", (1200, 630), 600_000),  # link previews
+    "square": Target("square", (1080, 1080), 1_000_000),  # Instagram feed
+}
+
+# Pillow save() settings per format. "quality" is the starting point when
+# searching for a size that fits the budget.
+ENCODER_SETTINGS = {
+    "png": {"format": "PNG", "optimize": True},
+    "jpeg": {"format": "JPEG", "quality": 88, "optimize": True, "progressive": True, "subsampling": "4:2:0"},
+    "webp": {"format": "WEBP", "quality": 85, "method": 6},
+    "avif": {"format": "AVIF", "quality": 70, "speed": 6},
+}
+# Masters are intermediates that get re-encoded on export, so favour speed
+MASTER_SETTINGS = {
+    "png": {"format": "PNG", "compress_level": 6},
+}
+EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp", "avif": ".avif"}
+SUFFIX_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp", ".avif": "avif"}
+MIN_QUALITY = 40
+
+
+def available_formats() -> list:
+    """Formats this Pillow build can encode."""
+    return [fmt for fmt in ENCODER_SETTINGS if fmt != "avif" or features.check("avif")]
+
+
+def encode(img: Image.Image, fmt: str, quality: int = None, settings: dict = None) -> bytes:
+    """Encode ``img`` with the format's settings (optionally overriding quality)."""
+    settings = dict(settings or ENCODER_SETTINGS[fmt])
+    if quality is not None and "quality" in settings:
+        settings["quality"] = quality
+    if settings["format"] == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, **settings)
+    return buf.getvalue()
+
+
+def encode_within(img: Image.Image, fmt: str, max_bytes: int = None) -> tuple:
+    """Encode under ``max_bytes`` if possible. Returns (data, quality, fits).
+
+    Lossy formats binary-search quality between MIN_QUALITY and the default;
+    PNG falls back to a 256-colour palette.
+    """
+    data = encode(img, fmt)
+    quality = ENCODER_SETTINGS[fmt].get("quality")
+    if max_bytes is None or len(data) <= max_bytes:
+        return data, quality, True
+
+    if quality is None:
+        paletted = img.convert("RGB").quantize(256, method=Image.Quantize.FASTOCTREE)
+        data = encode(paletted, fmt)
+        return data, None, len(data) <= max_bytes
+
+    best = None
+    low, high = MIN_QUALITY, quality - 1
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = encode(img, fmt, mid)
+        if len(candidate) <= max_bytes:
+            best, low = (candidate, mid), mid + 1
+        else:
+            high = mid - 1
+    if best:
+        return best[0], best[1], True
+    return encode(img, fmt, MIN_QUALITY), MIN_QUALITY, False
+
+
+def save_image(img: Image.Image, path) -> Path:
+    """Save a master with the settings for its file extension."""
+    path = Path(path)
+    fmt = SUFFIX_FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        img.save(path)
+    else:
+        write_atomic(path, encode(img, fmt, settings=MASTER_SETTINGS.get(fmt)))
+    return path
+
+
+def write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    target: str
+    fmt: str
+    bytes: int
+    quality: int
+    fits: bool
+
+
+def _export_one(master: Image.Image, stem: str, target: Target, fmt: str, out_dir: Path,
+                max_bytes: int = None) -> ExportResult:
+    resized = ImageOps.fit(master, target.size, Image.Resampling.LANCZOS)
+    budget = max_bytes if max_bytes is not None else target.max_bytes
+    data, quality, fits = encode_within(resized, fmt, budget)
+    path = out_dir / f"{stem}-{target.name}{EXTENSIONS[fmt]}"
+    write_atomic(path, data)
+    return ExportResult(path, target.name, fmt, len(data), quality, fits)
+
+
+def export_master(master_path, targets: list, formats: list, out_dir: Path = EXPORT_DIR,
+                  max_workers: int = None, max_bytes: int = None) -> list:
+    """Export one master to every target x format on a thread pool."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(master_path) as img:
+        alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        master = img.convert("RGBA" if alpha else "RGB")
+    master.load()
+    stem = Path(master_path).stem
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_export_one, master, stem, target, fmt, out_dir, max_bytes)
+                   for target in targets for fmt in formats]
+        for future in as_completed(futures):
+            result = future.result()
+            flag = "" if result.fits else "  OVER BUDGET"
+            quality = f" q{result.quality}" if result.quality is not None else ""
+            print(f"Saved: {result.path} ({result.bytes / 1000:.0f} kB{quality}){flag}")
+            results.append(result)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export marketing masters to shipping formats and sizes.")
+    parser.add_argument("masters", nargs="+", help="Rendered master images")
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--formats", nargs="+", default=["webp", "jpeg", "png"], choices=list(ENCODER_SETTINGS))
+    parser.add_argument("--out-dir", default=str(EXPORT_DIR))
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Encoder threads")
+    parser.add_argument("--budget-kb", type=float, help="Override every target's size budget")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    formats = [fmt for fmt in args.formats if fmt in available_formats()]
+    for fmt in set(args.formats) - set(formats):
+        print(f"Skipping {fmt}: not supported by this Pillow build")
+
+    max_bytes = int(args.budget_kb * 1000) if args.budget_kb else None
+    targets = [TARGETS[name] for name in args.targets]
+    over = 0
+    for master in args.masters:
+        results = export_master(master, targets, formats, args.out_dir, args.jobs, max_bytes)
+        over += sum(not r.fits for r in results)
+    if over:
+        print(f"\n{over} outputs are over their size budget")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
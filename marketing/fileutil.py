@@ -0,0 +1,50 @@
+"""
+File helpers shared by the caches and journals under .cache.
+
+``file_hash(path)`` is the SHA-256 every content-addressed store keys on.
+``locked(path)`` holds an exclusive lock on a lock file for the duration
+of a with block, so several processes can read-modify-write the same JSON
+file: flock on POSIX, msvcrt.locking on Windows.
+"""
+import hashlib
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def file_hash(path) -> str:
+    """Hex SHA-256 of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def locked(path):
+    """Exclusive lock on ``path`` (created if missing), released on exit."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # first byte; the file may be empty
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10 s; keep waiting like flock does
+        try:
+            yield
+        finally:
+            if fcntl is None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)  # also releases the flock
@@ -1,10 +1,8 @@
-from pocket_tts import TTSModel
-import scipy.io.wavfile
+#!/usr/bin/env python3
+"""pocket_tts smoke test: one sentence to output.wav, via voiceover's cached model and voice state."""
+from pathlib import Path
 
-tts_model = TTSModel.load_model()
-voice_state = tts_model.get_state_for_audio_prompt(
-    "hf://kyutai/tts-voices/alba-mackenna/casual.wav"
-)
-audio = tts_model.generate_audio(voice_state, "Hello world, this is a test.")
-# Audio is a 1D torch tensor containing PCM data.
-scipy.io.wavfile.write("output.wav", tts_model.sample_rate, audio.numpy())
\ No newline at end of file
+from voiceover import DEFAULT_VOICE, Line, synthesize_batch
+
+if __name__ == "__main__":
+    synthesize_batch([Line("output", "Hello world, this is a test.")], DEFAULT_VOICE, Path.cwd())
@@ -2,31 +2,298 @@
 """Generate marketing images using Gemini image models via OpenRouter."""
 
 import os
+import argparse
 import base64
+import random
+import struct
+import tempfile
+import threading
+import time
 import requests
 import json
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+import job_journal
+from job_journal import JOURNAL_DIR, JobJournal, job_key
+from model_catalog import ModelCatalog
+from model_router import Cancelled, ModelStats, Router
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, request_key
+import tracing
 
 load_dotenv(os.path.expanduser("~/.claude/api-keys.env"))
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 OUTPUT_DIR = Path(__file__).parent / "images"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Try cheapest model first, fallback to more capable
+MODELS = [
+    "google/gemini-2.5-flash-image",
+    "google/gemini-3-pro-image-preview"
+]
 
-def generate_image(prompt: str, filename: str, model: str = "google/gemini-2.5-flash-image") -> bool:
-    """Generate image using specified model via OpenRouter."""
+REQUEST_TIMEOUT = 180
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+MAX_BACKOFF = 60.0
+CHUNK_SIZE = 64 * 1024
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
+_print_lock = threading.Lock()
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://chore-checklist.app",
-    }
 
-    data = {
+def log(*args):
+    """print() that doesn't interleave lines from concurrent workers."""
+    with _print_lock:
+        print(*args, flush=True)
+
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """One keep-alive connection pool shared by every in-flight prompt."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def retry_after_seconds(response: requests.Response, attempt: int) -> float:
+    """Delay before retrying: the server's Retry-After if given, else jittered exponential."""
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return min(MAX_BACKOFF, max(0.0, float(header)))
+        except ValueError:
+            try:
+                return min(MAX_BACKOFF, max(0.0, parsedate_to_datetime(header).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(MAX_BACKOFF, (2 ** attempt) + random.uniform(0, 1))
+
+
+def post_with_backoff(session: requests.Session, url: str, label: str = "",
+                      cancel: threading.Event = None, **kwargs) -> requests.Response:
+    """POST, retrying 429/5xx responses up to MAX_RETRIES times.
+
+    Setting ``cancel`` during a backoff wait raises Cancelled instead of retrying.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        with tracing.span("request", label=label, attempt=attempt):
+            response = session.post(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        delay = retry_after_seconds(response, attempt)
+        log(f"[{label}] HTTP {response.status_code}, retrying in {delay:.1f}s")
+        response.close()
+        tracing.count("retries")
+        with tracing.span("backoff", label=label, status=response.status_code):
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                raise Cancelled(f"{label}: cancelled while backing off")
+    return response
+
+
+def extract_image_url(result: dict) -> str:
+    """Return the first image_url in a chat completion, or None."""
+    for choice in result.get("choices", []):
+        content = choice.get("message", {}).get("content")
+        # Content could be string or list
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict) and item.get("type") == "image_url":
+                    url_data = item.get("image_url", {}).get("url", "")
+                    if url_data.startswith(("data:image", "http")):
+                        return url_data
+    return None
+
+
+class DataUrlDecoder:
+    """Incrementally pull the first base64 ``data:image`` URL out of a JSON stream.
+
+    Feed raw response chunks; the image is decoded straight into ``sink``
+    while only the (small) rest of the body is kept in ``other`` so it can
+    still be parsed when no inline image is present.
+    """
+
+    MARKER = b"data:image"
+    MAX_PREFIX = 256  # "data:image/png;base64," and friends
+    MAX_OTHER = 8 * 1024 * 1024
+    NOT_BASE64 = b"\\\r\n "  # JSON escapes ("\/") and stray whitespace
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.found = False
+        self.done = False
+        self.other = bytearray()
+        self._buf = bytearray()
+        self._pending = b""
+        self._decoding = False
+
+    def feed(self, chunk: bytes):
+        if self.done:
+            self._keep(chunk)
+        elif self._decoding:
+            self._decode(chunk)
+        else:
+            self._seek(chunk)
+
+    def _keep(self, data: bytes):
+        room = self.MAX_OTHER - len(self.other)
+        if room > 0:
+            self.other += data[:room]
+
+    def _seek(self, chunk: bytes):
+        self._buf += chunk
+        start = self._buf.find(self.MARKER)
+        if start < 0:
+            # Hold back a possible partial marker at the end of the buffer
+            keep = len(self.MARKER) - 1
+            self._keep(self._buf[:-keep])
+            del self._buf[:-keep]
+            return
+        comma = self._buf.find(b",", start, start + self.MAX_PREFIX)
+        if comma < 0:
+            if len(self._buf) - start > self.MAX_PREFIX:
+                self._keep(self._buf[:start + len(self.MARKER)])
+                del self._buf[:start + len(self.MARKER)]
+            return
+        self._keep(self._buf[:start])
+        rest = bytes(self._buf[comma + 1:])
+        self._buf.clear()
+        self.found = self._decoding = True
+        self._decode(rest)
+
+    def _decode(self, data: bytes):
+        end = data.find(b'"')
+        body = data if end < 0 else data[:end]
+        body = self._pending + body.translate(None, self.NOT_BASE64)
+        usable = len(body) - len(body) % 4
+        if usable:
+            self.sink.write(base64.b64decode(body[:usable]))
+        self._pending = body[usable:]
+        if end >= 0:
+            if self._pending:
+                self.sink.write(base64.b64decode(self._pending + b"=" * (-len(self._pending) % 4)))
+            self._pending = b""
+            self._decoding = False
+            self.done = True
+            self._keep(data[end:])
+
+    def close(self):
+        """Flush anything still held back while seeking."""
+        if not self._decoding:
+            self._keep(self._buf)
+            self._buf.clear()
+
+
+def generation_parameters(prompt: str, model: str) -> str:
+    """The "parameters" text embedded in generated PNGs (the AUTOMATIC1111 layout image_index reads)."""
+    return f"{prompt}\nModel: {model}"
+
+
+def png_text_chunks(text: dict) -> bytes:
+    """iTXt chunks (UTF-8, uncompressed) for ``text``'s keyword -> value pairs."""
+    chunks = b""
+    for key, value in text.items():
+        # keyword, no compression, no language tag or translated keyword
+        data = key.encode("latin-1") + b"\0\0\0\0\0" + value.encode("utf-8")
+        chunks += struct.pack(">I", len(data)) + b"iTXt" + data + struct.pack(">I", zlib.crc32(b"iTXt" + data))
+    return chunks
+
+
+class AtomicWriter:
+    """Write to a temp file beside ``path``; rename over it only on commit().
+
+    ``png_text`` is spliced in as iTXt chunks right after a PNG's IHDR as
+    the bytes stream through, where readers find it without decoding the
+    image. Other formats are written untouched.
+    """
+
+    PNG_HEAD = len(PNG_SIGNATURE) + 25  # signature + IHDR chunk
+
+    def __init__(self, path: Path, png_text: dict = None):
+        self.path = Path(path)
+        self.file = tempfile.NamedTemporaryFile(dir=self.path.parent, prefix=f".{self.path.name}.",
+                                                suffix=".part", delete=False)
+        self._head = bytearray() if png_text else None  # held back until the IHDR is complete
+        self._text = png_text
+
+    def write(self, data: bytes):
+        if self._head is None:
+            self.file.write(data)
+            return
+        self._head += data
+        if len(self._head) >= self.PNG_HEAD:
+            self._flush_head()
+
+    def _flush_head(self):
+        head, self._head = self._head, None
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            head[self.PNG_HEAD:self.PNG_HEAD] = png_text_chunks(self._text)
+        self.file.write(head)
+
+    def commit(self):
+        if self._head is not None:
+            self._flush_head()
+        self.file.close()
+        os.replace(self.file.name, self.path)
+
+    def discard(self):
+        self.file.close()
+        Path(self.file.name).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.file.closed:
+            self.discard()
+
+
+def stream_inline_image(response: requests.Response, output_path: Path,
+                        cancel: threading.Event = None, png_text: dict = None) -> tuple:
+    """Decode an inline data-URL image from a streamed response to ``output_path``.
+
+    Returns (saved, other_body) where other_body is the rest of the JSON:
+    all of it when no inline image was found, else what follows the image
+    (the "usage" block comes after it). Setting ``cancel`` abandons the
+    download unless the image is already complete. ``png_text`` is
+    embedded in the saved image (see AtomicWriter).
+    """
+    with AtomicWriter(output_path, png_text) as writer:
+        decoder = DataUrlDecoder(writer)
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if cancel is not None and cancel.is_set() and not decoder.done:
+                return False, b""
+            decoder.feed(chunk)
+        decoder.close()
+        if decoder.done:
+            writer.commit()
+            return True, bytes(decoder.other)
+    return False, bytes(decoder.other)
+
+
+def download_image(session: requests.Session, url: str, output_path: Path, png_text: dict = None) -> bool:
+    """Stream an http(s) image to ``output_path`` one chunk at a time."""
+    with session.get(url, timeout=60, stream=True) as img_resp:
+        if img_resp.status_code != 200:
+            return False
+        with AtomicWriter(output_path, png_text) as writer:
+            for chunk in img_resp.iter_content(CHUNK_SIZE):
+                writer.write(chunk)
+            writer.commit()
+    return True
+
+
+def build_payload(prompt: str, model: str) -> dict:
+    """Chat-completions request body for one prompt."""
+    return {
         "model": model,
         "messages": [
             {
@@ -36,54 +303,237 @@ def generate_image(prompt: str, filename: str, model: str = "google/gemini-2.5-f
         ]
     }
 
-    print(f"Generating: {filename}")
-    print(f"Model: {model}")
-    print(f"Prompt: {prompt[:70]}...")
+
+def generate_image(prompt: str, filename: str, model: str = "google/gemini-2.5-flash-image",
+                   session: requests.Session = None, timeout: float = REQUEST_TIMEOUT,
+                   cache: ResultCache = None) -> bool:
+    """Generate image using specified model via OpenRouter.
+
+    When ``cache`` is given, a successful result is stored under its request key.
+    """
+    return request_image(prompt, filename, model, session, timeout, cache) is not None
+
+
+def request_image(prompt: str, filename: str, model: str, session: requests.Session = None,
+                  timeout: float = REQUEST_TIMEOUT, cache: ResultCache = None, output_path: Path = None,
+                  cancel: threading.Event = None) -> dict:
+    """One generation request; returns {"path", "usage"} on success, else None.
+
+    ``output_path`` defaults to OUTPUT_DIR / filename. A finished image is
+    returned even if ``cancel`` was set meanwhile; raises Cancelled if
+    ``cancel`` is set before the request is sent or while backing off.
+    """
+    session = session or make_session(1)
+    url = f"{OPENROUTER_BASE_URL}/chat/completions"
+
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://chore-checklist.app",
+    }
+
+    data = build_payload(prompt, model)
+    # Labels the image for contact_sheet and image_index, like ComfyUI's embedded graph
+    png_text = {"parameters": generation_parameters(prompt, model)}
+
+    if cancel is not None and cancel.is_set():
+        raise Cancelled(f"{filename}: cancelled before the request was sent")
+    log(f"Generating: {filename} with {model}\n  Prompt: {prompt[:70]}...")
 
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=180)
-
-        if response.status_code == 200:
-            result = response.json()
-
-            if "choices" in result:
-                for choice in result["choices"]:
-                    message = choice.get("message", {})
-                    content = message.get("content")
-
-                    # Content could be string or list
-                    if isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict):
-                                if item.get("type") == "image_url":
-                                    url_data = item.get("image_url", {}).get("url", "")
-                                    if url_data.startswith("data:image"):
-                                        b64 = url_data.split(",")[1]
-                                        img_bytes = base64.b64decode(b64)
-                                        output_path = OUTPUT_DIR / filename
-                                        with open(output_path, "wb") as f:
-                                            f.write(img_bytes)
-                                        print(f"SUCCESS: {output_path}")
-                                        return True
-                                    elif url_data.startswith("http"):
-                                        img_resp = requests.get(url_data, timeout=60)
-                                        if img_resp.status_code == 200:
-                                            output_path = OUTPUT_DIR / filename
-                                            with open(output_path, "wb") as f:
-                                                f.write(img_resp.content)
-                                            print(f"SUCCESS: {output_path}")
-                                            return True
-
-            print(f"Response: {json.dumps(result, indent=2)[:700]}")
-        else:
-            print(f"Error {response.status_code}: {response.text[:300]}")
+        response = post_with_backoff(session, url, label=filename, cancel=cancel, headers=headers,
+                                     json=data, timeout=timeout, stream=True)
+
+        with response:
+            if response.status_code != 200:
+                log(f"[{filename}] Error {response.status_code}: {response.text[:300]}")
+                return None
+
+            output_path = Path(output_path or OUTPUT_DIR / filename)
+            with tracing.span("stream_decode", filename=filename):
+                saved, body = stream_inline_image(response, output_path, cancel, png_text)
+            if not saved and cancel is not None and cancel.is_set():
+                return None
+
+        if not saved:
+            # No inline image - the body is small enough to parse for a URL
+            result = json.loads(body or b"{}")
+            url_data = extract_image_url(result)
+            if url_data and url_data.startswith("http"):
+                with tracing.span("download", filename=filename):
+                    saved = download_image(session, url_data, output_path, png_text)
+            if not saved:
+                log(f"[{filename}] Response: {json.dumps(result, indent=2)[:700]}")
+
+        if saved:
+            tracing.count("image_bytes", output_path.stat().st_size)
+            if cache is not None:
+                cache.put(request_key(data), output_path, {"model": model, "filename": filename})
+            log(f"SUCCESS: {output_path}")
+            try:
+                usage = json.loads(body).get("usage") or {}
+            except (ValueError, AttributeError):
+                usage = {}
+            return {"path": output_path, "usage": usage}
 
+    except Cancelled:
+        raise
     except Exception as e:
-        print(f"Exception: {e}")
+        log(f"[{filename}] Exception: {e}")
 
+    return None
+
+
+def generate_with_fallback(item: dict, models: list, session: requests.Session,
+                           timeout: float = REQUEST_TIMEOUT, cache: ResultCache = None,
+                           force: bool = False) -> bool:
+    """Try each model in order for one prompt until one succeeds.
+
+    A cached result from any model in the chain is reused unless ``force``.
+    """
+    if not force and _from_cache(item, models, cache):
+        return True
+
+    for model in models:
+        if generate_image(item["prompt"], item["filename"], model, session=session, timeout=timeout, cache=cache):
+            return True
+        log(f"[{item['filename']}] Failed with {model}, trying next...")
+    return False
+
+
+def _from_cache(item: dict, models: list, cache: ResultCache) -> bool:
+    if cache is None:
+        return False
+    for model in models:
+        if cache.materialize(request_key(build_payload(item["prompt"], model)), OUTPUT_DIR / item["filename"]):
+            log(f"CACHED: {OUTPUT_DIR / item['filename']} ({model})")
+            return True
     return False
 
 
+def generate_routed(item: dict, router: Router, session: requests.Session,
+                    timeout: float = REQUEST_TIMEOUT, cache: ResultCache = None, force: bool = False) -> bool:
+    """Generate one prompt through ``router``: per-model stats, hedging and the spend cap.
+
+    Each attempt writes to its own hidden file; the winner is renamed into place.
+    """
+    if not force and _from_cache(item, router.models, cache):
+        return True
+
+    final = OUTPUT_DIR / item["filename"]
+
+    def attempt(model, cancel):
+        part = final.with_name(f".{final.stem}.{model.replace('/', '_')}{final.suffix}")
+        return request_image(item["prompt"], item["filename"], model, session, timeout, cache,
+                             output_path=part, cancel=cancel)
+
+    def discard(result):
+        result["path"].unlink(missing_ok=True)
+
+    model, result = router.run(item["filename"], attempt, discard)
+    if result is None:
+        return False
+    os.replace(result["path"], final)
+    log(f"[{item['filename']}] Done with {model}")
+    return True
+
+
+def load_catalog() -> ModelCatalog:
+    """The cached model catalog (no network while fresh), or None if it can't be loaded."""
+    try:
+        return ModelCatalog(api_key=OPENROUTER_API_KEY).load()
+    except (requests.RequestException, ValueError) as e:
+        log(f"Model catalog unavailable ({e})")
+        return None
+
+
+def select_models(preferred: list = MODELS, catalog: ModelCatalog = None) -> list:
+    """Fallback order for this run: the ``preferred`` models OpenRouter still lists, cheapest first.
+
+    If none of ``preferred`` is listed, the cheapest text-to-image model is
+    used; without a catalog, ``preferred`` as given.
+    """
+    if catalog is None:
+        return list(preferred)
+    ranked = catalog.rank(preferred)
+    if not ranked:
+        cheapest = catalog.cheapest(output="image", input="text")
+        ranked = [cheapest.id] if cheapest else list(preferred)
+    return ranked
+
+
+def prompt_key(item: dict) -> str:
+    """Journal key: a changed prompt is a new job even under the same filename."""
+    return job_key({"prompt": item["prompt"]})
+
+
+def _run_prompt(item: dict, models: list, router: Router, journal: JobJournal, *args) -> bool:
+    name, key = item["filename"], prompt_key(item)
+    if journal is not None:
+        journal.started(name, key)
+    try:
+        with tracing.profiled(), tracing.span("prompt", filename=name):
+            if router is not None:
+                ok = generate_routed(item, router, *args)
+            else:
+                ok = generate_with_fallback(item, models, *args)
+    except Exception as e:
+        if journal is not None:
+            journal.failed(name, f"{type(e).__name__}: {e}", key)
+        raise
+    if journal is not None:
+        if ok:
+            journal.done(name, [OUTPUT_DIR / name], key)
+        else:
+            journal.failed(name, "no model produced an image", key)
+    return ok
+
+
+def pending_prompts(prompts: list, journal: JobJournal) -> list:
+    """The prompts ``journal`` doesn't record as done (with their images intact)."""
+    finished = journal.finished({item["filename"]: prompt_key(item) for item in prompts})
+    if finished:
+        log(f"Resuming: skipping {len(finished)} finished prompts")
+    return [item for item in prompts if item["filename"] not in finished]
+
+
+def run_prompts(prompts: list, models: list = MODELS, concurrency: int = 4,
+                timeout: float = REQUEST_TIMEOUT, cache: ResultCache = None,
+                force: bool = False, router: Router = None, journal: JobJournal = None) -> list:
+    """Generate every prompt, at most ``concurrency`` at a time.
+
+    Each prompt runs its own model-fallback chain (or goes through ``router``);
+    images are written as soon as they finish, and each prompt's progress is
+    appended to ``journal``. Returns the filenames that succeeded; a prompt
+    that raises is logged and counted as failed.
+    """
+    if journal is not None:
+        for item in prompts:
+            journal.queued(item["filename"], prompt_key(item))
+    # Hedged requests can double the connections in flight
+    session = make_session(concurrency * 2 if router is not None else concurrency)
+    succeeded = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {
+                pool.submit(_run_prompt, item, models, router, journal,
+                            session, timeout, cache, force): item["filename"]
+                for item in prompts
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:  # one bad prompt must not lose the others' results
+                    log(f"[{name}] Failed: {type(e).__name__}: {e}")
+                    continue
+                if ok:
+                    succeeded.append(name)
+    finally:
+        session.close()
+    return succeeded
+
+
 # Marketing prompts - simplified to avoid content policy issues
 PROMPTS = [
     {
@@ -109,7 +559,29 @@ PROMPTS = [
 ]
 
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate marketing images via OpenRouter.")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Prompts in flight at once")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="Per-request timeout (s)")
+    parser.add_argument("--models", nargs="+",
+                        help="Model fallback order (default: the known image models, cheapest first)")
+    parser.add_argument("--force", action="store_true", help="Ignore cached results and regenerate")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the result cache")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Result cache location")
+    parser.add_argument("--cache-max-mb", type=float, help="Evict least recently used results past this size")
+    parser.add_argument("--max-spend", type=float, help="Stop starting requests past this many USD this run")
+    parser.add_argument("--no-hedge", action="store_true", help="Never duplicate slow requests to the next model")
+    parser.add_argument("--no-router", action="store_true",
+                        help="Plain serial fallback: no stats, hedging or spend cap")
+    job_journal.add_arguments(parser, JOURNAL_DIR / "generate_images.jsonl")
+    tracing.add_arguments(parser)
+    return parser
+
+
 if __name__ == "__main__":
+    args = build_parser().parse_args()
+    tracing.configure(args.trace, args.profile)
+
     print("=" * 60)
     print("Chore Checklist Image Generator")
     print("=" * 60)
@@ -118,22 +590,33 @@ if __name__ == "__main__":
         print("Error: OPENROUTER_API_KEY not found")
         exit(1)
 
-    # Try cheapest model first, fallback to more capable
-    models = [
-        "google/gemini-2.5-flash-image",
-        "google/gemini-3-pro-image-preview"
-    ]
-
-    success_count = 0
-    for item in PROMPTS:
-        print(f"\n{'='*60}")
+    cache = None
+    if not args.no_cache:
+        max_bytes = int(args.cache_max_mb * 1e6) if args.cache_max_mb else None
+        cache = ResultCache(args.cache_dir, max_bytes=max_bytes)
 
-        for model in models:
-            if generate_image(item["prompt"], item["filename"], model):
-                success_count += 1
-                break
-            print(f"Failed with {model}, trying next...")
+    catalog = load_catalog()
+    models = args.models or select_models(catalog=catalog)
+    print(f"Models: {' -> '.join(models)}")
+    journal = JobJournal(args.journal)
+    prompts = pending_prompts(PROMPTS, journal) if args.resume else PROMPTS
+    router = None
+    if not args.no_router:
+        router = Router(models, ModelStats(), max_spend=args.max_spend, hedge=not args.no_hedge,
+                        catalog=catalog, log=log)
+    try:
+        succeeded = run_prompts(prompts, models, concurrency=max(1, args.concurrency), timeout=args.timeout,
+                                cache=cache, force=args.force, router=router, journal=journal)
+    finally:
+        if router is not None:
+            router.close()
+        if cache is not None:
+            cache.close()
 
     print(f"\n{'='*60}")
-    print(f"Complete: {success_count}/{len(PROMPTS)} images generated")
+    print(f"Complete: {len(succeeded)}/{len(prompts)} images generated"
+          + (f" ({len(PROMPTS) - len(prompts)} already done)" if len(prompts) < len(PROMPTS) else ""))
     print(f"Output directory: {OUTPUT_DIR}")
+    if router is not None:
+        print(f"Spent: ~${router.spent:.3f}")
+    tracing.write()
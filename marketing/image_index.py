@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash index of the generated marketing images.
+
+Each image gets a 64-bit dHash and pHash plus a few quality stats
+(sharpness, contrast, colourfulness, clipped highlights/shadows), computed
+from a reduced decode. The hashes for a whole batch of new files are done
+in one vectorized NumPy pass. Results live in .cache/image_index.json keyed
+by path, size and mtime, with the content hash as a second key, so only new
+or edited files are decoded - a renamed or re-touched file is matched by
+content and never rehashed.
+
+Prompt and model come from the graph ComfyUI embeds in every PNG it saves;
+other files are grouped by filename with the ComfyUI counter stripped.
+
+    python image_index.py dupes                      # clusters of near-duplicates
+    python image_index.py dupes dailybag_leaderboard_00001_.png
+    python image_index.py best -n 2                  # best 2 renders per prompt
+"""
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from comfy_runner import POSITIVE_INPUTS, TEXT_INPUTS, conditioning_sources
+from fileutil import file_hash
+
+SCRIPT_DIR = Path(__file__).parent
+INDEX_PATH = SCRIPT_DIR / ".cache" / "image_index.json"
+DEFAULT_ROOTS = (SCRIPT_DIR, SCRIPT_DIR / "images")
+EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+ANALYSIS_SIZE = 512  # images are reduced to about this short side before analysis
+DUPLICATE_DISTANCE = 10  # of 64 bits
+MODEL_INPUTS = ("unet_name", "ckpt_name")
+COUNTER = re.compile(r"_\d{5}_$")  # ComfyUI's filename_prefix_00001_
+PARAMETER = re.compile(r"([A-Z][\w ]*): ([^,]+)")
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    return np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)).astype(np.float32)
+
+
+DCT_32 = _dct_matrix(32)
+
+
+def _pack_bits(bits: np.ndarray) -> list:
+    """(n, 64) booleans -> n Python ints."""
+    packed = np.packbits(bits.reshape(len(bits), 64), axis=1)
+    return [int.from_bytes(row.tobytes(), "big") for row in packed]
+
+
+def dhash_batch(small: np.ndarray) -> list:
+    """Difference hashes of (n, 8, 9) grayscale thumbnails."""
+    return _pack_bits(small[:, :, 1:] > small[:, :, :-1])
+
+
+def phash_batch(small: np.ndarray) -> list:
+    """DCT hashes of (n, 32, 32) grayscale thumbnails: low 8x8 frequencies vs their median."""
+    freq = np.einsum("ij,njk,lk->nil", DCT_32, small, DCT_32)[:, :8, :8].reshape(len(small), 64)
+    median = np.median(freq[:, 1:], axis=1, keepdims=True)  # the DC term would skew it
+    return _pack_bits(freq > median)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def quality_stats(rgb: np.ndarray) -> dict:
+    """Sharpness, contrast, colourfulness and clipping of an (h, w, 3) uint8 array."""
+    rgb = rgb.astype(np.float32)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    laplacian = (gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1]
+                 - 4 * gray[1:-1, 1:-1])
+    # Hasler & Suesstrunk colourfulness
+    rg = rgb[..., 0] - rgb[..., 1]
+    yb = 0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]
+    colourfulness = np.hypot(rg.std(), yb.std()) + 0.3 * np.hypot(rg.mean(), yb.mean())
+    return {
+        "sharpness": round(float(laplacian.var()), 2),
+        "contrast": round(float(gray.std()), 2),
+        "brightness": round(float(gray.mean()), 2),
+        "colourfulness": round(float(colourfulness), 2),
+        "clipped": round(float(((gray <= 2) | (gray >= 253)).mean()), 4),
+    }
+
+
+def quality_score(stats: dict) -> float:
+    """One number to rank renders of the same prompt by: crisp and contrasty, not blown out."""
+    return float(np.log1p(stats["sharpness"]) * (1 + stats["contrast"] / 64) * (1 - stats["clipped"]))
+
+
+def _parameters_metadata(text: str) -> dict:
+    """Prompt, model and seed from AUTOMATIC1111-style "parameters" text (also written by generate_images).
+
+    The prompt comes first; the last line is "Key: value, ..." settings.
+    """
+    lines = text.strip().split("\n")
+    settings = dict(PARAMETER.findall(lines[-1])) if len(lines) > 1 else {}
+    prompt = "\n".join(lines[:-1] if settings else lines)
+    prompt = prompt.split("\nNegative prompt:", 1)[0].strip()
+    meta = {"prompt": prompt} if prompt else {}
+    if settings.get("Model"):
+        meta["model"] = settings["Model"]
+    if settings.get("Seed", "").isdigit():
+        meta["seed"] = int(settings["Seed"])
+    return meta
+
+
+def generation_metadata(info: dict) -> dict:
+    """Prompt, model and seed from the API graph ComfyUI embeds as a PNG "prompt" chunk.
+
+    Images without one fall back to a "parameters" chunk (generate_images, AUTOMATIC1111).
+    """
+    try:
+        graph = json.loads(info["prompt"])
+    except (KeyError, TypeError, ValueError):
+        parameters = info.get("parameters")
+        return _parameters_metadata(parameters) if isinstance(parameters, str) else {}
+    if not isinstance(graph, dict):
+        return {}
+    meta = {}
+    for node_id in conditioning_sources(graph, POSITIVE_INPUTS):
+        inputs = graph[node_id]["inputs"]
+        text = next((inputs[k] for k in TEXT_INPUTS if isinstance(inputs.get(k), str)), None)
+        if text:
+            meta["prompt"] = text
+            break
+    for node in graph.values():
+        inputs = node.get("inputs", {}) if isinstance(node, dict) else {}
+        if "model" not in meta:
+            model = next((inputs[k] for k in MODEL_INPUTS if isinstance(inputs.get(k), str)), None)
+            if model:
+                meta["model"] = model
+        if "seed" not in meta:
+            seed = inputs.get("seed", inputs.get("noise_seed"))
+            if isinstance(seed, int):
+                meta["seed"] = seed
+    return meta
+
+
+@dataclass
+class ImageRecord:
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    width: int
+    height: int
+    dhash: int
+    phash: int
+    stats: dict
+    prompt: str = None
+    model: str = None
+    seed: int = None
+
+    @property
+    def group(self) -> str:
+        """What counts as "the same prompt" for ranking."""
+        return self.prompt or COUNTER.sub("", Path(self.path).stem)
+
+    @property
+    def score(self) -> float:
+        return quality_score(self.stats)
+
+
+def _analyse(path: Path) -> tuple:
+    """Decode ``path`` just large enough for the stats; returns (fields, 9x8 and 32x32 thumbnails)."""
+    with Image.open(path) as im:
+        width, height = im.size
+        meta = generation_metadata(im.info)
+        im.draft("RGB", (ANALYSIS_SIZE, ANALYSIS_SIZE))  # JPEG: decode at 1/2, 1/4 or 1/8 scale
+        factor = max(1, min(im.size) // ANALYSIS_SIZE)
+        if im.mode not in ("L", "LA", "RGB", "RGBA"):  # reduce() rejects palette, 1-bit and 16-bit
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode == "PA" else "RGB")
+        small = im.reduce(factor) if factor > 1 else im
+        rgb = small.convert("RGB")
+    gray = rgb.convert("L")
+    d_thumb = np.asarray(gray.resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    p_thumb = np.asarray(gray.resize((32, 32), Image.Resampling.BOX), dtype=np.float32)
+    fields = {"width": width, "height": height, "stats": quality_stats(np.asarray(rgb)), **meta}
+    return fields, d_thumb, p_thumb
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance."""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+
+    def add(self, value: int, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            if d not in node[2]:
+                node[2][d] = [value, [item], {}]
+                return
+            node = node[2][d]
+
+    def search(self, value: int, radius: int) -> list:
+        """(distance, item) for every item within ``radius`` bits of ``value``."""
+        found, stack = [], [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            # Triangle inequality: only children at distance d +- radius can hold matches
+            stack.extend(child for dist, child in node[2].items() if d - radius <= dist <= d + radius)
+        return sorted(found, key=lambda pair: pair[0])
+
+
+class ImageIndex:
+    """Incremental on-disk index of image hashes and stats."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.records = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.records = {p: ImageRecord(**r) for p, r in json.load(f).items()}
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            pass
+        self._tree = None
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({p: asdict(r) for p, r in self.records.items()}, f)
+        os.replace(tmp, self.path)
+
+    def update(self, roots=DEFAULT_ROOTS, workers: int = None) -> tuple:
+        """Bring the index up to date with the images directly under ``roots``.
+
+        Returns (added, removed) counts. Unchanged files (same size and
+        mtime) aren't read at all; changed ones are hashed, and only decoded
+        if their content is new.
+        """
+        files = sorted({p.resolve() for root in roots for p in Path(root).iterdir()
+                        if p.suffix.lower() in EXTENSIONS and p.is_file()})
+        by_sha = {r.sha256: r for r in self.records.values()}
+        records, stale = {}, []
+        for path in files:
+            st = path.stat()
+            known = self.records.get(str(path))
+            if known is not None and (known.size, known.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                records[str(path)] = known
+            else:
+                stale.append((path, st))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            shas = list(pool.map(lambda item: file_hash(item[0]), stale))
+            new = [(path, st, sha) for (path, st), sha in zip(stale, shas) if sha not in by_sha]
+            analysed = list(pool.map(lambda item: _analyse(item[0]), new))
+
+        for (path, st), sha in zip(stale, shas):
+            if sha in by_sha:
+                copy = asdict(by_sha[sha])
+                copy.update(path=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns)
+                records[str(path)] = ImageRecord(**copy)
+        if new:
+            dhashes = dhash_batch(np.stack([a[1] for a in analysed]))
+            phashes = phash_batch(np.stack([a[2] for a in analysed]))
+            for (path, st, sha), (fields, _, _), dh, ph in zip(new, analysed, dhashes, phashes):
+                records[str(path)] = ImageRecord(path=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                                 sha256=sha, dhash=dh, phash=ph, **fields)
+
+        # Records under other roots are left alone
+        resolved = {Path(root).resolve() for root in roots}
+        kept = {p: r for p, r in self.records.items() if Path(p).parent not in resolved}
+        removed = len(self.records) - len(kept) - sum(p in self.records for p in records)
+        self.records = {**kept, **records}
+        self._tree = None
+        return len(stale), removed
+
+    @property
+    def tree(self) -> BKTree:
+        if self._tree is None:
+            self._tree = BKTree()
+            for record in self.records.values():
+                self._tree.add(record.phash, record)
+        return self._tree
+
+    def near(self, record: ImageRecord, distance: int = DUPLICATE_DISTANCE) -> list:
+        """(pHash distance, record) of the other images within ``distance`` bits."""
+        return [(d, r) for d, r in self.tree.search(record.phash, distance) if r.path != record.path]
+
+    def duplicate_groups(self, distance: int = DUPLICATE_DISTANCE) -> list:
+        """Connected clusters of near-duplicates, best-scoring first within each."""
+        seen, groups = set(), []
+        for record in sorted(self.records.values(), key=lambda r: r.path):
+            if record.path in seen:
+                continue
+            cluster, frontier = {record.path: record}, [record]
+            while frontier:
+                for _, other in self.near(frontier.pop(), distance):
+                    if other.path not in cluster:
+                        cluster[other.path] = other
+                        frontier.append(other)
+            seen.update(cluster)
+            if len(cluster) > 1:
+                groups.append(sorted(cluster.values(), key=lambda r: -r.score))
+        return groups
+
+    def best(self, n: int = 1) -> dict:
+        """The ``n`` highest-scoring images per prompt group."""
+        groups = {}
+        for record in self.records.values():
+            groups.setdefault(record.group, []).append(record)
+        return {group: sorted(records, key=lambda r: -r.score)[:n] for group, records in sorted(groups.items())}
+
+    def lookup(self, path) -> ImageRecord:
+        return self.records.get(str(Path(path).resolve()))
+
+
+def _label(record: ImageRecord) -> str:
+    try:
+        name = Path(record.path).relative_to(SCRIPT_DIR.resolve())
+    except ValueError:
+        name = record.path
+    return f"{name} (score {record.score:.2f}, {record.width}x{record.height})"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Find near-duplicate renders and the best render per prompt.")
+    parser.add_argument("command", choices=("update", "dupes", "best"))
+    parser.add_argument("image", nargs="?", help="dupes: only near-duplicates of this image")
+    parser.add_argument("--root", action="append", help="Folder to index (repeatable; default: marketing/ "
+                                                        "and marketing/images/)")
+    parser.add_argument("--distance", type=int, default=DUPLICATE_DISTANCE,
+                        help="Max pHash bits apart for a near-duplicate (of 64)")
+    parser.add_argument("-n", type=int, default=1, help="best: images kept per prompt")
+    parser.add_argument("--index", default=str(INDEX_PATH))
+    parser.add_argument("--workers", type=int, help="Decode threads")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    roots = [Path(r) for r in args.root] if args.root else list(DEFAULT_ROOTS)
+    index = ImageIndex(args.index)
+    changed, removed = index.update(roots, workers=args.workers)
+    index.save()
+    print(f"Indexed {len(index.records)} images ({changed} new or changed, {removed} removed)")
+
+    if args.command == "dupes" and args.image:
+        record = index.lookup(args.image)
+        if record is None and Path(args.image).is_file():
+            index.update([Path(args.image).parent], workers=args.workers)
+            index.save()
+            record = index.lookup(args.image)
+        if record is None:
+            print(f"Not an indexed image: {args.image}")
+            return 1
+        matches = index.near(record, args.distance)
+        print(f"\n{len(matches)} near-duplicates of {_label(record)}:")
+        for distance, other in matches:
+            print(f"  {distance:2d} bits  {_label(other)}")
+    elif args.command == "dupes":
+        groups = index.duplicate_groups(args.distance)
+        print(f"\n{len(groups)} groups of near-duplicates (first = best scoring):")
+        for group in groups:
+            print()
+            for record in group:
+                print(f"  {_label(record)}")
+    elif args.command == "best":
+        for group, records in index.best(args.n).items():
+            print(f"\n{group[:100]}")
+            for record in records:
+                print(f"  {_label(record)}" + (f" [{record.model}]" if record.model else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""
+Append-only journal of batch job states, so interrupted runs can resume.
+
+Every state change is one JSON line:
+
+    {"job": "01-gamification-concept.png", "state": "done", "key": "9f2c...", "ts": 1760000000.0,
+     "outputs": [{"path": "images/01-gamification-concept.png", "sha256": "..."}]}
+
+States are queued, in-flight, done (with each output's hash) and failed
+(with the reason). Each line goes out in a single O_APPEND write under an
+exclusive lock (fileutil.locked on a sidecar .lock file), so worker
+threads and processes can share one journal without interleaving; a line
+torn by a crash is ignored on replay.
+
+A job counts as finished when its latest entry is "done" for the same key
+(the prompt or graph it ran) and its outputs are still on disk, unchanged.
+Anything else - failed, in-flight when the run died, or never started - is
+run again by --resume.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from fileutil import file_hash, locked
+
+SCRIPT_DIR = Path(__file__).parent
+JOURNAL_DIR = SCRIPT_DIR / ".cache" / "journal"
+STATES = ("queued", "in-flight", "done", "failed")
+
+
+def job_key(obj) -> str:
+    """Stable hash of whatever defines a job's output (prompt, graph, ...)."""
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class JobJournal:
+    """One JSONL journal, safe to append to from several threads and processes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+
+    def record(self, job: str, state: str, key: str = None, **fields) -> dict:
+        if state not in STATES:
+            raise ValueError(f"unknown job state {state!r}")
+        entry = {"job": job, "state": state}
+        if key is not None:
+            entry["key"] = key
+        entry["ts"] = round(time.time(), 3)
+        entry.update(fields)
+        line = (json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock, locked(self._lock_path):
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                end = os.lseek(fd, 0, os.SEEK_END)
+                if end:
+                    os.lseek(fd, end - 1, os.SEEK_SET)
+                    if os.read(fd, 1) != b"\n":
+                        line = b"\n" + line  # end a line torn by a crash so this entry parses on its own
+                os.write(fd, line)
+                os.fsync(fd)  # a done entry must survive the crash it exists for
+            finally:
+                os.close(fd)
+        return entry
+
+    def queued(self, job: str, key: str = None) -> dict:
+        return self.record(job, "queued", key)
+
+    def started(self, job: str, key: str = None) -> dict:
+        return self.record(job, "in-flight", key)
+
+    def done(self, job: str, files: list, key: str = None) -> dict:
+        outputs = [{"path": str(path), "sha256": file_hash(path)} for path in files]
+        return self.record(job, "done", key, outputs=outputs)
+
+    def failed(self, job: str, reason: str, key: str = None) -> dict:
+        return self.record(job, "failed", key, reason=reason)
+
+    def replay(self) -> dict:
+        """Latest entry per job."""
+        latest = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash
+                    latest[entry["job"]] = entry
+        except FileNotFoundError:
+            pass
+        return latest
+
+    def finished(self, keys: dict) -> dict:
+        """Done entries for the jobs in ``keys`` (name -> key) whose outputs are intact."""
+        latest = self.replay()
+        finished = {}
+        for job, key in keys.items():
+            entry = latest.get(job)
+            if entry is None or entry["state"] != "done" or entry.get("key") != key:
+                continue
+            if all(Path(o["path"]).is_file() and file_hash(o["path"]) == o["sha256"]
+                   for o in entry.get("outputs", [])):
+                finished[job] = entry
+        return finished
+
+    def summary(self) -> dict:
+        """Job count per latest state."""
+        counts = {}
+        for entry in self.replay().values():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+        return counts
+
+
+def add_arguments(parser, default: Path):
+    """The --resume / --journal flags shared by the batch scripts."""
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip jobs the journal records as done; retry failed and interrupted ones")
+    parser.add_argument("--journal", default=str(default), help="Job journal (JSONL)")
+    return parser
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Locally cached, indexed copy of OpenRouter's model list.
+
+The /models response is kept in .cache/models.json. Within the TTL it is
+used as-is with no network at all; after that it is revalidated with
+If-None-Match / If-Modified-Since, so an unchanged catalog costs a 304.
+If OpenRouter can't be reached, the stale copy is used.
+
+Models are indexed by input and output modality and sorted by price, so
+"cheapest model that outputs images" is a dictionary lookup.
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_CACHE_PATH = SCRIPT_DIR / ".cache" / "models.json"
+MODELS_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1") + "/models"
+DEFAULT_TTL = 6 * 3600
+FETCH_TIMEOUT = 15
+
+
+def _price(value) -> float:
+    """Per-token (or per-image) USD price; None when unknown or variable ("-1")."""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    id: str
+    name: str
+    input_modalities: tuple
+    output_modalities: tuple
+    prompt_price: float
+    completion_price: float
+    image_price: float
+    context_length: int
+
+    @classmethod
+    def from_api(cls, data: dict) -> "ModelInfo":
+        arch = data.get("architecture") or {}
+        inputs, outputs = arch.get("input_modalities"), arch.get("output_modalities")
+        if not inputs or not outputs:
+            # Older entries only carry "text+image->text"
+            left, _, right = (arch.get("modality") or "text->text").partition("->")
+            inputs, outputs = left.split("+"), (right or "text").split("+")
+        pricing = data.get("pricing") or {}
+        return cls(
+            id=data["id"],
+            name=data.get("name", data["id"]),
+            input_modalities=tuple(inputs),
+            output_modalities=tuple(outputs),
+            prompt_price=_price(pricing.get("prompt")),
+            completion_price=_price(pricing.get("completion")),
+            image_price=_price(pricing.get("image")),
+            context_length=data.get("context_length") or 0,
+        )
+
+    @property
+    def cost_key(self) -> tuple:
+        """Sort key: output price first (generated images bill as completion), then input."""
+        inf = float("inf")
+        return (self.completion_price if self.completion_price is not None else inf,
+                self.prompt_price if self.prompt_price is not None else inf,
+                self.id)
+
+
+class ModelCatalog:
+    """The model list, loaded from cache or revalidated, with modality indexes."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL, url: str = MODELS_URL,
+                 api_key: str = None, session: requests.Session = None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.url = url
+        self.api_key = api_key
+        self.session = session
+        self.models = {}
+        self.by_output = {}
+        self.by_input = {}
+        self.source = None  # "cache" | "revalidated" | "fetched" | "stale"
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self, entry: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self.path)
+
+    def _revalidate(self, cached: dict) -> tuple:
+        """Conditional GET; returns (entry, source)."""
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        response = (self.session or requests).get(self.url, headers=headers, timeout=FETCH_TIMEOUT)
+        if response.status_code == 304 and cached:
+            return dict(cached, fetched=time.time()), "revalidated"
+        response.raise_for_status()
+        entry = {
+            "fetched": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "data": response.json().get("data", []),
+        }
+        return entry, "fetched"
+
+    def load(self, refresh: bool = False) -> "ModelCatalog":
+        """Populate from the cache, hitting the network only when it is stale (or ``refresh``)."""
+        cached = self._read_cache()
+        if cached and not refresh and time.time() - cached.get("fetched", 0) < self.ttl:
+            entry, self.source = cached, "cache"
+        else:
+            try:
+                entry, self.source = self._revalidate(cached)
+                self._write_cache(entry)
+            except (requests.RequestException, ValueError) as e:
+                if not cached:
+                    raise
+                print(f"Model catalog: using stale cache ({e})")
+                entry, self.source = cached, "stale"
+        self._index(entry["data"])
+        return self
+
+    def _index(self, data: list):
+        self.models, self.by_output, self.by_input = {}, {}, {}
+        for raw in data:
+            model = ModelInfo.from_api(raw)
+            self.models[model.id] = model
+            for modality in model.output_modalities:
+                self.by_output.setdefault(modality, []).append(model)
+            for modality in model.input_modalities:
+                self.by_input.setdefault(modality, []).append(model)
+        for index in (self.by_output, self.by_input):
+            for models in index.values():
+                models.sort(key=lambda m: m.cost_key)
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self.models
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def query(self, output: str = None, input: str = None, max_price: float = None,
+              match: str = None) -> list:
+        """Models producing ``output`` from ``input``, cheapest first."""
+        if output:
+            candidates = self.by_output.get(output, [])
+        elif input:
+            candidates = self.by_input.get(input, [])
+        else:
+            candidates = sorted(self.models.values(), key=lambda m: m.cost_key)
+        results = []
+        for model in candidates:
+            if input and input not in model.input_modalities:
+                continue
+            if max_price is not None and (model.completion_price is None or model.completion_price > max_price):
+                continue
+            if match and match.lower() not in model.id.lower():
+                continue
+            results.append(model)
+        return results
+
+    def cheapest(self, output: str = "image", input: str = "text") -> ModelInfo:
+        matches = self.query(output=output, input=input)
+        return matches[0] if matches else None
+
+    def rank(self, model_ids: list) -> list:
+        """The available ones of ``model_ids``, cheapest first."""
+        return sorted((mid for mid in model_ids if mid in self.models), key=lambda mid: self.models[mid].cost_key)
+
+
+def format_price(price: float, per: str = "token") -> str:
+    if price is None:
+        return "N/A"
+    if per == "token":
+        return f"${price * 1e6:.2f}/M"
+    return f"${price:.4f}"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Query the cached OpenRouter model catalog.")
+    parser.add_argument("--output", default="image", help="Output modality (default: image)")
+    parser.add_argument("--input", help="Required input modality")
+    parser.add_argument("--match", help="Substring of the model id")
+    parser.add_argument("--max-price", type=float, help="Max completion price, USD per million tokens")
+    parser.add_argument("--refresh", action="store_true", help="Revalidate even if the cache is fresh")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Seconds before revalidating")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH))
+    return parser
+
+
+def main(argv: list = None, api_key: str = None) -> int:
+    args = build_parser().parse_args(argv)
+    catalog = ModelCatalog(args.cache, ttl=args.ttl, api_key=api_key).load(refresh=args.refresh)
+    max_price = args.max_price / 1e6 if args.max_price is not None else None
+    models = catalog.query(output=args.output, input=args.input, max_price=max_price, match=args.match)
+
+    print(f"Available {args.output} generation models ({len(models)} of {len(catalog)}, {catalog.source}):")
+    print("=" * 60)
+    for model in models:
+        print(model.id)
+        print(f"  Price: {format_price(model.prompt_price)} in, {format_price(model.completion_price)} out"
+              + (f", {format_price(model.image_price, 'image')}/image in" if model.image_price else ""))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
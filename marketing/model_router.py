@@ -0,0 +1,296 @@
+"""
+Route image requests across models using recorded latency, failures and cost.
+
+Every request outcome is appended to a small per-model history in
+.cache/model_stats.json (the last WINDOW outcomes per model), so
+percentiles carry over between runs and keep updating during one. New
+outcomes are merged into the file under a lock every SAVE_INTERVAL
+seconds and at close, so concurrent runs keep each other's outcomes and a
+crash loses at most the last few.
+
+For each prompt the Router:
+
+- tries models in preference order, skipping any whose recent failure rate
+  is too high (they are kept as a last resort);
+- if the request is still running past that model's p95 latency, starts a
+  hedged duplicate on the next model and keeps whichever finishes first
+  (the other is cancelled once it starts streaming);
+- falls back immediately on an error instead of after a full timeout;
+- reserves each request's expected cost against the run's spend cap and
+  refuses to start requests the cap can't cover.
+
+The Router knows nothing about HTTP: callers pass an ``attempt(model,
+cancel)`` function returning a result dict (with the response's ``usage``)
+or None on failure. An attempt that sees ``cancel`` before its request
+reached the model raises Cancelled, and its reservation is released;
+one cancelled mid-generation returns None and is charged in full.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+
+from fileutil import locked
+
+SCRIPT_DIR = Path(__file__).parent
+STATS_PATH = SCRIPT_DIR / ".cache" / "model_stats.json"
+WINDOW = 200  # outcomes kept per model
+MIN_SAMPLES = 5  # below this a model's percentiles aren't trusted
+MAX_FAILURE_RATE = 0.5
+IMAGE_TOKENS = 1290  # output tokens billed per generated image
+DEFAULT_COST = 0.04  # USD, when neither history nor catalog prices are known
+SAVE_INTERVAL = 10.0  # seconds between merges of new outcomes into STATS_PATH
+
+
+class Cancelled(Exception):
+    """An attempt abandoned before the model started generating (nothing billed)."""
+
+
+class ModelStats:
+    """Per-model history of (timestamp, latency_s, ok, cost_usd), persisted as JSON."""
+
+    def __init__(self, path: Path = STATS_PATH, window: int = WINDOW, save_interval: float = SAVE_INTERVAL):
+        self.path = Path(path)
+        self.window = window
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._history = self._load()
+        self._pending = []  # (model, sample) recorded since the last save
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _add(self, history: dict, model: str, sample: list):
+        samples = history.setdefault(model, [])
+        samples.append(sample)
+        del samples[:-self.window]
+
+    def record(self, model: str, latency: float, ok: bool, cost: float = 0.0):
+        sample = [time.time(), round(latency, 3), ok, cost]
+        with self._lock:
+            self._add(self._history, model, sample)
+            self._pending.append((model, sample))
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def _samples(self, model: str) -> list:
+        with self._lock:
+            return list(self._history.get(model, []))
+
+    def percentile(self, model: str, q: float) -> float:
+        """Latency percentile (0-100) of successful requests, or None with too little data."""
+        latencies = sorted(s[1] for s in self._samples(model) if s[2])
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(q / 100 * (len(latencies) - 1))))]
+
+    def failure_rate(self, model: str) -> float:
+        samples = self._samples(model)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return sum(not s[2] for s in samples) / len(samples)
+
+    def mean_cost(self, model: str) -> float:
+        costs = [s[3] for s in self._samples(model) if s[2] and s[3]]
+        return sum(costs) / len(costs) if costs else None
+
+    def summary(self) -> dict:
+        return {model: {"requests": len(self._samples(model)), "failure_rate": self.failure_rate(model),
+                        "p50": self.percentile(model, 50), "p95": self.percentile(model, 95),
+                        "mean_cost": self.mean_cost(model)}
+                for model in list(self._history)}
+
+    def save(self):
+        """Merge the outcomes recorded since the last save into the file.
+
+        The file is re-read under an exclusive lock and only this process's
+        new outcomes are added, so concurrent runs don't overwrite each other.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._saved_at = time.monotonic()
+        if not pending:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with locked(self.path.with_name(self.path.name + ".lock")):
+                history = self._load()
+                for model, sample in pending:
+                    history.setdefault(model, []).append(sample)
+                for samples in history.values():
+                    samples.sort(key=lambda s: s[0])
+                    del samples[:-self.window]
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(history, f)
+                os.replace(tmp, self.path)
+        except BaseException:
+            with self._lock:
+                self._pending[:0] = pending  # retry with the next save
+            raise
+        with self._lock:
+            # Adopt the other runs' outcomes, keeping any recorded while we were saving
+            for model, sample in self._pending:
+                self._add(history, model, sample)
+            self._history = history
+
+
+class Router:
+    """Chooses, hedges and budgets requests for one run."""
+
+    def __init__(self, models: list, stats: ModelStats = None, max_spend: float = None,
+                 hedge: bool = True, catalog=None, log=print):
+        self.models = list(models)
+        self.stats = stats or ModelStats()
+        self.max_spend = max_spend
+        self.hedge = hedge
+        self.catalog = catalog
+        self.log = log
+        self.spent = 0.0  # settled costs plus outstanding reservations
+        self._lock = threading.Lock()
+
+    def estimate(self, model: str) -> float:
+        """Expected cost of one image from ``model``."""
+        cost = self.stats.mean_cost(model)
+        if cost is not None:
+            return cost
+        info = self.catalog.models.get(model) if self.catalog is not None else None
+        if info is not None and info.completion_price is not None:
+            return info.completion_price * IMAGE_TOKENS
+        return DEFAULT_COST
+
+    def cost(self, model: str, usage: dict) -> float:
+        """Actual cost from the response's usage block, else the estimate."""
+        if usage.get("cost") is not None:
+            return float(usage["cost"])
+        info = self.catalog.models.get(model) if self.catalog is not None else None
+        if info is not None and usage.get("completion_tokens") and info.completion_price is not None:
+            return (usage.get("prompt_tokens", 0) * (info.prompt_price or 0)
+                    + usage["completion_tokens"] * info.completion_price)
+        return self.estimate(model)
+
+    def candidates(self) -> list:
+        """Preference order, with currently unhealthy models moved to the end."""
+        healthy, unhealthy = [], []
+        for model in self.models:
+            rate = self.stats.failure_rate(model)
+            (unhealthy if rate is not None and rate > MAX_FAILURE_RATE else healthy).append(model)
+        return healthy + unhealthy
+
+    def _reserve(self, model: str) -> float:
+        estimate = self.estimate(model)
+        with self._lock:
+            if self.max_spend is not None and self.spent + estimate > self.max_spend:
+                return None
+            self.spent += estimate
+        return estimate
+
+    def _settle(self, reserved: float, actual: float):
+        with self._lock:
+            self.spent += actual - reserved
+
+    def _attempt(self, future: Future, race: dict, attempt, model: str, cancel: threading.Event,
+                 reserved: float, discard):
+        try:
+            future.set_result(self._run_attempt(race, attempt, model, cancel, reserved, discard))
+        except Exception as e:  # never leave run() waiting on a future that can't resolve
+            self.log(f"[{race['label']}] {model}: {e}")
+            future.set_result("failed")
+
+    def _run_attempt(self, race: dict, attempt, model: str, cancel: threading.Event,
+                     reserved: float, discard) -> str:
+        start = time.perf_counter()
+        try:
+            result = attempt(model, cancel)
+        except Cancelled:
+            self._settle(reserved, 0.0)
+            return "cancelled"
+        except Exception as e:
+            self.log(f"[{race['label']}] {model} raised {e}")
+            result = None
+        latency = time.perf_counter() - start
+
+        if result is None and cancel.is_set():
+            # Lost the race mid-stream: the generation was still billed
+            self._settle(reserved, reserved)
+            return "cancelled"
+        if result is None:
+            self._settle(reserved, 0.0)
+            self.stats.record(model, latency, False)
+            return "failed"
+
+        cost = self.cost(model, result.get("usage") or {})
+        self._settle(reserved, cost)
+        self.stats.record(model, latency, True, cost)
+        with self._lock:
+            won = race["winner"] is None
+            if won:
+                race["winner"] = (model, result)
+        if not won and discard is not None:
+            discard(result)
+        return "won" if won else "lost"
+
+    def run(self, label: str, attempt, discard=None) -> tuple:
+        """Get one result for a prompt; returns (model, result) or (None, None).
+
+        ``discard(result)`` is called for successful results that lost a hedge.
+        """
+        queue = self.candidates()
+        race = {"label": label, "winner": None}
+        in_flight = {}  # future -> (model, cancel event)
+        hedge_at = None
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            while queue:
+                model = queue.pop(0)
+                reserved = self._reserve(model)
+                if reserved is None:
+                    self.log(f"[{label}] Skipping {model}: spend cap ${self.max_spend:.2f} reached "
+                             f"(${self.spent:.2f} committed)")
+                    continue
+                cancel, future = threading.Event(), Future()
+                in_flight[future] = (model, cancel)
+                # Daemon threads: an abandoned hedge must not hold up the end of the run
+                threading.Thread(target=self._attempt, daemon=True,
+                                 args=(future, race, attempt, model, cancel, reserved, discard)).start()
+                p95 = self.stats.percentile(model, 95)
+                hedge_at = time.monotonic() + p95 if self.hedge and p95 is not None and queue else None
+                return True
+            return False
+
+        launch()
+        while in_flight:
+            timeout = max(0.0, hedge_at - time.monotonic()) if hedge_at is not None else None
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                slow = next(reversed(in_flight.values()))[0]
+                self.log(f"[{label}] {slow} past its p95 ({self.stats.percentile(slow, 95):.1f}s), "
+                         f"hedging with {queue[0]}")
+                if not launch():
+                    hedge_at = None
+                continue
+
+            for future in done:
+                model, _ = in_flight.pop(future)
+                outcome = future.result()
+                if outcome == "won":
+                    for _, cancel in in_flight.values():
+                        cancel.set()
+                    return race["winner"]
+                if outcome == "failed":
+                    self.log(f"[{label}] Failed with {model}")
+            if not in_flight:
+                launch()  # everything running has failed: fall back now
+        return None, None
+
+    def close(self):
+        self.stats.save()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Watch mode for add_brand_overlay: re-render branded images as their inputs change.
+
+One long-running process keeps fonts, the logo and every decoded source in
+memory, so a change costs only the overlay of the outputs it affects:
+
+- a source image   -> the variants rendered from it
+- the --spec file  -> the variants whose row changed (or was added)
+- a font file      -> the variants using that font
+- the logo         -> every variant that draws it
+
+Changes are picked up with inotify on Linux (or by polling mtimes
+elsewhere, or with --poll) and collected for a short debounce window, so
+an editor's save-rename-touch sequence triggers one render.
+
+The preview at http://127.0.0.1:8765/ shows every output and reloads when
+one is re-rendered; new renders are visible there before the master PNG
+has finished encoding to disk.
+
+    python overlay_watch.py --spec variants.json
+"""
+import argparse
+import ctypes
+import ctypes.util
+import html
+import io
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from PIL import Image
+
+import add_brand_overlay as overlay
+from export_assets import save_image
+
+DEFAULT_PORT = 8765
+DEBOUNCE = 0.2  # seconds of quiet before a batch of changes is rendered
+POLL_INTERVAL = 0.25
+
+# inotify(7)
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = \
+    0x2, 0x8, 0x40, 0x80, 0x100, 0x200
+IN_NONBLOCK, IN_CLOEXEC = os.O_NONBLOCK, 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollWatcher:
+    """Report files added, removed or modified under ``dirs`` (and ``files``) by polling stat()."""
+
+    def __init__(self, dirs: list, files: list = (), interval: float = POLL_INTERVAL):
+        self.dirs = [Path(d) for d in dirs]
+        self.files = [Path(f) for f in files]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        paths = [p for d in self.dirs if d.is_dir() for p in d.iterdir()] + self.files
+        for path in paths:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def changes(self, timeout: float = None) -> set:
+        """Block until something changes (or ``timeout``); returns the changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {p for p in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(p) != self._snapshot.get(p)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else
+                       max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify on the watched directories, through libc."""
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, dirs: list, files: list = ()):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        for directory in {Path(d) for d in dirs} | {Path(f).parent for f in files}:
+            if not directory.is_dir():
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self._dirs[wd] = directory
+
+    def changes(self, timeout: float = None) -> set:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                if wd in self._dirs and name:
+                    changed.add(self._dirs[wd] / os.fsdecode(name))
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(dirs: list, files: list, poll: bool = False):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs, files)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling instead")
+    return PollWatcher(dirs, files)
+
+
+class OverlayWatch:
+    """Warm render state plus the rendered images the preview serves."""
+
+    def __init__(self, specs: list, input_dir: Path, output_dir: Path, spec_path: Path = None,
+                 only: set = None):
+        self.spec_path = Path(spec_path).resolve() if spec_path else None
+        self.only = only
+        self.specs = self._filter(specs)
+        self.input_dir = Path(input_dir).resolve()
+        self.output_dir = Path(output_dir).resolve()
+        self.version = 0
+        self.previews = {}  # output name -> (version, RGB image)
+        self._sources = {}  # path -> (mtime_ns, decoded image)
+        self._lock = threading.Lock()
+
+    def _filter(self, specs: list) -> list:
+        return [s for s in specs if not self.only or s.name in self.only]
+
+    def jobs(self) -> list:
+        return overlay.expand_jobs(self.specs, self.input_dir, self.output_dir)
+
+    def source(self, path: str) -> Image.Image:
+        """The decoded source, kept until the file changes."""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._sources.get(path)
+        if cached is None or cached[0] != mtime:
+            with Image.open(path) as src:
+                has_alpha = src.mode in ("RGBA", "LA", "PA") or "transparency" in src.info
+                cached = self._sources[path] = (mtime, src.convert("RGBA" if has_alpha else "RGB"))
+        return cached[1]
+
+    def render(self, jobs: list) -> list:
+        """Render ``jobs``, publish them to the preview, then write them to disk."""
+        start = time.perf_counter()
+        overlay.warm_assets(list({spec: None for spec, _, _ in jobs}))
+        rendered = []
+        for spec, source, output in jobs:
+            try:
+                rendered.append((output, overlay.overlay_image(spec, self.source(source))))
+            except Exception as e:
+                print(f"Failed: {output} ({e})")
+        with self._lock:
+            self.version += 1
+            for output, img in rendered:
+                self.previews[Path(output).name] = (self.version, img)
+        elapsed = time.perf_counter() - start
+        for output, img in rendered:
+            save_image(img, output)
+        print(f"Rendered {len(rendered)} output(s) in {elapsed * 1000:.0f} ms "
+              f"(+{(time.perf_counter() - start - elapsed) * 1000:.0f} ms writing)")
+        return [output for output, _ in rendered]
+
+    def affected(self, changed: set) -> list:
+        """Jobs whose output depends on any of the ``changed`` paths."""
+        changed = {Path(p).resolve() for p in changed}
+        names = set()
+
+        if self.spec_path is not None and self.spec_path in changed:
+            old = {s.name: s for s in self.specs}
+            try:
+                self.specs = self._filter(overlay.load_specs(self.spec_path))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Keeping the previous variants: {self.spec_path} is invalid ({e})")
+            else:
+                names |= {s.name for s in self.specs if old.get(s.name) != s}
+
+        font_dir = Path(overlay.FONTS_DIR).resolve()
+        if any(p.parent == font_dir for p in changed):
+            overlay.FONT_CACHE.clear()
+            for spec in self.specs:
+                fonts = {overlay.font_file(spec.title_font), overlay.font_file(spec.subtitle_font)}
+                if any(p in changed for p in fonts if p is not None):
+                    names.add(spec.name)
+
+        if Path(overlay.LOGO_PATH).resolve() in changed:
+            names |= {s.name for s in self.specs if s.logo_size}
+
+        outputs = {str(Path(output).resolve()) for _, _, output in self.jobs()}
+        sources = {str(p) for p in changed if str(p) not in outputs}  # our own writes don't count
+        for path in sources:
+            self._sources.pop(path, None)
+
+        return [(spec, source, output) for spec, source, output in self.jobs()
+                if spec.name in names or str(Path(source).resolve()) in sources]
+
+    def watched(self) -> tuple:
+        """(directories, files) to watch."""
+        dirs = [self.input_dir] + ([Path(overlay.FONTS_DIR)] if Path(overlay.FONTS_DIR).is_dir() else [])
+        files = [p for p in (self.spec_path, Path(overlay.LOGO_PATH)) if p is not None]
+        return dirs, files
+
+    def run(self, debounce: float = DEBOUNCE, poll: bool = False):
+        self.render(self.jobs())
+        dirs, files = self.watched()
+        watcher = make_watcher(dirs, files, poll=poll)
+        print(f"Watching {', '.join(str(d) for d in dirs)} ({type(watcher).__name__}); Ctrl-C to stop")
+        try:
+            while True:
+                changed = watcher.changes()
+                # Debounce: keep collecting until the writes settle
+                while True:
+                    more = watcher.changes(timeout=debounce)
+                    if not more:
+                        break
+                    changed |= more
+                jobs = self.affected(changed)
+                if jobs:
+                    self.render(jobs)
+        finally:
+            watcher.close()
+
+
+PAGE = """<!doctype html>
+<meta charset="utf-8"><title>Overlay preview</title>
+<style>body{{background:#141B2D;color:#eee;font:14px sans-serif}}figure{{display:inline-block;margin:8px}}
+img{{max-width:640px;display:block}}</style>
+{figures}
+<script>
+let version = "{version}";
+setInterval(async () => {{
+  const v = await (await fetch("/version")).text();
+  if (v !== version) location.reload();
+}}, 300);
+</script>
+"""
+
+
+def make_preview_handler(watch: OverlayWatch):
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: bytes, content_type: str, status: int = 200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = unquote(urlparse(self.path).path)
+            with watch._lock:
+                version, previews = watch.version, dict(watch.previews)
+            if path == "/version":
+                return self._send(str(version).encode(), "text/plain")
+            if path.startswith("/image/"):
+                entry = previews.get(path[len("/image/"):])
+                if entry is None:
+                    return self._send(b"not found", "text/plain", 404)
+                buf = io.BytesIO()
+                entry[1].save(buf, format="PNG", compress_level=1)  # fast; the master on disk is the real one
+                return self._send(buf.getvalue(), "image/png")
+            if path == "/":
+                figures = "\n".join(
+                    f'<figure><img src="/image/{html.escape(name)}?v={v}">'
+                    f"<figcaption>{html.escape(name)}</figcaption></figure>"
+                    for name, (v, _) in sorted(previews.items()))
+                return self._send(PAGE.format(figures=figures, version=version).encode(), "text/html; charset=utf-8")
+            self._send(b"not found", "text/plain", 404)
+
+    return PreviewHandler
+
+
+def serve_preview(watch: OverlayWatch, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_preview_handler(watch))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Preview: http://127.0.0.1:{server.server_port}/")
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Re-render branded images whenever their inputs change.")
+    parser.add_argument("--spec", help="JSON variant table (defaults to the built-in VARIANTS)")
+    parser.add_argument("--input-dir", default=str(overlay.SCRIPT_DIR), help="Directory searched by input globs")
+    parser.add_argument("--output-dir", help="Where renders are written (defaults to --input-dir)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Watch only these variant names")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Preview port (0 disables the preview)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE, help="Seconds of quiet before re-rendering")
+    parser.add_argument("--poll", action="store_true", help="Poll mtimes instead of using inotify")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    specs = overlay.load_specs(args.spec) if args.spec else overlay.VARIANTS
+    output_dir = Path(args.output_dir or args.input_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    watch = OverlayWatch(specs, Path(args.input_dir), output_dir, spec_path=args.spec,
+                         only=set(args.only) if args.only else None)
+    server = serve_preview(watch, args.port) if args.port else None
+    try:
+        watch.run(debounce=args.debounce, poll=args.poll)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        if server is not None:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+"""
+Read and write PNGs a strip of rows at a time.
+
+Pillow decodes and encodes whole images, so an 8192x8192 RGB master costs
+~200 MB before anything is drawn on it. PngStripReader inflates the IDAT
+stream incrementally and hands each block of filtered rows to Pillow as a
+tiny stand-alone PNG (prefixed with the previous row, unfiltered, so Up /
+Average / Paeth rows resolve), keeping Pillow's C unfiltering while only
+ever holding one strip. PngStripWriter is the reverse: rows are Paeth
+filtered with NumPy and deflated into IDAT chunks as they arrive.
+
+Only non-interlaced 8-bit PNGs stream; callers fall back to Image.open for
+anything else (``PngStripReader.supports``).
+"""
+import io
+import os
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}  # PNG colour type -> samples per pixel
+MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+STRIP_CHUNKS = (b"PLTE", b"tRNS")  # all a strip needs besides IHDR to decode
+COLOR_TYPES = {mode: color_type for color_type, mode in MODES.items() if mode != "P"}
+FILTER_ROWS = 16
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _chunks(f):
+    """Yield (type, data) for each chunk after the signature."""
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        length, kind = struct.unpack(">I4s", head)
+        data = f.read(length)
+        f.read(4)  # CRC
+        yield kind, data
+
+
+class PngStripReader:
+    """Iterate a PNG top to bottom as Image strips of at most ``rows`` rows."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._header = []  # PLTE / tRNS, re-sent with every strip (text chunks are left out)
+        with open(self.path, "rb") as f:
+            if f.read(8) != SIGNATURE:
+                raise ValueError(f"{self.path} is not a PNG")
+            for kind, data in _chunks(f):
+                if kind == b"IHDR":
+                    self.width, self.height, self.depth, self.color_type, _, _, self.interlace = \
+                        struct.unpack(">IIBBBBB", data)
+                elif kind == b"IDAT":
+                    break
+                elif kind in STRIP_CHUNKS:
+                    self._header.append(_chunk(kind, data))
+        self.mode = MODES.get(self.color_type)
+        self.size = (self.width, self.height)
+        self.stride = self.width * CHANNELS.get(self.color_type, 0)
+
+    @classmethod
+    def supports(cls, path) -> bool:
+        try:
+            reader = cls(path)
+        except (OSError, ValueError, struct.error):
+            return False
+        return reader.depth == 8 and not reader.interlace and reader.mode is not None
+
+    def _ihdr(self, height: int) -> bytes:
+        return _chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, height, 8, self.color_type, 0, 0, 0))
+
+    def _decode(self, filtered: bytes, prev_row: bytes) -> Image.Image:
+        rows = len(filtered) // (self.stride + 1)
+        if prev_row is not None:
+            filtered = b"\x00" + prev_row + filtered
+            rows += 1
+        png = b"".join([SIGNATURE, self._ihdr(rows), *self._header,
+                        _chunk(b"IDAT", zlib.compress(filtered, 0)), _chunk(b"IEND", b"")])
+        strip = Image.open(io.BytesIO(png))
+        strip.load()
+        return strip.crop((0, 1, self.width, rows)) if prev_row is not None else strip
+
+    def _inflated(self, limit: int):
+        """Yield the inflated IDAT stream in pieces of at most ``limit`` bytes.
+
+        A flat image can deflate a thousandfold, so one IDAT chunk may hold
+        far more than a strip; what does not fit is left in unconsumed_tail.
+        """
+        inflate = zlib.decompressobj()
+        with open(self.path, "rb") as f:
+            f.read(len(SIGNATURE))
+            for kind, data in _chunks(f):
+                if kind == b"IDAT":
+                    while data:
+                        yield inflate.decompress(data, limit)
+                        data = inflate.unconsumed_tail
+        yield inflate.flush()
+
+    def strips(self, rows: int = 64):
+        """Yield (top, strip) pairs covering the image in order."""
+        line = self.stride + 1
+        pending, prev_row, top = bytearray(), None, 0
+        for data in self._inflated(rows * line):
+            if top >= self.height:
+                break  # anything past the last row is never inflated
+            pending += data
+            while top < self.height and len(pending) >= min(rows, self.height - top) * line:
+                n = min(rows, self.height - top)
+                strip = self._decode(bytes(pending[:n * line]), prev_row)
+                del pending[:n * line]
+                prev_row = strip.crop((0, n - 1, self.width, n)).tobytes()
+                yield top, strip
+                top += n
+        if top < self.height:
+            raise ValueError(f"{self.path} is truncated at row {top}")
+
+
+def paeth_filter(rows: np.ndarray, prev: np.ndarray, bpp: int) -> np.ndarray:
+    """PNG filter type 4 for a (n, stride) block whose preceding row is ``prev``."""
+    x = rows.astype(np.int16)
+    up = np.vstack([prev.astype(np.int16)[None, :], x[:-1]])
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up_left = np.zeros_like(x)
+    up_left[:, bpp:] = up[:, :-bpp]
+
+    p = left + up - up_left
+    pa, pb, pc = np.abs(p - left), np.abs(p - up), np.abs(p - up_left)
+    predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+    return ((x - predictor) & 0xFF).astype(np.uint8)
+
+
+class PngStripWriter:
+    """Encode a PNG from strips written top to bottom; renamed into place on close()."""
+
+    def __init__(self, path, size: tuple, mode: str = "RGB", compress_level: int = 6):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"cannot stream {mode} PNGs")
+        self.path = Path(path)
+        self.width, self.height = size
+        self.mode = mode
+        self.bpp = CHANNELS[COLOR_TYPES[mode]]
+        self.rows_written = 0
+        self._prev = np.zeros(self.width * self.bpp, dtype=np.uint8)
+        self._deflate = zlib.compressobj(compress_level)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp, "wb")
+        self._file.write(SIGNATURE)
+        self._file.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8,
+                                                      COLOR_TYPES[mode], 0, 0, 0)))
+
+    def write(self, strip: Image.Image):
+        if strip.size[0] != self.width:
+            raise ValueError(f"strip is {strip.size[0]}px wide, expected {self.width}")
+        if strip.mode != self.mode:
+            strip = strip.convert(self.mode)
+        rows = np.frombuffer(strip.tobytes(), dtype=np.uint8).reshape(strip.size[1], -1)
+        # Filter a few rows at a time; the int16 temporaries are ~10x the input
+        for start in range(0, len(rows), FILTER_ROWS):
+            block = rows[start:start + FILTER_ROWS]
+            filtered = paeth_filter(block, self._prev, self.bpp)
+            lines = np.hstack([np.full((len(block), 1), 4, dtype=np.uint8), filtered])
+            self._idat(self._deflate.compress(lines.tobytes()))
+            self._prev = block[-1].copy()
+        self.rows_written += len(rows)
+
+    def _idat(self, data: bytes):
+        if data:
+            self._file.write(_chunk(b"IDAT", data))
+
+    def close(self) -> Path:
+        if self.rows_written != self.height:
+            self.discard()
+            raise ValueError(f"wrote {self.rows_written} of {self.height} rows")
+        self._idat(self._deflate.flush())
+        self._file.write(_chunk(b"IEND", b""))
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def discard(self):
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file.closed:
+            return
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
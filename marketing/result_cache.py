@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for generated marketing images.
+
+Results are stored under a hash of whatever produced them: the OpenRouter
+request body (model, prompt, params) or a canonicalized ComfyUI graph plus
+seed. Hits are hard-linked (or copied) to the requested output name, so an
+unchanged prompt never costs another API call or GPU run.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from fileutil import locked
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_CACHE_DIR = SCRIPT_DIR / ".cache" / "results"
+INDEX_NAME = "index.json"
+
+# Inputs that only name the output file and never change the pixels
+OUTPUT_ONLY_INPUTS = {"filename_prefix", "save_output"}
+SEED_INPUTS = ("seed", "noise_seed")
+
+
+def _digest(obj) -> str:
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def request_key(payload: dict) -> str:
+    """Key for an API request body (model, messages and any other params)."""
+    return _digest({"kind": "request", "payload": payload})
+
+
+def canonicalize_workflow(graph: dict) -> dict:
+    """Strip comments and output-naming inputs from a ComfyUI API graph."""
+    canonical = {}
+    for node_id, node in graph.items():
+        if node_id.startswith("_") or not isinstance(node, dict):
+            continue
+        inputs = {k: v for k, v in node.get("inputs", {}).items() if k not in OUTPUT_ONLY_INPUTS}
+        canonical[str(node_id)] = {"class_type": node.get("class_type"), "inputs": inputs}
+    return canonical
+
+
+def workflow_seeds(graph: dict) -> list:
+    """Every seed input in the graph, in node order."""
+    seeds = []
+    for node in canonicalize_workflow(graph).values():
+        seeds.extend(node["inputs"][name] for name in SEED_INPUTS if name in node["inputs"])
+    return seeds
+
+
+def workflow_key(graph: dict, seed: int = None) -> str:
+    """Key for a ComfyUI graph, or None if its output isn't reproducible.
+
+    ``seed`` overrides the graph's seeds when the runner patches them in. A
+    negative seed means "random" in these workflows, so it isn't cacheable.
+    """
+    seeds = [seed] if seed is not None else workflow_seeds(graph)
+    if any(isinstance(s, int) and s < 0 for s in seeds):
+        return None
+    return _digest({"kind": "workflow", "graph": canonicalize_workflow(graph), "seed": seed})
+
+
+class ResultCache:
+    """On-disk store of result files keyed by content hash.
+
+    ``max_bytes`` bounds the total size; least recently used entries are
+    evicted first. Safe to share between threads and between processes:
+    index.json is rewritten under a lock, merging in only the keys this
+    process added, used or dropped, so concurrent runs keep each other's
+    entries (and evict them when over budget).
+
+    Hits only touch the in-memory index; their access times reach disk with
+    the next put()/evict() or on close(), so a warm batch isn't one index
+    rewrite per job.
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_bytes: int = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_path = self.root / INDEX_NAME
+        self._index = self._load_index()
+        self._changed = set()  # keys added or used since the last save
+        self._dropped = set()  # keys removed since the last save
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, max_bytes: int = None) -> list:
+        """Merge this process's changes into index.json, evicting down to ``max_bytes``.
+
+        Returns the evicted keys. Call with self._lock held.
+        """
+        with locked(self._index_path.with_name(INDEX_NAME + ".lock")):
+            index = self._load_index()
+            for key in self._dropped:
+                index.pop(key, None)
+            for key in self._changed & self._index.keys():
+                entry, on_disk = self._index[key], index.get(key)
+                if on_disk is not None and on_disk["file"] == entry["file"]:
+                    entry = dict(entry, last_used=max(entry["last_used"], on_disk["last_used"]))
+                index[key] = entry
+            removed = self._evict_from(index, max_bytes) if max_bytes is not None else []
+            tmp = self._index_path.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp, self._index_path)
+        self._index = index
+        self._changed, self._dropped = set(), set()
+        return removed
+
+    def save(self):
+        """Write pending access times to disk."""
+        with self._lock:
+            if self._changed or self._dropped:
+                self._save_index()
+
+    def close(self):
+        self.save()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / self._index[key]["file"]
+
+    def get(self, key: str) -> Path:
+        """Path of the cached file for ``key``, or None."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            path = self._entry_path(key)
+            if not path.exists():
+                del self._index[key]
+                self._dropped.add(key)
+                return None
+            self._index[key]["last_used"] = time.time()
+            self._changed.add(key)
+            return path
+
+    def materialize(self, key: str, dest: Path) -> bool:
+        """Hard-link (or copy) a hit to ``dest``. Returns False on a miss."""
+        path = self.get(key)
+        if path is None:
+            return False
+        link_or_copy(path, Path(dest))
+        return True
+
+    def put(self, key: str, src: Path, meta: dict = None) -> Path:
+        """Store a copy of ``src`` under ``key`` and evict down to max_bytes."""
+        src = Path(src)
+        name = key + src.suffix
+        dest = self.root / name
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        with self._lock:
+            now = time.time()
+            self._index[key] = {
+                "file": name,
+                "size": dest.stat().st_size,
+                "created": now,
+                "last_used": now,
+                "meta": meta or {},
+            }
+            self._changed.add(key)
+            self._dropped.discard(key)
+            self._save_index(self.max_bytes)
+        return dest
+
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._index.values())
+
+    def evict(self, max_bytes: int) -> list:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            return self._save_index(max_bytes)
+
+    def _evict_from(self, index: dict, max_bytes: int) -> list:
+        removed = []
+        total = sum(entry["size"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= max_bytes:
+                break
+            total -= index[key]["size"]
+            (self.root / index[key]["file"]).unlink(missing_ok=True)
+            del index[key]
+            removed.append(key)
+        return removed
+
+    def stats(self) -> dict:
+        return {"entries": len(self._index), "bytes": self.total_bytes(), "root": str(self.root)}
+
+
+def link_or_copy(src: Path, dest: Path):
+    """Hard-link ``src`` to ``dest``, copying when links aren't possible."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Inspect or trim the generated-image cache.")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry count and size")
+    evict = sub.add_parser("evict", help="Trim the cache to a size budget")
+    evict.add_argument("--max-mb", type=float, required=True)
+    key = sub.add_parser("workflow-key", help="Print the cache key of ComfyUI workflow files")
+    key.add_argument("workflows", nargs="+")
+    key.add_argument("--seed", type=int)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    cache = ResultCache(args.cache_dir)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB in {stats['root']}")
+    elif args.command == "evict":
+        removed = cache.evict(int(args.max_mb * 1e6))
+        print(f"Evicted {len(removed)} entries, {cache.total_bytes() / 1e6:.1f} MB left")
+    elif args.command == "workflow-key":
+        for path in args.workflows:
+            with open(path, encoding="utf-8") as f:
+                key = workflow_key(json.load(f), args.seed)
+            print(f"{key or 'uncacheable (random seed)'}  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
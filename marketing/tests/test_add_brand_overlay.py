@@ -0,0 +1,43 @@
+from PIL import Image
+
+import add_brand_overlay as overlay
+from add_brand_overlay import SharedSources, VARIANTS_BY_NAME, render_overlay, render_overlay_shared
+
+
+def _source(path, mode="RGB"):
+    Image.radial_gradient("L").resize((640, 480)).convert(mode).save(path)
+    return path
+
+
+def test_shared_source_is_mapped_not_copied(tmp_path, monkeypatch):
+    seen = []
+    real = overlay.overlay_image
+    monkeypatch.setattr(overlay, "overlay_image",
+                        lambda spec, src: (seen.append((src.mode, src.readonly)), real(spec, src))[1])
+    spec = VARIANTS_BY_NAME["leaderboard"]
+    sources = SharedSources()
+    try:
+        for mode in ("RGB", "RGBA"):
+            path = _source(tmp_path / f"{mode}.png", mode)
+            shared = sources.acquire(str(path), uses=2)
+            render_overlay_shared(spec, shared, str(tmp_path / f"{mode}-1.png"))
+            render_overlay_shared(spec, shared, str(tmp_path / f"{mode}-2.png"))
+    finally:
+        sources.close()
+    # Read-only means the image is a view of the shared block, not a frombytes copy
+    assert seen == [("RGBX", True)] * 2 + [("RGBA", True)] * 2
+    assert len(sources) == 0
+
+
+def test_shared_render_matches_direct_render(tmp_path):
+    spec = VARIANTS_BY_NAME["leaderboard"]
+    path = _source(tmp_path / "src.png")
+    sources = SharedSources()
+    try:
+        render_overlay_shared(spec, sources.acquire(str(path)), str(tmp_path / "shared.png"))
+    finally:
+        sources.close()
+    render_overlay(spec, str(path), str(tmp_path / "direct.png"))
+    with Image.open(tmp_path / "shared.png") as shared, Image.open(tmp_path / "direct.png") as direct:
+        assert shared.mode == direct.mode == "RGB"
+        assert shared.tobytes() == direct.tobytes()
@@ -0,0 +1,51 @@
+import json
+
+import comfy_planner
+from comfy_planner import main, run_planned
+from comfy_runner import SCRIPT_DIR, Job, load_workflow, patch_workflow
+from comfy_schema import NodeSchema
+from job_journal import JobJournal
+
+WORKFLOW = SCRIPT_DIR / "flux_schnell_gguf_workflow.json"
+
+
+def _jobs(*prompts):
+    graph = load_workflow(WORKFLOW)
+    return [Job(name=p, graph=patch_workflow(graph, prompt=p, filename_prefix=p)) for p in prompts]
+
+
+def test_validate_skips_invalid_jobs_before_planning(tmp_path, capsys):
+    broken = json.loads(WORKFLOW.read_text())
+    for node in broken.values():
+        if node["class_type"] == "EmptyLatentImage":
+            node["inputs"] = {}
+    (tmp_path / "broken.json").write_text(json.dumps(broken))
+    (tmp_path / "good.json").write_text(WORKFLOW.read_text())
+    batch = tmp_path / "batch.json"
+    batch.write_text(json.dumps({"jobs": [{"workflow": "good.json", "prompt": "a", "name": "a"},
+                                          {"workflow": "good.json", "prompt": "b", "name": "b"},
+                                          {"workflow": "broken.json", "prompt": "c", "name": "c"}]}))
+
+    assert main([str(batch), "--dry-run", "--validate"]) == 0
+    out = capsys.readouterr().out
+    assert "Invalid: c:" in out and "a+b: 2 jobs" in out
+    main([str(batch), "--dry-run"])
+    assert "a+b+c: 3 jobs" in capsys.readouterr().out
+
+
+def test_invalid_merged_graph_fails_its_members(tmp_path, monkeypatch):
+    merge = comfy_planner.merge_graphs
+
+    def broken_merge(graphs):
+        merged, id_maps = merge(graphs)
+        node = next(n for n in merged.values() if n["class_type"] == "KSampler")
+        node["inputs"]["model"] = ["999", 0]
+        return merged, id_maps
+
+    monkeypatch.setattr(comfy_planner, "merge_graphs", broken_merge)
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    jobs = run_planned(_jobs("a", "b"), client=None, output_dir=tmp_path, journal=journal,
+                       schema=NodeSchema())  # nothing valid to queue, so the client is never used
+    assert [job.status for job in jobs] == ["failed", "failed"]
+    assert "links to missing node 999" in jobs[0].error
+    assert {e["state"] for e in journal.replay().values()} == {"failed"}
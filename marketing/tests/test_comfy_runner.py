@@ -0,0 +1,252 @@
+import base64
+import hashlib
+import io
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from PIL import Image
+
+import comfy_runner
+from comfy_runner import ComfyClient, Job, graph_key, run_jobs, validate_jobs
+from comfy_schema import NodeSchema
+from job_journal import JobJournal
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16), (10, 200, 10)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+IMAGE = _png()
+
+
+class FakeComfy(ThreadingHTTPServer):
+    """Enough of ComfyUI's API for run_jobs: /prompt, /history, /view and the /ws event stream.
+
+    Prompts execute one at a time on a worker thread, sending progress,
+    executed and executing(None) events to the client's websocket.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, step_delay: float = 0.05):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.step_delay = step_delay
+        self.sockets = {}  # client id -> socket
+        self.history = {}
+        self.queued = queue.Queue()
+        self.pending = self.max_pending = 0
+        self.sent = 0
+        self.drop_after = None  # close the websocket after this many events
+        self.stay_down = False  # refuse websockets once one has been dropped
+        self.refuse_websockets = False
+        self.fail = set()  # prompt names that raise an execution error
+        self.lock = threading.Lock()
+        threading.Thread(target=self._execute, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def submit(self, body: dict) -> str:
+        prompt_id = uuid.uuid4().hex
+        with self.lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        self.queued.put((prompt_id, body))
+        return prompt_id
+
+    def send(self, client_id: str, event: dict):
+        with self.lock:
+            sock = self.sockets.get(client_id)
+            if sock is None:
+                return  # nobody listening: the event is lost, as with the real server
+            payload = json.dumps(event).encode()
+            header = b"\x81" + (bytes([len(payload)]) if len(payload) < 126 else b"\x7e" + struct.pack(">H", len(payload)))
+            try:
+                sock.sendall(header + payload)
+            except OSError:
+                self.sockets.pop(client_id, None)
+                return
+            self.sent += 1
+            if self.drop_after is not None and self.sent >= self.drop_after:
+                self.drop_after = None
+                self.refuse_websockets = self.stay_down
+                self.sockets.pop(client_id, None)
+                sock.shutdown(socket.SHUT_RDWR)
+
+    def _execute(self):
+        while True:
+            prompt_id, body = self.queued.get()
+            graph, client_id = body["prompt"], body["client_id"]
+            save_id, save = next((k, n) for k, n in graph.items() if n["class_type"] == "SaveImage")
+            prefix = save["inputs"]["filename_prefix"]
+            for value in (1, 2):
+                time.sleep(self.step_delay)
+                self.send(client_id, {"type": "progress", "data": {"prompt_id": prompt_id, "value": value, "max": 2}})
+            time.sleep(self.step_delay)
+            if prefix in self.fail:
+                self.history[prompt_id] = {"outputs": {}, "status": {"status_str": "error", "completed": False}}
+                self.send(client_id, {"type": "execution_error",
+                                      "data": {"prompt_id": prompt_id, "exception_message": "boom"}})
+            else:
+                images = [{"filename": f"{prefix}_00001_.png", "subfolder": "", "type": "output"}]
+                self.history[prompt_id] = {"outputs": {save_id: {"images": images}},
+                                           "status": {"status_str": "success", "completed": True}}
+                self.send(client_id, {"type": "executed",
+                                      "data": {"prompt_id": prompt_id, "node": save_id, "output": {"images": images}}})
+                self.send(client_id, {"type": "executing", "data": {"prompt_id": prompt_id, "node": None}})
+            with self.lock:
+                self.pending -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, obj, status=200):
+        data = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self._json({"prompt_id": self.server.submit(body)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/ws":
+            return self._websocket(parse_qs(url.query)["clientId"][0])
+        if url.path.startswith("/history/"):
+            prompt_id = url.path.rsplit("/", 1)[1]
+            entry = self.server.history.get(prompt_id)
+            return self._json({prompt_id: entry} if entry else {})
+        if url.path == "/view":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(IMAGE)))
+            self.end_headers()
+            self.wfile.write(IMAGE)
+            return
+        self._json({"error": "not found"}, 404)
+
+    def _websocket(self, client_id: str):
+        if self.server.refuse_websockets:
+            return self._json({"error": "down"}, 503)
+        accept = base64.b64encode(hashlib.sha1(self.headers["Sec-WebSocket-Key"].encode() + WS_GUID).digest())
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept.decode())
+        self.end_headers()
+        self.wfile.flush()
+        with self.server.lock:
+            self.server.sockets[client_id] = self.connection
+        self.close_connection = True
+        try:
+            while self.connection.recv(4096):  # client frames (close, pong) are ignored
+                pass
+        except OSError:
+            pass
+        with self.server.lock:
+            if self.server.sockets.get(client_id) is self.connection:
+                del self.server.sockets[client_id]
+
+
+@pytest.fixture
+def comfy():
+    server = FakeComfy()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(comfy_runner, "RECONNECT_DELAY", 0.05)
+
+
+def _jobs(n):
+    return [Job(name=f"job{i}", graph={
+        "1": {"class_type": "EmptyLatentImage", "inputs": {"width": 64, "height": 64, "batch_size": 1}},
+        "9": {"class_type": "SaveImage", "inputs": {"filename_prefix": f"job{i}", "images": ["1", 0]}},
+    }) for i in range(n)]
+
+
+def _states(journal):
+    return {job: entry["state"] for job, entry in journal.replay().items()}
+
+
+def test_batch_runs_with_bounded_queue(comfy, tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    client = ComfyClient(comfy.url)
+    jobs = run_jobs(_jobs(5), client, tmp_path / "out", max_pending=2, journal=journal)
+    assert [job.status for job in jobs] == ["done"] * 5
+    assert comfy.max_pending == 2
+    assert all(job.files[0].read_bytes() == IMAGE for job in jobs)
+    assert set(_states(journal).values()) == {"done"}
+
+
+def test_execution_error_fails_only_that_job(comfy, tmp_path):
+    comfy.fail.add("job1")
+    jobs = run_jobs(_jobs(3), ComfyClient(comfy.url), tmp_path / "out", max_pending=2)
+    assert [job.status for job in jobs] == ["done", "failed", "done"]
+    assert jobs[1].error == "boom"
+
+
+def test_dropped_websocket_mid_batch_reconnects(comfy, tmp_path):
+    comfy.drop_after = 4  # after job0's progress / executed events, before its "executing" end marker
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    jobs = run_jobs(_jobs(4), ComfyClient(comfy.url), tmp_path / "out", max_pending=2, journal=journal)
+    assert [job.status for job in jobs] == ["done"] * 4
+    assert all(job.files and job.files[0].read_bytes() == IMAGE for job in jobs)
+    assert set(_states(journal).values()) == {"done"}
+
+
+def test_stalled_websocket_is_recovered_from_history(comfy, tmp_path, monkeypatch):
+    monkeypatch.setattr(comfy, "send", lambda client_id, event: None)  # a socket that never delivers
+    jobs = run_jobs(_jobs(1), ComfyClient(comfy.url), tmp_path / "out", idle_timeout=0.5)
+    assert jobs[0].status == "done"
+    assert jobs[0].files[0].read_bytes() == IMAGE
+
+
+def test_lost_server_marks_in_flight_jobs_failed(comfy, tmp_path):
+    comfy.drop_after = 1
+    comfy.stay_down = True  # every reconnect is refused
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    with pytest.raises(ConnectionError):
+        run_jobs(_jobs(3), ComfyClient(comfy.url), tmp_path / "out", max_pending=2, journal=journal)
+    states = _states(journal)
+    assert states["job0"] == states["job1"] == "failed"
+    assert "job2" not in states  # never queued; --resume runs it
+    assert "interrupted" in journal.replay()["job0"]["reason"]
+
+
+def test_invalid_jobs_are_journaled_as_failed(tmp_path):
+    schema = NodeSchema(Path(__file__).parent / "fixtures" / "object_info.json", tmp_path / "nodes.idx")
+    valid = Job(name="valid", graph={
+        "1": {"class_type": "EmptyLatentImage", "inputs": {"width": 512, "height": 512, "batch_size": 1}}})
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    invalid = _jobs(1)[0]  # SaveImage linked to a LATENT
+    assert validate_jobs([valid, invalid], schema, journal) == [valid]
+    entry = journal.replay()["job0"]
+    assert entry["state"] == "failed" and entry["key"] == graph_key(invalid)
+    assert "expects IMAGE, linked to LATENT" in entry["reason"]
+    assert "valid" not in journal.replay()
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from comfy_schema import NodeSchema, build_index, validate_workflow
+
+FIXTURE = Path(__file__).parent / "fixtures" / "object_info.json"  # recorded /object_info, six classes
+
+
+@pytest.fixture
+def schema(tmp_path):
+    source = tmp_path / "comfy_nodes.json"
+    shutil.copyfile(FIXTURE, source)
+    return NodeSchema(source, tmp_path / "nodes.idx")
+
+
+def _graph():
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd_xl_base_1.0_0.9vae.safetensors"}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 1024, "height": 1024, "batch_size": 1}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "a purple badge", "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "blurry", "clip": ["4", 1]}},
+        "3": {"class_type": "KSampler", "inputs": {
+            "seed": 42, "steps": 20, "cfg": 7.5, "sampler_name": "euler", "scheduler": "normal", "denoise": 1.0,
+            "model": ["4", 0], "positive": ["6", 0], "negative": ["7", 0], "latent_image": ["5", 0]}},
+        "8": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+        "9": {"class_type": "SaveImage", "inputs": {"filename_prefix": "badge", "images": ["8", 0]}},
+        "_comment": "ignored",
+    }
+
+
+def _problems(graph, schema):
+    return [(i.node_id, i.input, i.level) for i in validate_workflow(graph, schema)]
+
+
+def test_index_decodes_only_the_classes_used(schema):
+    assert len(schema) == 6 and "KSampler" in schema and "LoraLoader" not in schema
+    assert schema.decoded_count == 0
+    ksampler = schema.get("KSampler")
+    assert schema.decoded_count == 1
+    assert ksampler["output"] == ["LATENT"]
+    assert ksampler["input"]["required"]["steps"][1] == {"min": 1, "max": 10000}  # tooltips dropped
+    assert schema.get("LoraLoader") is None
+
+
+def test_valid_graph_has_no_issues(schema):
+    assert validate_workflow(_graph(), schema) == []
+
+
+@pytest.mark.parametrize("node_id, change, expected", [
+    ("3", lambda n: n["inputs"].pop("steps"), ("3", "steps", "error")),  # required input missing
+    ("3", lambda n: n["inputs"].update(steps="20"), ("3", "steps", "error")),  # wrong literal type
+    ("3", lambda n: n["inputs"].update(cfg=True), ("3", "cfg", "error")),  # bool is not a FLOAT
+    ("3", lambda n: n["inputs"].update(steps=0), ("3", "steps", "error")),  # below min
+    ("5", lambda n: n["inputs"].update(width=100_000), ("5", "width", "error")),  # above max
+    ("3", lambda n: n["inputs"].update(model="model.safetensors"), ("3", "model", "error")),  # literal for a link
+    ("3", lambda n: n["inputs"].update(model=["4", 1]), ("3", "model", "error")),  # MODEL linked to CLIP
+    ("3", lambda n: n["inputs"].update(model=["4", 3]), ("3", "model", "error")),  # slot out of range
+    ("3", lambda n: n["inputs"].update(model=["42", 0]), ("3", "model", "error")),  # missing source node
+    ("3", lambda n: n.update(class_type="KSamplerTurbo"), ("3", None, "error")),  # unknown class
+    ("3", lambda n: n["inputs"].update(sampler_name="euler_x"), ("3", "sampler_name", "warning")),  # combo
+    ("3", lambda n: n["inputs"].update(sharpness=2), ("3", "sharpness", "warning")),  # not in schema
+])
+def test_rejections(schema, node_id, change, expected):
+    graph = _graph()
+    change(graph[node_id])
+    assert _problems(graph, schema) == [expected]
+
+
+def test_index_is_reused_until_the_dump_changes(schema, tmp_path):
+    index = tmp_path / "nodes.idx"
+    built = index.stat().st_mtime_ns
+    assert "KSampler" in NodeSchema(schema.schema_path, index)
+    assert index.stat().st_mtime_ns == built  # loaded, not rebuilt
+
+    nodes = json.loads(schema.schema_path.read_text())
+    nodes["KSampler"]["input"]["required"]["steps"][1]["max"] = 50
+    nodes["LoraLoader"] = {"input": {"required": {"model": ["MODEL"]}}, "output": ["MODEL"]}
+    schema.schema_path.write_text(json.dumps(nodes))
+    os.utime(schema.schema_path, ns=(built + 10**9, built + 10**9))  # a distinct mtime even on coarse clocks
+
+    rebuilt = NodeSchema(schema.schema_path, index)
+    assert "LoraLoader" in rebuilt and len(rebuilt) == 7
+    graph = _graph()
+    graph["3"]["inputs"]["steps"] = 60
+    assert _problems(graph, rebuilt) == [("3", "steps", "error")]
+
+
+def test_build_index_rejects_a_corrupt_sidecar(tmp_path):
+    source = tmp_path / "comfy_nodes.json"
+    shutil.copyfile(FIXTURE, source)
+    index = tmp_path / "nodes.idx"
+    index.write_bytes(b"not an index")
+    assert len(NodeSchema(source, index)) == 6  # bad magic: rebuilt
+    assert build_index(source, index) == index
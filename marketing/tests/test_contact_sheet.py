@@ -0,0 +1,61 @@
+import io
+
+from PIL import Image
+
+from contact_sheet import ThumbCache, build_sheets, make_thumbnail
+from export_assets import TARGETS, export_master
+from generate_images import AtomicWriter, generation_parameters
+
+
+def test_palette_png_is_thumbnailed(tmp_path):
+    path = tmp_path / "palette.png"
+    Image.new("RGB", (1200, 800), (200, 40, 40)).quantize(16).save(path)
+    thumb, size, _ = make_thumbnail(path, 256)
+    assert size == (1200, 800)
+    assert thumb.mode == "RGB" and max(thumb.size) == 256
+    assert thumb.getpixel((10, 10)) == (200, 40, 40)
+
+
+def test_one_bit_and_transparent_palette_pngs(tmp_path):
+    one_bit = tmp_path / "mask.png"
+    Image.new("1", (1200, 800), 1).save(one_bit)
+    transparent = tmp_path / "transparent.png"
+    Image.new("RGBA", (900, 900), (0, 0, 0, 0)).quantize(8).save(transparent)
+    assert make_thumbnail(one_bit, 256)[0].getpixel((0, 0)) == (255, 255, 255)
+    assert make_thumbnail(transparent, 256)[0].size == (256, 256)
+
+
+def test_build_sheets_keeps_palette_images(tmp_path, capsys):
+    inputs = []
+    for i, mode in enumerate(("P", "1", "RGB")):
+        path = tmp_path / f"img{i}.png"
+        Image.new("RGB", (1200, 800), (30 * i, 60, 90)).convert(mode).save(path)
+        inputs.append(path)
+    sheets = build_sheets(inputs, tmp_path / "out", cache=ThumbCache(tmp_path / "thumbs"), workers=2)
+    assert len(sheets) == 1 and sheets[0].exists()
+    assert "Skipped" not in capsys.readouterr().out
+
+
+def test_palette_exports_can_be_thumbnailed(tmp_path):
+    # An over-budget PNG export is paletted; downstream review tools must still read it
+    master = tmp_path / "master.png"
+    Image.effect_noise((1600, 1000), 80).convert("RGB").save(master)
+    [result] = export_master(master, [TARGETS["og"]], ["png"], tmp_path / "out", max_bytes=200_000)
+    with Image.open(result.path) as im:
+        assert im.mode == "P"
+    thumb, size, _ = make_thumbnail(result.path, 256)
+    assert size == TARGETS["og"].size and max(thumb.size) == 256
+
+
+def test_generated_images_are_labelled(tmp_path):
+    image = Image.new("RGB", (600, 400), (90, 60, 200))
+    path = tmp_path / "01-gamification.png"
+    with AtomicWriter(path, {"parameters": generation_parameters("Purple badges, gold stars", "google/x")}) as w:
+        buf = io.BytesIO()
+        image.save(buf, format="PNG")
+        w.write(buf.getvalue())
+        w.commit()
+    with Image.open(path) as im:
+        assert im.tobytes() == image.tobytes()  # still a valid PNG
+    [thumb] = [ThumbCache(tmp_path / "thumbs").get(path)]
+    assert (thumb.prompt, thumb.model) == ("Purple badges, gold stars", "google/x")
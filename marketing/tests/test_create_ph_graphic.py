@@ -0,0 +1,32 @@
+from create_ph_graphic import DARK_BG, DEFAULT_TEMPLATE, GOLD_ACCENT, HEIGHT, WIDTH, Renderer
+
+TEMPLATE = {
+    "size": [400, 200],
+    "background": "dark_bg",
+    "fonts": {},
+    "elements": [
+        {"type": "chevrons", "x": 100, "y": 100, "count": 1, "step": 0, "opacity": 120, "opacity_step": 0,
+         "color": "orange"},
+        {"type": "bars", "x": 90, "y": 80, "count": 1, "width": 100, "width_step": 0, "height": 40, "step": 0,
+         "color": "gold", "color_step": [0, 0, 0]},
+        {"type": "chevrons", "x": 250, "y": 100, "count": 1, "step": 0, "opacity": 120, "opacity_step": 0,
+         "color": "orange"},
+    ],
+}
+
+
+def test_opaque_element_covers_earlier_translucent_one():
+    img = Renderer(TEMPLATE, (400, 200)).render()
+    assert img.getpixel((140, 83)) == GOLD_ACCENT  # the chevron under the bar is hidden
+    assert img.getpixel((290, 83)) not in (GOLD_ACCENT, DARK_BG)  # the one after it is blended
+
+
+def test_translucent_element_after_opaque_is_drawn_over_it():
+    template = {**TEMPLATE, "elements": TEMPLATE["elements"][1:2] + TEMPLATE["elements"][:1]}
+    img = Renderer(template, (400, 200)).render()
+    assert img.getpixel((140, 83)) not in (GOLD_ACCENT, DARK_BG)
+
+
+def test_default_template_renders():
+    img = Renderer(DEFAULT_TEMPLATE, (WIDTH, HEIGHT)).render()
+    assert img.size == (WIDTH, HEIGHT)
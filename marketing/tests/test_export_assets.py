@@ -0,0 +1,30 @@
+from PIL import Image
+
+from export_assets import TARGETS, encode_within, export_master
+
+
+def test_png_budget_falls_back_to_palette():
+    noisy = Image.effect_noise((400, 400), 80).convert("RGB")
+    data, quality, _ = encode_within(noisy, "png", max_bytes=100_000)
+    assert quality is None
+    assert data.startswith(b"\x89PNG")
+
+
+def test_palette_master_exports(tmp_path):
+    master = tmp_path / "master.png"
+    Image.new("RGB", (1600, 1000), (20, 27, 45)).quantize(32).save(master)
+    results = export_master(master, [TARGETS["og"]], ["png", "jpeg"], tmp_path / "out", max_workers=2)
+    assert len(results) == 2
+    for result in results:
+        with Image.open(result.path) as im:
+            assert im.size == TARGETS["og"].size
+            assert im.mode == "RGB"
+
+
+def test_transparent_palette_master_keeps_alpha(tmp_path):
+    master = tmp_path / "master.png"
+    Image.new("RGBA", (1200, 1200), (255, 0, 0, 0)).quantize(4).save(master)
+    [result] = export_master(master, [TARGETS["square"]], ["png"], tmp_path / "out")
+    with Image.open(result.path) as im:
+        assert im.mode == "RGBA" and im.getpixel((0, 0))[3] == 0
+
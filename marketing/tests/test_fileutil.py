@@ -0,0 +1,49 @@
+import importlib
+import multiprocessing
+import sys
+import types
+
+import fileutil
+import model_router
+from model_router import ModelStats
+
+
+def test_lock_is_exclusive_across_processes(tmp_path):
+    lock, log = tmp_path / "x.lock", tmp_path / "log"
+    ctx = multiprocessing.get_context("spawn")
+    with fileutil.locked(lock):
+        child = ctx.Process(target=_append_locked, args=(str(lock), str(log)))
+        child.start()
+        child.join(0.5)
+        assert child.is_alive()  # waiting on our lock
+        log.write_text("parent\n")
+    child.join(10)
+    assert log.read_text() == "parent\nchild\n"
+
+
+def _append_locked(lock, log):
+    with fileutil.locked(lock):
+        with open(log, "a") as f:
+            f.write("child\n")
+
+
+def test_windows_lock_without_fcntl(tmp_path, monkeypatch):
+    calls = []
+    msvcrt = types.SimpleNamespace(LK_LOCK=1, LK_UNLCK=0,
+                                   locking=lambda fd, mode, size: calls.append((mode, size)))
+    monkeypatch.setitem(sys.modules, "fcntl", None)  # import fcntl raises ImportError
+    monkeypatch.setitem(sys.modules, "msvcrt", msvcrt)
+    try:
+        windows = importlib.reload(fileutil)
+        assert windows.fcntl is None
+        with windows.locked(tmp_path / "x.lock"):
+            assert calls == [(1, 1)]
+        assert calls == [(1, 1), (0, 1)]
+        monkeypatch.setattr(model_router, "locked", windows.locked)
+        stats = ModelStats(tmp_path / "stats.json", save_interval=0)
+        stats.record("m", 1.0, True)
+        assert len(ModelStats(tmp_path / "stats.json")._samples("m")) == 1
+        assert len(calls) == 4
+    finally:
+        monkeypatch.undo()
+        importlib.reload(fileutil)
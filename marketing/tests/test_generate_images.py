@@ -0,0 +1,218 @@
+import base64
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+import generate_images as gen
+from job_journal import JobJournal
+from model_router import ModelStats, Router
+
+
+def _png(color=(200, 40, 40)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+IMAGE = _png()
+
+
+def _pixels(png) -> bytes:
+    with Image.open(io.BytesIO(png) if isinstance(png, bytes) else png) as im:
+        return im.tobytes()
+
+
+class StubOpenRouter(ThreadingHTTPServer):
+    """Chat-completions stub: each model plays a script of responses, the last one repeating."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.scripts = {}
+        self.requests = []  # (model, arrival time)
+        self.active = self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_response(self, model: str) -> dict:
+        with self.lock:
+            self.requests.append((model, time.monotonic()))
+            script = self.scripts.get(model) or [{}]
+            return script.pop(0) if len(script) > 1 else script[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            response = server.next_response(body["model"])
+            time.sleep(response.get("delay", 0))
+            if response.get("status", 200) != 200:
+                self._error(response)
+            else:
+                self._image(response)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _error(self, response):
+        data = json.dumps({"error": "stub"}).encode()
+        self.send_response(response["status"])
+        for name, value in response.get("headers", {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _image(self, response):
+        url = "data:image/png;base64," + base64.b64encode(response.get("image", IMAGE)).decode()
+        head = json.dumps({"choices": [{"message": {"content": [
+            {"type": "image_url", "image_url": {"url": url}}]}}]})[:-1]
+        tail = ', "usage": ' + json.dumps(response.get("usage", {"cost": 0.01})) + "}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if response.get("truncate"):
+            self._chunk(head[:len(head) // 2].encode())
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self._chunk(head.encode())
+        self.wfile.flush()
+        time.sleep(response.get("usage_delay", 0.02))  # usage arrives in its own chunk
+        self._chunk(tail.encode())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+@pytest.fixture
+def openrouter(tmp_path, monkeypatch):
+    server = StubOpenRouter()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(gen, "OPENROUTER_BASE_URL", server.url)
+    monkeypatch.setattr(gen, "OUTPUT_DIR", tmp_path)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _prompts(n):
+    return [{"filename": f"{i:02d}.png", "prompt": f"prompt {i}"} for i in range(n)]
+
+
+def _hidden(path):
+    return sorted(p.name for p in path.iterdir() if p.name.startswith("."))
+
+
+def test_concurrency_is_bounded(openrouter, tmp_path):
+    openrouter.scripts["a"] = [{"delay": 0.2}]
+    succeeded = gen.run_prompts(_prompts(8), ["a"], concurrency=3)
+    assert len(succeeded) == 8
+    assert openrouter.max_active == 3
+    assert all(_pixels(tmp_path / name) == _pixels(IMAGE) for name in succeeded)
+
+
+def test_429_waits_for_retry_after(openrouter, tmp_path):
+    openrouter.scripts["a"] = [{"status": 429, "headers": {"Retry-After": "0.5"}}, {}]
+    assert gen.generate_image("p", "out.png", "a", timeout=5)
+    (_, first), (_, second) = openrouter.requests
+    assert second - first >= 0.5
+    assert _pixels(tmp_path / "out.png") == _pixels(IMAGE)
+
+
+def test_falls_back_to_next_model(openrouter, tmp_path):
+    openrouter.scripts["a"] = [{"status": 400}]
+    openrouter.scripts["b"] = [{"image": _png((0, 0, 255))}]
+    session = gen.make_session(1)
+    assert gen.generate_with_fallback(_prompts(1)[0], ["a", "b"], session, timeout=5)
+    assert [model for model, _ in openrouter.requests] == ["a", "b"]
+    assert Image.open(tmp_path / "00.png").getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_interrupted_download_leaves_no_partial_file(openrouter, tmp_path):
+    (tmp_path / "out.png").write_bytes(b"previous")
+    openrouter.scripts["a"] = [{"truncate": True}]
+    assert not gen.generate_image("p", "out.png", "a", timeout=5)
+    assert (tmp_path / "out.png").read_bytes() == b"previous"
+    assert _hidden(tmp_path) == []
+
+
+def test_usage_after_the_image_is_read(openrouter, tmp_path):
+    openrouter.scripts["a"] = [{"usage": {"cost": 0.123, "completion_tokens": 1290}}]
+    result = gen.request_image("p", "out.png", "a", timeout=5)
+    assert result["usage"] == {"cost": 0.123, "completion_tokens": 1290}
+
+
+def _router(tmp_path, models):
+    stats = ModelStats(tmp_path / "stats.json")
+    for _ in range(5):
+        stats.record(models[0], 0.05, True)  # p95 of 50 ms: hedge almost at once
+    return Router(models, stats, log=lambda *args: None)
+
+
+def test_hedge_that_finishes_after_losing_is_discarded(openrouter, tmp_path):
+    # The slow model's image is complete before the fast one wins; only its usage is still to come
+    openrouter.scripts["slow"] = [{"usage_delay": 0.5, "usage": {"cost": 0.02}}]
+    openrouter.scripts["fast"] = [{"delay": 0.2, "image": _png((0, 255, 0)), "usage": {"cost": 0.05}}]
+    router = _router(tmp_path, ["slow", "fast"])
+    assert gen.generate_routed(_prompts(1)[0], router, gen.make_session(2), timeout=5)
+    assert Image.open(tmp_path / "00.png").getpixel((0, 0)) == (0, 255, 0)
+    time.sleep(1.0)  # let the losing request finish
+    assert _hidden(tmp_path) == []
+    assert router.spent == pytest.approx(0.07)  # both generations billed at their real cost
+    assert router.stats.mean_cost("slow") == pytest.approx(0.02)
+
+
+def test_hedge_cancelled_before_a_response_releases_its_reservation(openrouter, tmp_path):
+    openrouter.scripts["slow"] = [{"status": 429, "headers": {"Retry-After": "5"}}, {}]
+    openrouter.scripts["fast"] = [{"usage": {"cost": 0.05}}]
+    router = _router(tmp_path, ["slow", "fast"])
+    assert gen.generate_routed(_prompts(1)[0], router, gen.make_session(2), timeout=5)
+    time.sleep(0.3)  # the slow attempt wakes from its backoff and gives up
+    assert router.spent == pytest.approx(0.05)
+    assert [model for model, _ in openrouter.requests].count("slow") == 1
+    assert _hidden(tmp_path) == []
+
+
+def test_unexpected_error_fails_only_that_prompt(openrouter, tmp_path, monkeypatch):
+    real = gen.generate_with_fallback
+
+    def flaky(item, *args):
+        if item["filename"] == "01.png":
+            raise KeyError("choices")
+        return real(item, *args)
+
+    monkeypatch.setattr(gen, "generate_with_fallback", flaky)
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    succeeded = gen.run_prompts(_prompts(3), ["a"], concurrency=2, journal=journal)
+    assert sorted(succeeded) == ["00.png", "02.png"]
+    assert journal.replay()["01.png"]["state"] == "failed"
+
+
+def test_saved_image_carries_prompt_and_model(openrouter, tmp_path):
+    assert gen.generate_image("Purple badges, gold stars", "out.png", "a", timeout=5)
+    with Image.open(tmp_path / "out.png") as im:
+        assert im.info["parameters"] == "Purple badges, gold stars\nModel: a"
+    assert _pixels(tmp_path / "out.png") == _pixels(IMAGE)
@@ -0,0 +1,67 @@
+import json
+
+import generate_images as gen
+from job_journal import JobJournal
+
+
+def _prompts(n):
+    return [{"filename": f"{i:02d}.png", "prompt": f"prompt {i}"} for i in range(n)]
+
+
+def _record(journal, item, state, out_dir):
+    key = gen.prompt_key(item)
+    if state == "done":
+        path = out_dir / item["filename"]
+        path.write_bytes(item["prompt"].encode())
+        journal.done(item["filename"], [path], key)
+    elif state == "failed":
+        journal.failed(item["filename"], "no model produced an image", key)
+    elif state == "in-flight":
+        journal.started(item["filename"], key)
+    else:
+        journal.queued(item["filename"], key)
+
+
+def test_pending_prompts_are_exactly_the_unfinished_ones(tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    prompts = _prompts(8)
+    for item in prompts:
+        _record(journal, item, "queued", tmp_path)
+    for item, state in zip(prompts, ["done", "done", "done", "done", "failed", "in-flight", "queued"]):
+        if state != "queued":
+            _record(journal, item, "in-flight", tmp_path)
+        _record(journal, item, state, tmp_path)
+    # prompts[7] was never started at all
+    (tmp_path / "01.png").unlink()  # output deleted since
+    (tmp_path / "02.png").write_bytes(b"edited")  # output changed since
+    prompts[3] = dict(prompts[3], prompt="a reworded prompt")  # same file, new prompt
+
+    pending = gen.pending_prompts(prompts, journal)
+    assert [item["filename"] for item in pending] == ["01.png", "02.png", "03.png", "04.png", "05.png",
+                                                      "06.png", "07.png"]
+    assert journal.summary() == {"done": 4, "failed": 1, "in-flight": 1, "queued": 2}
+
+
+def test_failed_then_done_counts_as_done(tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    [item] = _prompts(1)
+    _record(journal, item, "failed", tmp_path)
+    _record(journal, item, "done", tmp_path)
+    assert gen.pending_prompts([item], journal) == []
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    first, second = _prompts(2)
+    _record(journal, first, "done", tmp_path)
+    _record(journal, second, "in-flight", tmp_path)
+    line = json.dumps({"job": second["filename"], "state": "done", "key": gen.prompt_key(second),
+                       "outputs": []})
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(line[:len(line) // 2])  # the run died mid-write
+    assert journal.replay()[second["filename"]]["state"] == "in-flight"
+    assert gen.pending_prompts([first, second], journal) == [second]
+
+    # Appends after the crash still parse: the next record starts on a fresh line
+    _record(journal, second, "done", tmp_path)
+    assert gen.pending_prompts([first, second], journal) == []
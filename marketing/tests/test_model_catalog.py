@@ -0,0 +1,139 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+from model_catalog import ModelCatalog
+
+FIXTURE = Path(__file__).parent / "fixtures" / "openrouter_models.json"
+ETAG = '"models-v1"'
+LAST_MODIFIED = "Wed, 14 Oct 2026 09:00:00 GMT"
+
+
+class StubModels(ThreadingHTTPServer):
+    """Serves the recorded /models response, answering 304 to a matching ETag or date."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.body = FIXTURE.read_bytes()
+        self.requests = []  # request headers, one dict per GET
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1/models"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+
+@pytest.fixture
+def stub():
+    server = StubModels()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/v1/models"
+
+
+def _age(path: Path, seconds: float):
+    entry = json.loads(path.read_text())
+    entry["fetched"] -= seconds
+    path.write_text(json.dumps(entry))
+
+
+def test_fetch_then_cache_hit_within_ttl(stub, tmp_path):
+    path = tmp_path / "models.json"
+    first = ModelCatalog(path, ttl=60, url=stub.url).load()
+    assert first.source == "fetched"
+    assert len(first) == 5
+    second = ModelCatalog(path, ttl=60, url=stub.url).load()
+    assert second.source == "cache"
+    assert len(stub.requests) == 1  # no network inside the TTL
+    assert set(second.models) == set(first.models)
+
+
+def test_expired_cache_revalidates_with_304(stub, tmp_path):
+    path = tmp_path / "models.json"
+    ModelCatalog(path, ttl=60, url=stub.url).load()
+    _age(path, 120)
+    catalog = ModelCatalog(path, ttl=60, url=stub.url).load()
+    assert catalog.source == "revalidated"
+    assert len(catalog) == 5
+    headers = stub.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    # The 304 restarts the TTL
+    assert time.time() - json.loads(path.read_text())["fetched"] < 5
+    assert ModelCatalog(path, ttl=60, url=stub.url).load().source == "cache"
+
+
+def test_refresh_skips_the_ttl(stub, tmp_path):
+    path = tmp_path / "models.json"
+    ModelCatalog(path, ttl=60, url=stub.url).load()
+    assert ModelCatalog(path, ttl=60, url=stub.url).load(refresh=True).source == "revalidated"
+    assert len(stub.requests) == 2
+
+
+def test_stale_cache_used_when_offline(stub, tmp_path):
+    path = tmp_path / "models.json"
+    ModelCatalog(path, ttl=60, url=stub.url).load()
+    _age(path, 120)
+    catalog = ModelCatalog(path, ttl=60, url=_unused_url()).load()
+    assert catalog.source == "stale"
+    assert "openai/gpt-5-image" in catalog
+
+
+def test_offline_without_cache_raises(tmp_path):
+    with pytest.raises(requests.ConnectionError):
+        ModelCatalog(tmp_path / "models.json", url=_unused_url()).load()
+
+
+def test_queries(stub, tmp_path):
+    catalog = ModelCatalog(tmp_path / "models.json", url=stub.url).load()
+    assert [m.id for m in catalog.by_output["image"]] == [
+        "openai/gpt-5-image-mini", "google/gemini-2.5-flash-image-preview", "openai/gpt-5-image"]
+    assert catalog.cheapest().id == "openai/gpt-5-image-mini"
+    assert catalog.cheapest(output="text", input="image").id == "mistralai/mistral-small-3.2-24b-instruct"
+    # Legacy "modality" string and variable ("-1") prices
+    assert catalog.models["mistralai/mistral-small-3.2-24b-instruct"].input_modalities == ("text", "image")
+    assert catalog.models["openrouter/auto"].completion_price is None
+    assert catalog.query(output="text")[-1].id == "openrouter/auto"
+    assert [m.id for m in catalog.query(output="image", max_price=3e-6)] == [
+        "openai/gpt-5-image-mini", "google/gemini-2.5-flash-image-preview"]
+    assert [m.id for m in catalog.query(output="image", input="file", match="MINI")] == ["openai/gpt-5-image-mini"]
+    assert catalog.rank(["openai/gpt-5-image", "missing/model", "google/gemini-2.5-flash-image-preview"]) == [
+        "google/gemini-2.5-flash-image-preview", "openai/gpt-5-image"]
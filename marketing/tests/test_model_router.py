@@ -0,0 +1,55 @@
+import json
+import multiprocessing
+
+from model_router import ModelStats
+
+
+def test_concurrent_runs_keep_each_others_outcomes(tmp_path):
+    path = tmp_path / "stats.json"
+    first, second = ModelStats(path), ModelStats(path)
+    first.record("a", 1.0, True, 0.01)
+    second.record("a", 2.0, True, 0.02)
+    second.record("b", 3.0, False)
+    first.save()
+    second.save()
+    saved = json.loads(path.read_text())
+    assert sorted(s[1] for s in saved["a"]) == [1.0, 2.0]
+    assert len(saved["b"]) == 1
+    assert first.summary().keys() == {"a"}  # until its next save...
+    first.record("a", 4.0, True)
+    first.save()
+    assert set(first.summary()) == {"a", "b"}  # ...which adopts the other run's outcomes
+
+
+def test_outcomes_are_saved_during_the_run(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = ModelStats(path, save_interval=0)
+    stats.record("a", 1.0, True)
+    assert len(json.loads(path.read_text())["a"]) == 1  # survives a crash before close
+
+
+def test_window_applies_to_merged_history(tmp_path):
+    path = tmp_path / "stats.json"
+    for i in range(3):
+        stats = ModelStats(path, window=4)
+        stats.record("a", float(i), True)
+        stats.record("a", float(i) + 0.5, True)
+        stats.save()
+    assert [s[1] for s in json.loads(path.read_text())["a"]] == [1.0, 1.5, 2.0, 2.5]
+
+
+def _record_many(path, worker):
+    stats = ModelStats(path, save_interval=0)
+    for i in range(20):
+        stats.record(f"m{worker}", float(i), True)
+
+
+def test_parallel_processes(tmp_path):
+    path = tmp_path / "stats.json"
+    processes = [multiprocessing.get_context("fork").Process(target=_record_many, args=(path, w)) for w in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    saved = json.loads(path.read_text())
+    assert {model: len(samples) for model, samples in saved.items()} == {f"m{w}": 20 for w in range(4)}
@@ -0,0 +1,108 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from png_stream import SIGNATURE, PngStripReader, PngStripWriter
+
+WIDTH, HEIGHT = 317, 203  # odd width: rows don't align to any word size
+
+
+def _noise(mode, seed=0):
+    rng = np.random.default_rng(seed)
+    channels = len(mode)
+    data = rng.integers(0, 256, (HEIGHT, WIDTH, channels), dtype=np.uint8)
+    data[HEIGHT // 2:] //= 16  # a smoother half, so every Paeth branch gets picked
+    return Image.fromarray(data.squeeze(), mode)
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _png(width, height, raw: bytes, color_type=2):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return b"".join([SIGNATURE, _chunk(b"IHDR", ihdr), _chunk(b"IDAT", zlib.compress(raw, 9)),
+                     _chunk(b"IEND", b"")])
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "LA"])
+def test_writer_round_trips_through_pillow(tmp_path, mode):
+    image = _noise(mode)
+    path = tmp_path / "out.png"
+    with PngStripWriter(path, image.size, mode) as writer:
+        for top in range(0, HEIGHT, 37):
+            writer.write(image.crop((0, top, WIDTH, min(HEIGHT, top + 37))))
+    with Image.open(path) as decoded:
+        assert decoded.mode == mode
+        assert decoded.tobytes() == image.tobytes()
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_reader_matches_pillow(tmp_path, mode):
+    image = _noise(mode, seed=1)
+    path = tmp_path / "in.png"
+    image.save(path, optimize=True)  # Pillow picks a filter per row
+    reader = PngStripReader(path)
+    assert PngStripReader.supports(path) and reader.mode == mode
+    strips = list(reader.strips(rows=29))
+    assert [top for top, _ in strips] == list(range(0, HEIGHT, 29))
+    joined = Image.new(mode, image.size)
+    for top, strip in strips:
+        joined.paste(strip, (0, top))
+    assert joined.tobytes() == image.tobytes()
+
+
+def test_reader_keeps_the_palette_and_transparency(tmp_path):
+    path = tmp_path / "palette.png"
+    image = _noise("RGB").quantize(200)  # over 16 colours, so saved at 8 bits
+    image.save(path, transparency=3)
+    assert PngStripReader.supports(path)
+    [(_, strip), *_] = PngStripReader(path).strips(rows=64)
+    assert strip.mode == "P" and strip.info.get("transparency") == 3
+    with Image.open(path) as whole:
+        assert strip.convert("RGBA").tobytes() == whole.convert("RGBA").crop((0, 0, WIDTH, 64)).tobytes()
+
+
+def test_truncated_idat_is_an_error(tmp_path):
+    path = tmp_path / "in.png"
+    _noise("RGB").save(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        for _ in PngStripReader(path).strips(rows=16):
+            pass
+
+
+def test_flat_idat_inflates_a_strip_at_a_time(tmp_path):
+    # 4000x4000 flat RGB: a 48 MB image in a ~50 KB IDAT chunk
+    width = height = 4000
+    line = b"\x00" + bytes(width * 3)
+    path = tmp_path / "flat.png"
+    path.write_bytes(_png(width, height, line * height))
+    reader = PngStripReader(path)
+    limit = 16 * len(line)
+    assert max(len(piece) for piece in reader._inflated(limit)) <= limit
+    assert sum(strip.height for _, strip in reader.strips(rows=16)) == height
+
+
+def test_data_past_the_last_row_is_not_inflated(tmp_path, monkeypatch):
+    # IHDR says 8 rows, the IDAT holds 50,000: stop once the image is complete
+    width = 1000
+    line = b"\x00" + bytes(width * 3)
+    path = tmp_path / "oversized.png"
+    path.write_bytes(_png(width, 8, line * 50_000))
+    inflated = []
+    real = PngStripReader._inflated
+
+    def counting(self, limit):
+        for piece in real(self, limit):
+            inflated.append(len(piece))
+            yield piece
+
+    monkeypatch.setattr(PngStripReader, "_inflated", counting)
+    strips = list(PngStripReader(path).strips(rows=4))
+    assert [strip.height for _, strip in strips] == [4, 4]
+    assert sum(inflated) <= (8 + 4) * len(line)  # at most one strip of read-ahead
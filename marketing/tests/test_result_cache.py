@@ -0,0 +1,73 @@
+import json
+
+import result_cache
+from result_cache import ResultCache
+
+
+def _fill(tmp_path, n=3):
+    cache = ResultCache(tmp_path / "cache")
+    for i in range(n):
+        src = tmp_path / f"src{i}.png"
+        src.write_bytes(bytes([i]) * 1000)
+        cache.put(f"key{i}", src)
+    return cache
+
+
+def test_hits_do_not_rewrite_the_index(tmp_path, monkeypatch):
+    cache = _fill(tmp_path)
+    writes = []
+    monkeypatch.setattr(result_cache.ResultCache, "_save_index",
+                        lambda self, save=result_cache.ResultCache._save_index: (writes.append(1), save(self)))
+    for _ in range(50):
+        assert cache.get("key0") is not None
+    assert writes == []
+    cache.close()
+    assert len(writes) == 1
+    cache.close()  # nothing new to write
+    assert len(writes) == 1
+
+
+def test_access_times_persist_on_close(tmp_path):
+    cache = _fill(tmp_path)
+    before = json.loads((tmp_path / "cache" / "index.json").read_text())["key0"]["last_used"]
+    cache.get("key0")
+    cache.close()
+    after = json.loads((tmp_path / "cache" / "index.json").read_text())["key0"]["last_used"]
+    assert after > before
+
+
+def test_eviction_uses_unsaved_access_times(tmp_path):
+    cache = _fill(tmp_path)
+    cache.get("key0")  # now the most recently used
+    removed = cache.evict(2000)
+    assert removed == ["key1"]
+    assert set(json.loads((tmp_path / "cache" / "index.json").read_text())) == {"key0", "key2"}
+
+
+def test_concurrent_caches_merge_their_entries(tmp_path):
+    # Two runs sharing one cache directory, each with its own in-memory index
+    first, second = ResultCache(tmp_path / "cache"), ResultCache(tmp_path / "cache")
+    for name, cache in (("a", first), ("b", second)):
+        src = tmp_path / f"{name}.png"
+        src.write_bytes(b"x" * 1000)
+        cache.put(name, src)
+    first.get("a")
+    first.close()
+    second.close()
+    index = json.loads((tmp_path / "cache" / "index.json").read_text())
+    assert set(index) == {"a", "b"}
+    assert index["a"]["last_used"] > index["b"]["last_used"]
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir() if p.suffix == ".tmp") == []
+
+
+def test_budget_covers_other_runs_entries(tmp_path):
+    other = _fill(tmp_path)  # key0..key2, 1000 bytes each
+    cache = ResultCache(tmp_path / "cache", max_bytes=2500)
+    other.put("key3", tmp_path / "src0.png")  # not in `cache`'s in-memory index
+    src = tmp_path / "new.png"
+    src.write_bytes(b"y" * 1000)
+    cache.put("new", src)
+    index = json.loads((tmp_path / "cache" / "index.json").read_text())
+    assert set(index) == {"key3", "new"}
+    blobs = {p.stem for p in (tmp_path / "cache").glob("*.png")}
+    assert blobs == {"key3", "new"}  # evicted blobs are deleted, not orphaned
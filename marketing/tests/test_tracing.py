@@ -0,0 +1,22 @@
+import multiprocessing
+
+import tracing
+
+
+def _child_events(_):
+    tracing.count("child")
+    return tracing.drain()
+
+
+def test_forked_worker_does_not_inherit_events(tmp_path):
+    tracing.configure(str(tmp_path / "trace.json"))
+    try:
+        with tracing.span("parent"):
+            tracing.count("child", 5)
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            [events] = pool.map(_child_events, [None])
+        assert [e["name"] for e in events] == ["child"]
+        assert events[0]["args"] == {"child": 1}  # counter totals restart too
+        assert len(tracing.drain()) == 2
+    finally:
+        tracing.configure()
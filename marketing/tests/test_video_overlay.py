@@ -0,0 +1,93 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import video_overlay
+from add_brand_overlay import VARIANTS_BY_NAME
+from video_overlay import OverlayLayer, brand_video
+
+SIZE = (96, 64)
+
+
+def _known_layer(width, height):
+    """An RGBA layer covering every alpha level, from fully clear to opaque."""
+    rng = np.random.default_rng(7)
+    rgba = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    rgba[0, :, 3], rgba[1, :, 3] = 0, 255
+    rgba[2, :256, 3] = np.arange(min(width, 256))
+    return Image.fromarray(rgba, "RGBA")
+
+
+def test_coverage_math_matches_alpha_composite(monkeypatch):
+    width, height = SIZE
+    top = 20
+    layer_image = _known_layer(width, height - top)
+    monkeypatch.setattr(video_overlay, "overlay_rows", lambda spec, size: [(top, size[1])])
+    monkeypatch.setattr(video_overlay, "paint_overlay",
+                        lambda band, spec, size, band_top: band.alpha_composite(layer_image))
+    layer = OverlayLayer.render(None, SIZE)
+
+    frame = np.random.default_rng(3).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    expected = Image.fromarray(frame).convert("RGBA")
+    expected.alpha_composite(layer_image, (0, top))
+    expected = np.asarray(expected.convert("RGB"))
+
+    untouched = frame[:top].copy()
+    layer.apply(frame)
+    assert np.array_equal(frame[:top], untouched)  # rows outside the band pass through
+    assert np.abs(frame.astype(int) - expected.astype(int)).max() <= 1  # rounding only
+
+
+class FakeFfmpeg:
+    """Popen stand-in streaming five black raw frames; records how it was shut down."""
+
+    instances = []
+
+    def __init__(self, command, stdout=None, **kwargs):
+        width, height = SIZE
+        self.stdout = io.BytesIO(bytes(width * height * 3) * 5)
+        self.killed = False
+        self.returncode = None
+        FakeFfmpeg.instances.append(self)
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self):
+        self.returncode = -9 if self.killed else 0
+        return self.returncode
+
+
+def test_failed_blend_stops_the_decoder(tmp_path, monkeypatch):
+    FakeFfmpeg.instances.clear()
+    monkeypatch.setattr(video_overlay, "_require_ffmpeg", lambda: None)
+    monkeypatch.setattr(video_overlay, "probe", lambda path: (*SIZE, 25.0))
+    monkeypatch.setattr(video_overlay.subprocess, "Popen", FakeFfmpeg)
+    blended = []
+
+    def apply(self, frame):
+        if len(blended) == 2:
+            raise MemoryError("blend failed")
+        blended.append(1)
+
+    monkeypatch.setattr(OverlayLayer, "apply", apply)
+    with pytest.raises(MemoryError):
+        brand_video(VARIANTS_BY_NAME["leaderboard"], tmp_path / "clip.mp4", tmp_path / "frames")
+    [ffmpeg] = FakeFfmpeg.instances
+    assert ffmpeg.killed and ffmpeg.stdout.closed and ffmpeg.returncode is not None
+    assert len(list((tmp_path / "frames").iterdir())) == 2
+
+
+def test_image_sequence_round_trip(tmp_path):
+    source = tmp_path / "in"
+    source.mkdir()
+    for i in range(3):
+        Image.new("RGB", (320, 240), (10 * i, 80, 160)).save(source / f"f{i}.png")
+    spec = VARIANTS_BY_NAME["leaderboard"]
+    assert brand_video(spec, source, tmp_path / "out") == 3
+    with Image.open(source / "f0.png") as before, Image.open(tmp_path / "out" / "f0.png") as after:
+        assert after.size == before.size
+        assert after.getpixel((5, 5)) == before.getpixel((5, 5))  # above the overlay band
+        assert after.tobytes() != before.tobytes()
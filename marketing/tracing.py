@@ -0,0 +1,162 @@
+"""
+Lightweight spans, counters and cProfile hooks for the marketing scripts.
+
+    with tracing.span("encode", path=str(out)):
+        save_image(img, out)
+    tracing.count("bytes_downloaded", len(chunk))
+
+Nothing is recorded until a script calls configure() (its --trace flag).
+Events are kept in memory per process (a forked worker starts with none);
+pool workers hand theirs back with drain() and the parent absorb()s them,
+so one trace covers the whole run.
+write() emits Chrome trace-event JSON (open in chrome://tracing or
+Perfetto) or, for a .jsonl path, one event per line.
+
+--profile wraps work in cProfile and dumps one .prof per worker process
+(and per thread for thread pools), for snakeviz / pstats.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_ENV = "MARKETING_TRACE"
+PROFILE_ENV = "MARKETING_PROFILE"
+
+_lock = threading.Lock()
+_events = []
+_counters = {}
+_local = threading.local()
+_trace_path = os.environ.get(TRACE_ENV) or None
+_profile_prefix = os.environ.get(PROFILE_ENV) or None
+
+
+def _forget_inherited():
+    """A forked worker starts with the parent's events; they are the parent's to write."""
+    global _lock
+    _lock = threading.Lock()  # another thread may have held it at fork
+    _events.clear()
+    _counters.clear()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX; spawned workers start empty anyway
+    os.register_at_fork(after_in_child=_forget_inherited)
+
+
+def configure(trace_path: str = None, profile_prefix: str = None):
+    """Turn tracing / profiling on for this process and any workers it starts."""
+    global _trace_path, _profile_prefix
+    _trace_path, _profile_prefix = trace_path or None, profile_prefix or None
+    # Workers inherit these on fork and re-read them on import under spawn
+    for name, value in ((TRACE_ENV, _trace_path), (PROFILE_ENV, _profile_prefix)):
+        if value:
+            os.environ[name] = str(value)
+        else:
+            os.environ.pop(name, None)
+
+
+def enabled() -> bool:
+    return _trace_path is not None
+
+
+def _now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+
+@contextmanager
+def span(name: str, **args):
+    """Time the enclosed block as a complete ("X") event."""
+    if _trace_path is None:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {"name": name, "ph": "X", "ts": start, "dur": _now_us() - start,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with _lock:
+            _events.append(event)
+
+
+def count(name: str, value: float = 1):
+    """Add ``value`` to a running counter, recorded as a counter ("C") event."""
+    if _trace_path is None:
+        return
+    with _lock:
+        total = _counters[name] = _counters.get(name, 0) + value
+        _events.append({"name": name, "ph": "C", "ts": _now_us(), "pid": os.getpid(),
+                        "args": {name: total}})
+
+
+def drain() -> list:
+    """Take (and forget) the events recorded in this process."""
+    with _lock:
+        events = list(_events)
+        _events.clear()
+    return events
+
+
+def absorb(events: list):
+    """Add events handed back from a worker."""
+    if events:
+        with _lock:
+            _events.extend(events)
+
+
+def write(path: str = None) -> Path:
+    """Write every event recorded or absorbed so far; returns the path or None."""
+    path = path or _trace_path
+    if path is None:
+        return None
+    path = Path(path)
+    events = drain()
+    events.sort(key=lambda e: e["ts"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for event in events:
+                f.write(json.dumps(event, separators=(",", ":")) + "\n")
+        else:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Trace written: {path} ({len(events)} events)")
+    return path
+
+
+@contextmanager
+def profiled():
+    """Profile the enclosed block into this thread's cProfile, then dump it.
+
+    Each thread of each process keeps one cumulative profile, written to
+    ``<prefix>.<pid>[-<thread>].prof`` after every block.
+    """
+    if _profile_prefix is None:
+        yield
+        return
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        profile = _local.profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        thread = threading.current_thread()
+        suffix = "" if thread is threading.main_thread() else f"-{thread.name}"
+        path = Path(f"{_profile_prefix}.{os.getpid()}{suffix}.prof")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+
+
+def add_arguments(parser):
+    """The --trace / --profile flags every instrumented script shares."""
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write a Chrome trace-event JSON (or .jsonl) of per-stage timings")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="Run under cProfile, writing PREFIX.<pid>.prof per worker")
+    return parser
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Burn the brand overlay (gradient bar, headline, subtitle, logo) into video frames.
+
+The overlay never changes between frames, so it is rendered once per clip:
+add_brand_overlay's paint_overlay is run over a black and a white band, and
+the two results give the layer as premultiplied colour plus alpha. Each
+frame then only has its overlay rows blended in NumPy,
+
+    out = overlay_rgb + frame * (255 - alpha) / 255
+
+in place in the frame buffer. Every other row is passed through as-is.
+
+Frames stream in from ffmpeg (raw RGB over a pipe) or from an image
+sequence, and stream out the same way; nothing is written in between.
+
+    python video_overlay.py ../video/output/intro.mp4 intro_branded.mp4 --variant leaderboard
+    python video_overlay.py frames/ branded_frames/ --variant rewards --headline "EARN REAL CASH"
+"""
+import argparse
+import contextlib
+import dataclasses
+import json
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import tracing
+from add_brand_overlay import VARIANTS_BY_NAME, load_specs, overlay_rows, paint_overlay, warm_assets
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".webm", ".avi", ".gif"}
+FRAME_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+DEFAULT_FPS = 30.0
+
+
+@dataclass
+class OverlayLayer:
+    """The overlay of one spec at one frame size, as premultiplied bands."""
+    size: tuple
+    bands: list  # (top, bottom, rgb uint16 (h, w, 3), coverage uint16 (h, w, 3)), coverage = 255 - alpha
+
+    @classmethod
+    def render(cls, spec, size: tuple) -> "OverlayLayer":
+        width, _ = size
+        bands = []
+        for top, bottom in overlay_rows(spec, size):
+            layers = []
+            for background in ((0, 0, 0, 255), (255, 255, 255, 255)):
+                band = Image.new("RGBA", (width, bottom - top), background)
+                paint_overlay(band, spec, size, top)
+                layers.append(np.asarray(band.convert("RGB"), dtype=np.int16))
+            over_black, over_white = layers
+            # Painting is linear in the background: black gives the premultiplied colour,
+            # white minus black how much of the background still shows through
+            coverage = np.clip(over_white - over_black, 0, 255).astype(np.uint16)
+            bands.append((top, bottom, over_black.astype(np.uint16), coverage))
+        return cls(size, bands)
+
+    def apply(self, frame: np.ndarray):
+        """Blend the overlay into an (h, w, 3) uint8 frame in place."""
+        for top, bottom, rgb, coverage in self.bands:
+            region = frame[top:bottom]
+            blended = region * coverage
+            blended += 127
+            blended //= 255
+            blended += rgb
+            np.minimum(blended, 255, out=blended)
+            region[...] = blended
+
+
+def probe(path) -> tuple:
+    """(width, height, fps) of a video's first stream, via ffprobe."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height,r_frame_rate",
+         "-of", "json", str(path)],
+        check=True, capture_output=True, text=True).stdout
+    stream = json.loads(out)["streams"][0]
+    num, _, den = stream["r_frame_rate"].partition("/")
+    return stream["width"], stream["height"], float(num) / float(den or 1)
+
+
+def _require_ffmpeg():
+    for tool in ("ffmpeg", "ffprobe"):
+        if shutil.which(tool) is None:
+            raise RuntimeError(f"{tool} not found on PATH (needed for video files; image sequences work without)")
+
+
+def video_frames(path, size: tuple):
+    """Yield writable (h, w, 3) frames decoded by ffmpeg, reusing one buffer."""
+    width, height = size
+    process = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        stdout=subprocess.PIPE)
+    buffer = bytearray(width * height * 3)
+    view = memoryview(buffer)
+    frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+    try:
+        while True:
+            filled = 0
+            while filled < len(buffer):
+                n = process.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            if filled < len(buffer):
+                break
+            yield frame
+    except GeneratorExit:
+        process.kill()  # closed early: don't leave ffmpeg blocked on a full pipe
+        raise
+    finally:
+        process.stdout.close()
+        process.wait()
+    if process.returncode:
+        raise RuntimeError(f"ffmpeg failed decoding {path} (exit {process.returncode})")
+
+
+class VideoWriter:
+    """Encode raw RGB frames with ffmpeg, copying the source's audio if it has any."""
+
+    def __init__(self, path, size: tuple, fps: float, audio_from=None, crf: int = 18):
+        width, height = size
+        command = ["ffmpeg", "-v", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{width}x{height}", "-r", f"{fps:g}", "-i", "-"]
+        if audio_from is not None:
+            command += ["-i", str(audio_from), "-map", "0:v", "-map", "1:a?", "-c:a", "copy", "-shortest"]
+        command += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(crf), str(path)]
+        self.path = path
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray):
+        self._process.stdin.write(memoryview(frame).cast("B"))
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait():
+            raise RuntimeError(f"ffmpeg failed encoding {self.path} (exit {self._process.returncode})")
+
+
+def sequence_files(path) -> list:
+    """Frames of an image sequence: a directory's images or a glob, in name order."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() in FRAME_EXTENSIONS)
+    return sorted(path.parent.glob(path.name))
+
+
+def sequence_frames(files: list):
+    """Yield (file, writable (h, w, 3) frame) for each image."""
+    for file in files:
+        with Image.open(file) as im:
+            yield file, np.array(im.convert("RGB"))
+
+
+def is_video(path) -> bool:
+    return Path(path).suffix.lower() in VIDEO_EXTENSIONS
+
+
+def brand_video(spec, source, output, fps: float = None) -> int:
+    """Overlay ``spec`` onto every frame of ``source``; returns the frame count.
+
+    ``source`` and ``output`` are each a video file or an image sequence
+    (directory, or a glob for the source).
+    """
+    if is_video(source) or is_video(output):
+        _require_ffmpeg()
+    if is_video(source):
+        width, height, source_fps = probe(source)
+        decoder = video_frames(source, (width, height))
+        frames = ((None, frame) for frame in decoder)
+    else:
+        files = sequence_files(source)
+        if not files:
+            raise FileNotFoundError(f"no frames match {source}")
+        with Image.open(files[0]) as first:
+            width, height = first.size
+        source_fps = None
+        frames = decoder = sequence_frames(files)
+
+    with tracing.span("overlay_layer", spec=spec.name):
+        warm_assets([spec])
+        layer = OverlayLayer.render(spec, (width, height))
+
+    if is_video(output):
+        writer = VideoWriter(output, (width, height), fps or source_fps or DEFAULT_FPS,
+                             audio_from=source if is_video(source) else None)
+    else:
+        Path(output).mkdir(parents=True, exist_ok=True)
+        writer = None
+
+    count = 0
+    # closing(): a failed blend or encode must still stop the decoder (and its ffmpeg)
+    with tracing.span("frames", source=str(source)), contextlib.closing(decoder):
+        try:
+            for file, frame in frames:
+                if frame.shape[:2] != (height, width):
+                    raise ValueError(f"{file}: frame is {frame.shape[1]}x{frame.shape[0]}, expected {width}x{height}")
+                layer.apply(frame)
+                if writer is not None:
+                    writer.write(frame)
+                else:
+                    name = file.name if file is not None else f"frame_{count:06d}.png"
+                    Image.fromarray(frame).save(Path(output) / name)
+                count += 1
+        finally:
+            if writer is not None:
+                writer.close()
+    tracing.count("frames_branded", count)
+    print(f"Saved: {output} ({count} frames)")
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Burn the brand overlay into a video or image sequence.")
+    parser.add_argument("source", help="Video file, frame directory, or frame glob")
+    parser.add_argument("output", help="Video file (.mp4, ...) or output frame directory")
+    parser.add_argument("--variant", default="leaderboard", help="Overlay variant name")
+    parser.add_argument("--spec", help="JSON variant table to take --variant from")
+    parser.add_argument("--headline", help="Override the variant's headline")
+    parser.add_argument("--subtitle", help="Override the variant's subtitle")
+    parser.add_argument("--fps", type=float, help="Output frame rate (default: the source's, else 30)")
+    tracing.add_arguments(parser)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    tracing.configure(args.trace, args.profile)
+    specs = {s.name: s for s in load_specs(args.spec)} if args.spec else VARIANTS_BY_NAME
+    if args.variant not in specs:
+        print(f"Unknown variant {args.variant!r}; choose from {', '.join(specs)}")
+        return 1
+    spec = specs[args.variant]
+    overrides = {k: v for k, v in (("headline", args.headline), ("subtitle", args.subtitle)) if v is not None}
+    if overrides:
+        spec = dataclasses.replace(spec, **overrides)
+
+    with tracing.profiled():
+        brand_video(spec, args.source, args.output, fps=args.fps)
+    tracing.write()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Batch voiceover narration with pocket_tts.
+
+Reads a script file - one clip per line, optionally ``clip_id | text``;
+blank lines and ``#`` comments are skipped - and writes one WAV per line to
+the output directory as soon as that line is synthesized.
+
+The expensive parts happen once: each worker process loads the model a
+single time, and the voice prompt's state is computed once and cached under
+.cache/voices, keyed by the voice file's hash, so later runs (and every
+worker) just load it. Lines are handed to workers in batches; existing
+clips are skipped unless --force.
+
+    python voiceover.py narration.txt --workers 3
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+
+from fileutil import file_hash
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_VOICE = "hf://kyutai/tts-voices/alba-mackenna/casual.wav"
+VOICE_CACHE_DIR = SCRIPT_DIR / ".cache" / "voices"
+OUTPUT_DIR = SCRIPT_DIR / "voiceover"
+BATCH_SIZE = 4
+
+# Per-process state: the model and voice states are loaded once per worker
+_model = None
+_voice_states = {}
+
+
+@dataclass
+class Line:
+    clip_id: str
+    text: str
+
+
+def load_script(path) -> list:
+    """Parse a narration script into Lines, numbering those without an id."""
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw or raw.startswith("#"):
+                continue
+            clip_id, sep, text = raw.partition("|")
+            if not sep:
+                clip_id, text = f"line-{len(lines) + 1:03d}", raw
+            clip_id = re.sub(r"[^\w.-]+", "_", clip_id.strip())
+            lines.append(Line(clip_id, text.strip()))
+    return lines
+
+
+def resolve_voice(voice: str) -> Path:
+    """Local path of a voice prompt, downloading ``hf://owner/repo/file`` voices."""
+    if voice.startswith("hf://"):
+        from huggingface_hub import hf_hub_download
+        owner, repo, filename = voice[len("hf://"):].split("/", 2)
+        return Path(hf_hub_download(repo_id=f"{owner}/{repo}", filename=filename))
+    return Path(voice)
+
+
+def get_model():
+    global _model
+    if _model is None:
+        from pocket_tts import TTSModel
+        _model = TTSModel.load_model()
+    return _model
+
+
+def voice_cache_path(voice: str, cache_dir: Path = VOICE_CACHE_DIR) -> Path:
+    import pocket_tts
+    version = getattr(pocket_tts, "__version__", "unknown")
+    # The state depends on the model too, so a pocket_tts upgrade re-computes it
+    return Path(cache_dir) / f"{file_hash(resolve_voice(voice))[:32]}-{version}.pt"
+
+
+def get_voice_state(voice: str, cache_dir: Path = VOICE_CACHE_DIR):
+    """Voice prompt state: memoized per process, cached on disk across runs."""
+    import torch
+
+    if voice in _voice_states:
+        return _voice_states[voice]
+    path = voice_cache_path(voice, cache_dir)
+    if path.exists():
+        # Our own cache file; the state holds more than bare tensors
+        state = torch.load(path, weights_only=False)
+    else:
+        state = get_model().get_state_for_audio_prompt(str(resolve_voice(voice)))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        torch.save(state, tmp)
+        os.replace(tmp, path)
+        print(f"Cached voice state: {path}")
+    _voice_states[voice] = state
+    return state
+
+
+def write_wav(path: Path, sample_rate: int, audio):
+    """Write a clip atomically so an interrupted run never leaves a partial WAV."""
+    import scipy.io.wavfile
+
+    tmp = path.with_name(f".{path.name}.tmp")
+    scipy.io.wavfile.write(tmp, sample_rate, audio.numpy())
+    os.replace(tmp, path)
+
+
+def _init_worker(voice: str, cache_dir: Path, threads: int):
+    import torch
+
+    torch.set_num_threads(threads)  # keep workers from oversubscribing the CPU
+    get_model()
+    get_voice_state(voice, cache_dir)
+
+
+def synthesize_batch(lines: list, voice: str, output_dir: Path, cache_dir: Path = VOICE_CACHE_DIR) -> list:
+    """Synthesize ``lines`` in order, writing each WAV as it finishes.
+
+    Returns (clip_id, seconds) per line.
+    """
+    model = get_model()
+    state = get_voice_state(voice, cache_dir)
+    done = []
+    for line in lines:
+        audio = model.generate_audio(state, line.text)
+        path = Path(output_dir) / f"{line.clip_id}.wav"
+        write_wav(path, model.sample_rate, audio)
+        seconds = audio.shape[-1] / model.sample_rate
+        print(f"Saved: {path} ({seconds:.1f}s)", flush=True)
+        done.append((line.clip_id, seconds))
+    return done
+
+
+def run_script(lines: list, voice: str = DEFAULT_VOICE, output_dir: Path = OUTPUT_DIR, workers: int = 1,
+               batch_size: int = BATCH_SIZE, cache_dir: Path = VOICE_CACHE_DIR) -> tuple:
+    """Synthesize every line; returns (succeeded clip ids, failed clip ids)."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    batches = [lines[i:i + batch_size] for i in range(0, len(lines), batch_size)]
+
+    if workers == 1:
+        succeeded, failed = [], []
+        for batch in batches:
+            try:
+                succeeded += [clip_id for clip_id, _ in synthesize_batch(batch, voice, output_dir, cache_dir)]
+            except Exception as e:
+                print(f"Failed: {', '.join(l.clip_id for l in batch)} ({e})")
+                failed += [l.clip_id for l in batch]
+        return succeeded, failed
+
+    # Compute the voice state here first so workers load it instead of racing to build it
+    if not voice_cache_path(voice, cache_dir).exists():
+        get_voice_state(voice, cache_dir)
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    succeeded, failed = [], []
+    # spawn: torch's thread pools don't survive fork reliably
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                             initializer=_init_worker, initargs=(voice, cache_dir, threads)) as pool:
+        futures = {pool.submit(synthesize_batch, batch, voice, output_dir, cache_dir): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                succeeded += [clip_id for clip_id, _ in future.result()]
+            except Exception as e:
+                batch = futures[future]
+                print(f"Failed: {', '.join(l.clip_id for l in batch)} ({e})")
+                failed += [l.clip_id for l in batch]
+    return succeeded, failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Synthesize narration lines to WAV clips with pocket_tts.")
+    parser.add_argument("script", help="Text file: one line per clip, optionally 'clip_id | text'")
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Voice prompt (local WAV or hf:// path)")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR))
+    parser.add_argument("--workers", "-j", type=int, default=1, help="Worker processes, each with its own model")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Lines handed to a worker at a time")
+    parser.add_argument("--cache-dir", default=str(VOICE_CACHE_DIR), help="Voice state cache")
+    parser.add_argument("--force", action="store_true", help="Re-synthesize clips that already exist")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    lines = load_script(args.script)
+    output_dir = Path(args.output_dir)
+    todo = [line for line in lines if args.force or not (output_dir / f"{line.clip_id}.wav").exists()]
+    if len(todo) < len(lines):
+        print(f"Skipping {len(lines) - len(todo)} existing clips")
+    if not todo:
+        return 0
+
+    succeeded, failed = run_script(todo, args.voice, output_dir, workers=max(1, args.workers),
+                                   batch_size=max(1, args.batch_size), cache_dir=Path(args.cache_dir))
+    print(f"\n{len(succeeded)}/{len(todo)} clips synthesized")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())